@@ -1,12 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 import subprocess
 import tempfile
 import os
 import json
 import re
-from kmap_utils import BooleanExpressionSolver
+from kmap_utils import BooleanExpressionSolver, VECTOR_FILE, TESTBENCH_MODES
 from verilog_runner import VerilogSimulator
+from simulation_pool import SimulationExecutor, SimulationBusy
+from native_simulator import NativeSimulator
+from batch import BatchProcessor
+from jobs import JobManager
+from waveform_store import WaveformStore
+from waveform_packing import pack_waveform, CONTENT_TYPE as PACKED_WAVEFORM_TYPE
+import base64
+import random
+import time
+from metrics import REGISTRY, timed, start_request_timing, request_timings, server_timing_header
 
 app = Flask(__name__)
 CORS(app)
@@ -14,6 +24,165 @@ CORS(app)
 # Initialize solvers
 boolean_solver = BooleanExpressionSolver()
 verilog_simulator = VerilogSimulator()
+simulation_executor = SimulationExecutor(verilog_simulator)
+native_simulator = NativeSimulator()
+batch_processor = BatchProcessor()
+job_manager = JobManager(simulation_executor)
+waveform_store = WaveformStore()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'kmap_request_duration_seconds', 'Time to produce each response', ('endpoint',)
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    'kmap_request_errors_total', 'Requests that failed, by endpoint and exception type', ('endpoint', 'error')
+)
+
+def cache_samples():
+    samples = {'hits': [], 'misses': []}
+    for name, stats in boolean_solver.cache_stats().items():
+        if 'hits' not in stats:
+            # Not a cache (the NPN canonicalization counters)
+            continue
+        samples['hits'].append(((name,), stats['hits']))
+        samples['misses'].append(((name,), stats['misses']))
+    disk = verilog_simulator.cache.counters()
+    samples['hits'].append((('simulation',), disk['hits']))
+    samples['misses'].append((('simulation',), disk['misses']))
+    return samples
+
+REGISTRY.callback('kmap_cache_hits_total', 'Result cache hits', 'counter', ('cache',),
+                  lambda: cache_samples()['hits'])
+REGISTRY.callback('kmap_cache_misses_total', 'Result cache misses', 'counter', ('cache',),
+                  lambda: cache_samples()['misses'])
+REGISTRY.callback('kmap_simulation_queue', 'Simulations waiting for or running on a worker', 'gauge', ('state',),
+                  lambda: [((state,), simulation_executor.stats()[state]) for state in ('queued', 'running')])
+REGISTRY.callback('kmap_simulation_rejected_total', 'Simulations rejected because the queue was full', 'counter', (),
+                  lambda: [((), simulation_executor.stats()['rejected'])])
+REGISTRY.callback('kmap_simplify_check_mismatches_total', 'Minimized forms that did not match their truth table',
+                  'counter', (), lambda: [((), boolean_solver.check_stats()['mismatches'])])
+REGISTRY.callback('kmap_native_cross_check_mismatches_total', 'Fast-mode results that differed from iverilog',
+                  'counter', (), lambda: [((), native_simulator.stats()['mismatches'])])
+
+@app.before_request
+def start_timing():
+    g.request_started = time.perf_counter()
+    start_request_timing()
+
+@app.after_request
+def add_server_timing(response):
+    started = getattr(g, 'request_started', None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    REQUEST_DURATION.observe(total, request.endpoint or 'unknown')
+    
+    # Streamed bodies are produced after this point, so only setup is counted
+    timings = dict(request_timings())
+    timings['total'] = total
+    response.headers['Server-Timing'] = server_timing_header(timings)
+    # Let the frontend (another origin) read the timings in devtools
+    response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+def error_response(error):
+    """The usual failure body, counted by endpoint and exception type"""
+    REQUEST_ERRORS.inc(request.endpoint or 'unknown', type(error).__name__)
+    if not isinstance(error, ValueError):
+        # Bad input raises ValueError; anything else is worth a traceback
+        app.logger.exception("Request to %s failed", request.path)
+    return jsonify({"success": False, "error": str(error)})
+
+# Fraction of fast-mode simulations re-run through iverilog in the background
+NATIVE_CROSS_CHECK_RATE = float(os.environ.get('KMAP_NATIVE_CROSS_CHECK', '0'))
+SIMULATION_MODES = ('fast', 'iverilog')
+
+def check_simulation_mode(mode):
+    if mode not in SIMULATION_MODES:
+        raise ValueError(f"Unknown simulation mode '{mode}' (expected one of {', '.join(SIMULATION_MODES)})")
+
+def testbench_options(data):
+    """Testbench settings of a request: {'mode', 'dump_rows'}
+    
+    "check" emits the self-checking testbench; `dump_rows` = [start, end]
+    limits its waveform dump to those rows (it dumps nothing otherwise).
+    """
+    mode = data.get('testbench', 'display')
+    if mode not in TESTBENCH_MODES:
+        raise ValueError(f"Unknown testbench '{mode}' (expected one of {', '.join(TESTBENCH_MODES)})")
+    
+    dump_rows = data.get('dump_rows')
+    if dump_rows is not None:
+        if mode != 'check':
+            raise ValueError("dump_rows needs the check testbench")
+        if (not isinstance(dump_rows, list) or len(dump_rows) != 2
+                or not all(isinstance(row, int) for row in dump_rows)
+                or not 0 <= dump_rows[0] < dump_rows[1]):
+            raise ValueError("dump_rows must be [start, end] with 0 <= start < end")
+        dump_rows = tuple(dump_rows)
+    
+    return {'mode': mode, 'dump_rows': dump_rows}
+
+def testbench_files(testbench, pipelines):
+    """Data files the testbench reads: the expected vectors in check mode,
+    from the truth tables of `pipelines` (built only then)"""
+    if testbench['mode'] != 'check':
+        return None
+    return {VECTOR_FILE: boolean_solver.expected_vectors([pipeline.truth_table() for pipeline in pipelines])}
+
+def simulate_generated(expression, result, verilog_code, mode, progress=None, outputs=None):
+    """Simulate the generated testbench natively or through the toolchain
+    
+    Jobs pass `progress` to hear about each stage; they already run on the
+    simulation pool, so their toolchain runs happen inline. Multi-output
+    modules pass `outputs` (name -> truth table); a single expression
+    passes its pipeline in result['pipeline'], and only fast mode asks it
+    for the truth table. A self-checking testbench comes with
+    result['testbench'] and its vector file in result['testbench_files'].
+    """
+    check_simulation_mode(mode)
+    files = result.get('testbench_files')
+    
+    if mode == 'iverilog':
+        if progress is not None:
+            return verilog_simulator.simulate_verilog(verilog_code, progress, files)
+        return simulation_executor.simulate(verilog_code, files=files)
+    
+    truth_table = next(iter(outputs.values())) if outputs else result['pipeline'].truth_table()
+    with timed('native_simulation'):
+        simulation_result = native_simulator.simulate(
+            expression, truth_table, outputs, result.get('testbench')
+        )
+    if progress is not None:
+        # Nothing is compiled in fast mode
+        progress('simulated')
+        progress('parsed')
+    
+    if NATIVE_CROSS_CHECK_RATE and random.random() < NATIVE_CROSS_CHECK_RATE:
+        def cross_check():
+            real_result = verilog_simulator.simulate_verilog(verilog_code, files=files)
+            real_waveform = verilog_simulator.aligned_waveform(real_result.get('waveform_data', {}))
+            native_simulator.cross_check(simulation_result, dict(real_result, waveform_data=real_waveform))
+        try:
+            simulation_executor.submit(cross_check)
+        except SimulationBusy:
+            pass  # Never let sampling compete with real requests
+    
+    return simulation_result
+
+# Longest a long-poll may wait, and the SSE keepalive interval (seconds)
+MAX_JOB_WAIT = 30.0
+JOB_KEEPALIVE = 15.0
+
+def busy_response(error):
+    """503 telling the client when to retry a rejected simulation"""
+    response = jsonify({
+        "success": False,
+        "error": str(error),
+        "retry_after_ms": error.retry_after_ms
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, -(-error.retry_after_ms // 1000)))
+    return response
 
 @app.route('/')
 def home():
@@ -22,10 +191,80 @@ def home():
         "endpoints": {
             "/generate_truth_table": "Generate truth table for Boolean expression",
             "/generate_kmap": "Generate K-map and simplified expression",
-            "/generate_verilog": "Generate Verilog code and simulate"
+            "/generate_verilog": "Generate Verilog code and simulate",
+            "/generate_module": "One Verilog module with several named outputs, simulated together",
+            "/analyze_expression": "Counts, cubes and minterms of expressions with up to 64 inputs, via a BDD",
+            "/equivalent": "Check expressions against the first one, with a counterexample per mismatch",
+            "/batch": "Run several expressions, streaming NDJSON results",
+            "/jobs/generate_verilog": "Start Verilog generation and simulation in the background",
+            "/jobs/<job_id>": "Job status and progress events (long-poll with wait/after)",
+            "/jobs/<job_id>/events": "Job progress as Server-Sent Events",
+            "/jobs/<job_id>/result": "Result of a finished job",
+            "/cache_stats": "Result cache hit/miss counters",
+            "/simulation_stats": "Simulation queue depth and wait times",
+            "/metrics": "Stage latencies and counters in Prometheus format",
+            "/waveform/<waveform_id>": "Decimated window of a stored waveform (start, end, width, format)"
         }
     })
 
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "success": True,
+        "caches": boolean_solver.cache_stats(),
+        "simplify_checks": boolean_solver.check_stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/simulation_stats', methods=['GET'])
+def simulation_stats():
+    return jsonify({
+        "success": True,
+        "executor": simulation_executor.stats(),
+        "cache": verilog_simulator.cache.stats(),
+        "native": native_simulator.stats(),
+        "jobs": job_manager.stats()
+    })
+
+TRUTH_TABLE_FORMATS = ('rows', 'minterms', 'hex')
+# Rows per page when the client gives no limit; a whole 16-input table
+# of row objects would be megabytes
+DEFAULT_ROWS_LIMIT = 256
+
+def serialize_truth_table(truth_table, data):
+    """Encode a truth table in the wire format requested by the client
+
+    - rows:     list of per-row objects, paged with offset/limit
+    - minterms: indices of the rows whose output is 1
+    - hex:      output column as hex, bit i of the number is row i
+    """
+    table_format = data.get('format', 'rows')
+    if table_format not in TRUTH_TABLE_FORMATS:
+        raise ValueError(f"Unknown format '{table_format}' (expected one of {', '.join(TRUTH_TABLE_FORMATS)})")
+    
+    payload = {"format": table_format, "num_rows": len(truth_table)}
+    
+    if table_format == 'minterms':
+        payload["minterms"] = truth_table.minterms()
+    elif table_format == 'hex':
+        payload["outputs"] = truth_table.to_hex()
+    else:
+        offset = int(data.get('offset', 0))
+        end = offset + int(data.get('limit', DEFAULT_ROWS_LIMIT))
+        if offset < 0 or end < offset:
+            raise ValueError("offset and limit must be non-negative")
+        
+        payload["truth_table"] = truth_table[offset:end]
+        payload["offset"] = offset
+        payload["has_more"] = end < len(truth_table)
+        if payload["has_more"]:
+            payload["next_offset"] = end
+    
+    return payload
+
 @app.route('/generate_truth_table', methods=['POST'])
 def generate_truth_table():
     try:
@@ -35,19 +274,22 @@ def generate_truth_table():
         if not expression:
             return jsonify({"success": False, "error": "No expression provided"})
         
-        # Process the expression
-        result = boolean_solver.solve_expression(expression)
+        # Only the table is returned, so nothing is minimized
+        pipeline = boolean_solver.pipeline(expression)
+        variables = pipeline.variables()
         
-        return jsonify({
+        response = {
             "success": True,
             "expression": expression,
-            "variables": result['variables'],
-            "truth_table": result['truth_table'],
-            "num_variables": len(result['variables'])
-        })
+            "variables": variables,
+            "num_variables": len(variables)
+        }
+        response.update(serialize_truth_table(pipeline.truth_table(), data))
+        
+        return jsonify(response)
         
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+        return error_response(e)
 
 @app.route('/generate_kmap', methods=['POST'])
 def generate_kmap():
@@ -58,22 +300,93 @@ def generate_kmap():
         if not expression:
             return jsonify({"success": False, "error": "No expression provided"})
         
-        # Process the expression
-        result = boolean_solver.solve_expression(expression)
-        
-        # Generate K-map
-        kmap_result = boolean_solver.generate_kmap(result['truth_table'], result['variables'])
+        pipeline = boolean_solver.pipeline(expression)
         
         return jsonify({
             "success": True,
             "expression": expression,
+            "variables": pipeline.variables(),
+            "kmap": pipeline.kmap(),
+            "simplified_expression": pipeline.simplified_expression(),
+            "minimal": pipeline.minimal()
+        })
+        
+    except Exception as e:
+        return error_response(e)
+
+# Minterms and cubes returned per /analyze_expression request
+MAX_ANALYSIS_ITEMS = 1024
+
+@app.route('/analyze_expression', methods=['POST'])
+def analyze_expression():
+    try:
+        data = request.get_json()
+        expression = data.get('expression', '').strip()
+        
+        if not expression:
+            return jsonify({"success": False, "error": "No expression provided"})
+        
+        offset = int(data.get('offset', 0))
+        limit = int(data.get('limit', 64))
+        max_cubes = int(data.get('max_cubes', 64))
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+        if not 0 <= limit <= MAX_ANALYSIS_ITEMS or not 0 <= max_cubes <= MAX_ANALYSIS_ITEMS:
+            raise ValueError(f"limit and max_cubes must be between 0 and {MAX_ANALYSIS_ITEMS}")
+        
+        result = boolean_solver.analyze_expression(expression, offset, limit, max_cubes)
+        
+        response = {
+            "success": True,
+            "expression": expression,
+            "variables": result['variables'],
+            "num_variables": len(result['variables']),
+            "variable_order": result['variable_order'],
+            "support": result['support'],
+            "bdd_nodes": result['bdd_nodes'],
+            "satisfying_count": result['satisfying_count'],
+            "cube_count": result['cube_count'],
+            "cubes": result['cubes'],
+            "minterms": result['minterms'],
+            "offset": offset,
+            "has_more": result['has_more']
+        }
+        if 'truth_table' in result:
+            response["outputs"] = result['truth_table'].to_hex()
+        if 'simplified_expression' in result:
+            response["simplified_expression"] = result['simplified_expression']
+            response["minimal"] = result['minimal']
+            response["kmap"] = result['kmap']
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/equivalent', methods=['POST'])
+def equivalent():
+    try:
+        data = request.get_json()
+        expressions = data.get('expressions')
+        
+        if not isinstance(expressions, list):
+            return jsonify({"success": False, "error": "expressions must be a list"})
+        
+        result = boolean_solver.check_equivalence([
+            expression.strip() if isinstance(expression, str) else expression
+            for expression in expressions
+        ])
+        
+        return jsonify({
+            "success": True,
             "variables": result['variables'],
-            "kmap": kmap_result,
-            "simplified_expression": result['simplified_expression']
+            "method": result['method'],
+            "equivalent": result['equivalent'],
+            "results": result['results']
         })
         
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+        return error_response(e)
 
 @app.route('/generate_verilog', methods=['POST'])
 def generate_verilog():
@@ -84,26 +397,296 @@ def generate_verilog():
         if not expression:
             return jsonify({"success": False, "error": "No expression provided"})
         
-        # Process the expression first
-        result = boolean_solver.solve_expression(expression)
+        return jsonify(verilog_result(expression, data))
+        
+    except SimulationBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return error_response(e)
+
+def verilog_result(expression, data, progress=None):
+    """Response body of /generate_verilog, shared with the job API"""
+    result, verilog_code = prepare_verilog(expression, progress, testbench_options(data))
+    
+    # The generated testbench is combinational, so "fast" mode derives the
+    # results from the truth table; "iverilog" runs the real toolchain
+    simulation_mode = data.get('simulation_mode', 'fast')
+    simulation_result = simulate_generated(expression, result, verilog_code, simulation_mode, progress)
+    
+    return verilog_response(expression, data, result, verilog_code, simulation_result)
+
+def prepare_verilog(expression, progress=None, testbench=None):
+    """Generate the Verilog module and testbench of an expression
+    
+    The truth table is built here only for the check testbench's vector
+    file; otherwise fast-mode simulation builds it later from
+    result['pipeline'], and an iverilog run never needs it.
+    """
+    pipeline = boolean_solver.pipeline(expression)
+    testbench = testbench or {'mode': 'display', 'dump_rows': None}
+    
+    verilog_code = pipeline.verilog(testbench)
+    result = {
+        'pipeline': pipeline,
+        'variables': pipeline.variables(),
+        'testbench': testbench,
+        'testbench_files': testbench_files(testbench, [pipeline])
+    }
+    if progress is not None:
+        progress('generated', verilog_code=verilog_code, variables=result['variables'])
+    
+    return result, verilog_code
+
+def verilog_response(expression, data, result, verilog_code, simulation_result):
+    response = {
+        "success": True,
+        "expression": expression,
+        "variables": result['variables'],
+        "verilog_code": verilog_code,
+        "simulation_output": simulation_result.get('simulation_output', ''),
+        "simulation_mode": data.get('simulation_mode', 'fast'),
+        "testbench": result['testbench']['mode']
+    }
+    response.update(simulation_status(simulation_result))
+    response.update(waveform_fields(data, simulation_result))
+    return response
+
+def simulation_status(simulation_result):
+    """'ok' for a real or native run, otherwise why the waveform is missing
+    or generated ('timeout', 'compile_failed', 'error', 'no_waveform')"""
+    status = {"simulation_status": simulation_result.get('status', 'ok')}
+    if 'error' in simulation_result:
+        status["simulation_error"] = simulation_result['error']
+    return status
+
+def waveform_fields(data, simulation_result):
+    """Waveform part of a simulation response, in the requested format"""
+    response = {}
+    
+    # "changes" returns only the samples where each signal changes; "lod"
+    # keeps the waveform on the server and returns a decimated overview,
+    # with further windows served by /waveform/<waveform_id>; "packed"
+    # returns the changes in the binary format of waveform_packing
+    waveform_data = simulation_result.get('waveform_data', {})
+    waveform_format = data.get('waveform_format')
+    if waveform_format in (None, 'grid'):
+        waveform_data = verilog_simulator.aligned_waveform(waveform_data)
+    elif waveform_format == 'changes':
+        waveform_data = verilog_simulator.waveform_changes(waveform_data)
+    elif waveform_format == 'lod':
+        waveform_id = waveform_store.put(verilog_simulator.waveform_changes(waveform_data))
+        view = waveform_store.window(waveform_store.get(waveform_id), width=int(data.get('waveform_pixels', 1000)))
+        waveform_data = view['signals']
+        response["waveform_id"] = waveform_id
+        response["waveform_end_time"] = view['end_time']
+    elif waveform_format == 'packed':
+        packed = pack_waveform(verilog_simulator.waveform_changes(waveform_data).values())
+        response["waveform_packed"] = base64.b64encode(packed).decode('ascii')
+        waveform_data = {}
+    
+    response["waveform_data"] = waveform_data
+    return response
+
+@app.route('/generate_module', methods=['POST'])
+def generate_module():
+    """One Verilog module with several outputs, simulated in a single run"""
+    try:
+        data = request.get_json()
+        expressions = data.get('outputs')
+        if not isinstance(expressions, dict) or not expressions:
+            return jsonify({"success": False, "error": "No outputs provided"})
+        if not all(isinstance(expr, str) for expr in expressions.values()):
+            return jsonify({"success": False, "error": "Each output must map to an expression string"})
+        
+        simulation_mode = data.get('simulation_mode', 'fast')
+        check_simulation_mode(simulation_mode)
+        testbench = testbench_options(data)
         
-        # Generate Verilog code
-        verilog_code = boolean_solver.generate_verilog(expression, result['variables'])
+        variables, pipelines = boolean_solver.output_pipelines(expressions)
+        verilog_code = boolean_solver.generate_multi_output_verilog(
+            expressions, variables, testbench, {name: pipeline.ast() for name, pipeline in pipelines.items()}
+        )
         
-        # Simulate the Verilog code
-        simulation_result = verilog_simulator.simulate_verilog(verilog_code)
+        # The response carries every simplified form, so every table is built
+        tables = {name: pipeline.truth_table() for name, pipeline in pipelines.items()}
+        title = '; '.join(f'{name} = {expr}' for name, expr in expressions.items())
+        simulation_result = simulate_generated(
+            title,
+            {
+                'testbench': testbench,
+                'testbench_files': testbench_files(testbench, pipelines.values())
+            },
+            verilog_code, simulation_mode, outputs=tables
+        )
         
-        return jsonify({
+        response = {
             "success": True,
-            "expression": expression,
-            "variables": result['variables'],
+            "variables": variables,
+            "output_names": list(pipelines),
+            "outputs": {
+                name: {
+                    "expression": pipeline.expression,
+                    "simplified_expression": pipeline.simplified_expression(),
+                    "minimal": pipeline.minimal()
+                }
+                for name, pipeline in pipelines.items()
+            },
             "verilog_code": verilog_code,
             "simulation_output": simulation_result.get('simulation_output', ''),
-            "waveform_data": simulation_result.get('waveform_data', {})
+            "simulation_mode": simulation_mode,
+            "testbench": testbench['mode']
+        }
+        response.update(simulation_status(simulation_result))
+        response.update(waveform_fields(data, simulation_result))
+        return jsonify(response)
+        
+    except SimulationBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/waveform/<waveform_id>', methods=['GET'])
+def waveform_window(waveform_id):
+    try:
+        waveform = waveform_store.get(waveform_id)
+        if waveform is None:
+            response = jsonify({"success": False, "error": f"Unknown or expired waveform '{waveform_id}'"})
+            response.status_code = 404
+            return response
+        
+        names = request.args.get('signals')
+        # Packed windows are small enough to default to full resolution
+        packed = request.args.get('format') == 'packed'
+        view = waveform_store.window(
+            waveform,
+            start=request.args.get('start', type=float),
+            end=request.args.get('end', type=float),
+            width=request.args.get('width', None if packed else 1000, type=int),
+            names=names.split(',') if names else None
+        )
+        if packed:
+            return Response(pack_waveform(view['signals'].values()), mimetype=PACKED_WAVEFORM_TYPE)
+        view["success"] = True
+        view["waveform_id"] = waveform_id
+        return jsonify(view)
+        
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/jobs/generate_verilog', methods=['POST'])
+def submit_verilog_job():
+    try:
+        data = request.get_json()
+        expression = data.get('expression', '').strip()
+        
+        if not expression:
+            return jsonify({"success": False, "error": "No expression provided"})
+        check_simulation_mode(data.get('simulation_mode', 'fast'))
+        testbench_options(data)
+        
+        job = job_manager.submit(lambda job: verilog_result(expression, data, job.report))
+        
+        response = jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events",
+            "result_url": f"/jobs/{job.id}/result"
         })
+        response.status_code = 202
+        return response
+        
+    except SimulationBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return error_response(e)
+
+def job_not_found(job_id):
+    response = jsonify({"success": False, "error": f"Unknown or expired job '{job_id}'"})
+    response.status_code = 404
+    return response
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    # Long-poll: with wait=<seconds>, hold the request until an event past
+    # `after` arrives or the job finishes
+    after = max(0, request.args.get('after', 0, type=int))
+    wait = min(max(0.0, request.args.get('wait', 0, type=float)), MAX_JOB_WAIT)
+    if wait:
+        job.wait(after, wait)
+    
+    snapshot = job.snapshot(after)
+    snapshot["success"] = True
+    return jsonify(snapshot)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    # Reconnecting EventSource clients resume after the last id they saw
+    after = request.headers.get('Last-Event-ID', type=int)
+    if after is None:
+        after = request.args.get('after', 0, type=int)
+    after = max(0, after)
+    
+    def stream():
+        position = after
+        while True:
+            events = job.wait(position, JOB_KEEPALIVE)
+            for event in events:
+                position += 1
+                yield f"id: {position}\nevent: stage\ndata: {json.dumps(event)}\n\n"
+            if job.finished and position >= len(job.events):
+                snapshot = job.snapshot(position)
+                yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot)}\n\n"
+                return
+            if not events:
+                yield ": keepalive\n\n"
+    
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    if job.status == 'done':
+        return jsonify(job.result)
+    if job.status == 'failed':
+        return jsonify({"success": False, "job_id": job.id, "error": job.error})
+    
+    # Not finished yet; poll again or follow the events
+    response = jsonify({"success": False, "job_id": job.id, "status": job.status})
+    response.status_code = 202
+    return response
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    try:
+        data = request.get_json()
+        items = batch_processor.parse_request(data)
+        
+        simulation_mode = data.get('simulation_mode', 'fast')
+        check_simulation_mode(simulation_mode)
         
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+        return error_response(e)
+    
+    # One JSON object per line, in completion order; each carries its
+    # 'index' into the request list and its own success/error
+    def stream():
+        for item in batch_processor.run(items, simulation_mode, simulation_executor):
+            yield json.dumps(item) + '\n'
+    
+    return Response(stream(), mimetype='application/x-ndjson')
 
 if __name__ == '__main__':
     print("Starting Boolean Expression Solver Server...")
@@ -111,5 +694,7 @@ if __name__ == '__main__':
     print("  POST /generate_truth_table")
     print("  POST /generate_kmap") 
     print("  POST /generate_verilog")
+    print("  POST /batch")
+    print("  POST /jobs/generate_verilog")
     print("\nServer running on http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
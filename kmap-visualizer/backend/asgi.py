@@ -0,0 +1,148 @@
+"""ASGI application for production serving (see serve.py)
+
+POST /generate_verilog is handled natively on the event loop: the solver
+runs on a thread, simulations run through AsyncSimulationRunner, and the
+work is cancelled (killing iverilog/vvp) if the client disconnects. Every
+other route is served by the Flask app through asgiref's WSGI adapter.
+"""
+import asyncio
+import json
+import time
+from asgiref.wsgi import WsgiToAsgi
+from app import (
+    app as flask_app, boolean_solver, verilog_simulator, check_simulation_mode, simulate_generated,
+    prepare_verilog, verilog_response, testbench_options, REQUEST_DURATION, REQUEST_ERRORS
+)
+from async_simulation import AsyncSimulationRunner
+from simulation_pool import SimulationBusy
+from metrics import REGISTRY, start_request_timing, server_timing_header
+
+wsgi_application = WsgiToAsgi(flask_app)
+simulation_runner = AsyncSimulationRunner(verilog_simulator)
+
+REGISTRY.callback('kmap_async_simulations', 'Simulations admitted to the event-loop runner', 'gauge', (),
+                  lambda: [((), simulation_runner.in_flight)])
+REGISTRY.callback('kmap_async_simulations_cancelled_total', 'Simulations cancelled by a client disconnect',
+                  'counter', (), lambda: [((), simulation_runner.cancelled)])
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/generate_verilog':
+        await generate_verilog(scope, receive, send)
+    else:
+        await wsgi_application(scope, receive, send)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await asyncio.to_thread(preload)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+def preload():
+    """Warm the solver and probe the toolchain before the first request"""
+    verilog_simulator.tool_version()
+    pipeline = boolean_solver.pipeline('A & B | ~C')
+    pipeline.kmap()
+    pipeline.simplified_expression()
+
+
+async def generate_verilog(scope, receive, send):
+    started = time.perf_counter()
+    timings = start_request_timing()
+    status, headers = 200, []
+
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+        # The work runs as its own task so a disconnect can cancel it
+        body = await until_disconnect(verilog_result_async(data), receive)
+    except ClientDisconnected:
+        REQUEST_ERRORS.inc('generate_verilog', 'ClientDisconnected')
+        return
+    except SimulationBusy as e:
+        status = 503
+        headers.append((b'retry-after', str(max(1, -(-e.retry_after_ms // 1000))).encode()))
+        body = {"success": False, "error": str(e), "retry_after_ms": e.retry_after_ms}
+    except Exception as e:
+        REQUEST_ERRORS.inc('generate_verilog', type(e).__name__)
+        body = {"success": False, "error": str(e)}
+
+    total = time.perf_counter() - started
+    REQUEST_DURATION.observe(total, 'generate_verilog')
+    timings = dict(timings)
+    timings['total'] = total
+
+    payload = json.dumps(body).encode('utf-8')
+    headers.extend([
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode()),
+        (b'access-control-allow-origin', b'*'),
+        (b'server-timing', server_timing_header(timings).encode()),
+        (b'timing-allow-origin', b'*')
+    ])
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def verilog_result_async(data):
+    expression = data.get('expression', '').strip()
+    if not expression:
+        return {"success": False, "error": "No expression provided"}
+
+    simulation_mode = data.get('simulation_mode', 'fast')
+    check_simulation_mode(simulation_mode)
+
+    result, verilog_code = await asyncio.to_thread(prepare_verilog, expression, None, testbench_options(data))
+    if simulation_mode == 'iverilog':
+        simulation_result = await simulation_runner.simulate(verilog_code, result['testbench_files'])
+    else:
+        simulation_result = await asyncio.to_thread(
+            simulate_generated, expression, result, verilog_code, simulation_mode
+        )
+
+    return await asyncio.to_thread(verilog_response, expression, data, result, verilog_code, simulation_result)
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def until_disconnect(coroutine, receive):
+    """Await coroutine, cancelling it if the client goes away first"""
+    work = asyncio.ensure_future(coroutine)
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if not work.done():
+        work.cancel()
+        try:
+            await work
+        except asyncio.CancelledError:
+            pass
+        raise ClientDisconnected()
+    return work.result()
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import signal
+import subprocess
+import time
+from simulation_pool import SimulationBusy
+from metrics import timed
+
+
+class AsyncSimulationRunner:
+    """Run simulations on an asyncio event loop instead of worker threads
+
+    iverilog and vvp are started with asyncio.create_subprocess_exec, so a
+    simulation waiting on them holds no thread, and cancelling the awaiting
+    task (the client disconnected) kills the running subprocess. At most
+    `concurrency` simulations run at once, each in a workspace borrowed from
+    a shared pool; up to `max_queue` more wait for one and the rest are
+    rejected with SimulationBusy. Caching and result handling are the
+    VerilogSimulator's own.
+    """
+
+    def __init__(self, simulator, concurrency=None, max_queue=None, timeout=30):
+        self.simulator = simulator
+        self.concurrency = concurrency or int(os.environ.get('KMAP_SIM_WORKERS', os.cpu_count() or 1))
+        self.max_queue = max_queue if max_queue is not None else int(
+            os.environ.get('KMAP_SIM_QUEUE', self.concurrency * 4)
+        )
+        self.timeout = timeout
+        self.workspaces = None
+        self.in_flight = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.total_run = 0.0
+
+    def _workspace_pool(self):
+        # Created lazily so the queue belongs to the running event loop
+        if self.workspaces is None:
+            self.workspaces = asyncio.Queue()
+            for _ in range(self.concurrency):
+                self.workspaces.put_nowait(self.simulator.workspaces.create())
+        return self.workspaces
+
+    async def simulate(self, verilog_code, files=None):
+        """Async counterpart of VerilogSimulator.simulate_verilog"""
+        cache_key, cached = await asyncio.to_thread(self.simulator.lookup_cached, verilog_code, files)
+        if cached is not None:
+            return cached
+
+        if self.in_flight >= self.concurrency + self.max_queue:
+            self.rejected += 1
+            raise SimulationBusy(self.retry_after_ms())
+
+        self.in_flight += 1
+        workspaces = self._workspace_pool()
+        try:
+            workspace = await workspaces.get()
+            started_at = time.monotonic()
+            try:
+                return await self._run(verilog_code, files, cache_key, workspace)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            finally:
+                self.completed += 1
+                self.total_run += time.monotonic() - started_at
+                workspaces.put_nowait(workspace)
+        finally:
+            self.in_flight -= 1
+
+    async def _run(self, verilog_code, files, cache_key, workspace):
+        simulator = self.simulator
+        try:
+            workspace.write_source(verilog_code, files)
+
+            image_file = simulator.cache.image_path(cache_key) if cache_key else None
+            if image_file is None:
+                with timed('iverilog'):
+                    returncode, output = await self._exec(
+                        [simulator.ivl_path, '-o', workspace.image_file, workspace.source_file]
+                    )
+                if returncode != 0:
+                    return simulator.compile_failed(verilog_code, output)
+                image_file = simulator._cache_image(cache_key, workspace.image_file)
+
+            with timed('vvp'):
+                reader = simulator.start_dump_reader(workspace)
+                try:
+                    returncode, output = await self._exec([simulator.vvp_path, image_file], cwd=workspace.directory)
+                finally:
+                    signals = await asyncio.to_thread(simulator.finish_dump_reader, workspace, reader)
+
+            return await asyncio.to_thread(
+                simulator.build_result, verilog_code, cache_key, output, returncode, signals
+            )
+
+        except subprocess.TimeoutExpired as e:
+            return simulator.timed_out(os.path.basename(e.cmd[0]))
+        except Exception as e:
+            return simulator.failed(verilog_code, e)
+
+    async def _exec(self, cmd, cwd=None):
+        """Run a command to completion, returning (returncode, stdout + stderr)
+
+        The process (with anything it spawned, where process groups exist)
+        is killed if it outlives the timeout or the awaiting task is
+        cancelled.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            start_new_session=hasattr(os, 'killpg')
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, self.timeout)
+        finally:
+            if process.returncode is None:
+                self._kill(process)
+                await process.wait()
+        return process.returncode, stdout.decode(errors='replace') + stderr.decode(errors='replace')
+
+    def _kill(self, process):
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+    def retry_after_ms(self):
+        """Estimated time until a queue slot frees up"""
+        average_run = self.total_run / self.completed if self.completed else 1.0
+        return max(100, int(1000 * average_run * self.in_flight / self.concurrency))
+
+    def stats(self):
+        return {
+            'concurrency': self.concurrency,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+            'average_run_ms': 1000 * self.total_run / self.completed if self.completed else 0.0
+        }
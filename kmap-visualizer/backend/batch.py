@@ -0,0 +1,229 @@
+import os
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from kmap_utils import BooleanExpressionSolver
+from native_simulator import NativeSimulator
+from simulation_pool import SimulationBusy
+
+BATCH_STAGES = ('truth_table', 'kmap', 'minimized', 'verilog', 'simulation')
+DEFAULT_BATCH_STAGES = ('truth_table', 'minimized')
+
+# Per-process solver instances, created once in each pool worker. Workers
+# never run iverilog, so they hold no VerilogSimulator or its workspaces
+_solver = None
+_native_simulator = None
+
+
+def _init_worker():
+    global _solver, _native_simulator
+    _solver = BooleanExpressionSolver()
+    _native_simulator = NativeSimulator()
+
+
+def process_batch_item(index, expression, stages, simulation_mode):
+    """Run the requested stages for one expression; returns (item, verilog_code)
+
+    Errors are reported in the item's own result instead of being raised,
+    so one bad expression never fails the rest of the batch. An iverilog
+    simulation is left to the server process, which runs it on its
+    SimulationExecutor: verilog_code is then the source to simulate, and
+    None otherwise.
+    """
+    if _solver is None:
+        _init_worker()
+
+    item = {'index': index, 'expression': expression}
+    pending = None
+    try:
+        # Only the requested stages are computed
+        pipeline = _solver.pipeline(expression)
+        variables = pipeline.variables()
+        # Expressions that don't parse fail before anything is reported
+        pipeline.ast()
+        item['variables'] = variables
+
+        if 'truth_table' in stages:
+            truth_table = pipeline.truth_table()
+            item['truth_table'] = {
+                'format': 'hex',
+                'num_rows': len(truth_table),
+                'outputs': truth_table.to_hex()
+            }
+        if 'minimized' in stages:
+            item['simplified_expression'] = pipeline.simplified_expression()
+            item['minimal'] = pipeline.minimal()
+        if 'kmap' in stages:
+            item['kmap'] = pipeline.kmap()
+
+        if 'verilog' in stages or 'simulation' in stages:
+            verilog_code = pipeline.verilog()
+            if 'verilog' in stages:
+                item['verilog_code'] = verilog_code
+            if 'simulation' in stages:
+                if simulation_mode == 'iverilog':
+                    pending = verilog_code
+                else:
+                    simulation_result = _native_simulator.simulate(expression, pipeline.truth_table())
+                    add_simulation(item, simulation_result)
+
+        item['success'] = True
+    except Exception as e:
+        item['success'] = False
+        item['error'] = str(e)
+        pending = None
+
+    return item, pending
+
+
+def add_simulation(item, simulation_result, simulator=None):
+    """Copy a simulation result into a batch item, waveform in grid format
+
+    Native waveforms already share one time grid; an iverilog result is
+    aligned by the server's `simulator`.
+    """
+    waveform_data = simulation_result.get('waveform_data', {})
+    item['simulation_output'] = simulation_result.get('simulation_output', '')
+    item['simulation_status'] = simulation_result.get('status', 'ok')
+    if 'error' in simulation_result:
+        item['simulation_error'] = simulation_result['error']
+    item['waveform_data'] = simulator.aligned_waveform(waveform_data) if simulator else waveform_data
+
+
+class BatchProcessor:
+    """Fan batch items out over a process pool and yield results as they finish"""
+
+    def __init__(self, workers=None, max_items=10000):
+        self.workers = workers or int(os.environ.get('KMAP_BATCH_WORKERS', os.cpu_count() or 1))
+        self.max_items = max_items
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                # The server is threaded, and forking a threaded process can copy
+                # locks held by other threads into the workers
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            return self.pool
+
+    def _discard_pool(self, pool):
+        """Drop a pool whose worker died; the next batch starts a new one"""
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def parse_request(self, data):
+        """Validate a batch request into a list of (expression, stages) pairs
+
+        Items are either expression strings or objects with an 'expression'
+        and optional per-item 'stages'; the top-level 'stages' is the default.
+        """
+        items = data.get('expressions')
+        if not isinstance(items, list) or not items:
+            raise ValueError("'expressions' must be a non-empty list")
+        if len(items) > self.max_items:
+            raise ValueError(f"Too many expressions (maximum {self.max_items} per batch)")
+
+        default_stages = self._validate_stages(data.get('stages', DEFAULT_BATCH_STAGES))
+        parsed = []
+        for item in items:
+            if isinstance(item, str):
+                parsed.append((item.strip(), default_stages))
+            elif isinstance(item, dict):
+                stages = item.get('stages')
+                parsed.append((
+                    str(item.get('expression', '')).strip(),
+                    self._validate_stages(stages) if stages is not None else default_stages
+                ))
+            else:
+                raise ValueError("Each batch item must be an expression string or an object")
+        return parsed
+
+    def _validate_stages(self, stages):
+        if not isinstance(stages, (list, tuple)):
+            raise ValueError("'stages' must be a list")
+        unknown = [stage for stage in stages if stage not in BATCH_STAGES]
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(map(str, unknown))} (expected {', '.join(BATCH_STAGES)})")
+        return tuple(stages)
+
+    def run(self, items, simulation_mode='fast', executor=None):
+        """Yield item results in completion order
+
+        iverilog simulations are submitted to `executor`, the server's
+        SimulationExecutor, so a batch is held to the same concurrency
+        limit as every other simulation. While the executor's queue is
+        full, the batch waits for its own oldest simulation before trying
+        again. An item fails with the executor's busy error only when none
+        of the batch's own simulations are in flight.
+
+        If a worker process dies, the pool is broken: every item still in
+        it fails with an error line and the pool is replaced.
+        """
+        pool, futures = self._submit(items, simulation_mode)
+        simulations = deque()
+        try:
+            for future in as_completed(futures):
+                try:
+                    item, verilog_code = future.result()
+                except BrokenProcessPool as e:
+                    self._discard_pool(pool)
+                    index, expression = futures[future]
+                    yield {'index': index, 'expression': expression, 'success': False, 'error': str(e)}
+                    continue
+                if verilog_code is None:
+                    yield item
+                else:
+                    while True:
+                        try:
+                            simulations.append((item, executor.submit(executor.simulator.simulate_verilog, verilog_code)))
+                            break
+                        except SimulationBusy as e:
+                            if not simulations:
+                                item['success'] = False
+                                item['error'] = str(e)
+                                item['retry_after_ms'] = e.retry_after_ms
+                                yield item
+                                break
+                            yield self._simulated(*simulations.popleft(), executor)
+                while simulations and simulations[0][1].done():
+                    yield self._simulated(*simulations.popleft(), executor)
+            while simulations:
+                yield self._simulated(*simulations.popleft(), executor)
+        finally:
+            # Stop pending work if the client went away mid-stream
+            for future in futures:
+                future.cancel()
+            for _, simulation in simulations:
+                simulation.cancel()
+
+    def _submit(self, items, simulation_mode):
+        """Queue every item on the pool, replacing a pool that broke since
+        the last batch; returns (pool, {future: (index, expression)})"""
+        pool = self._get_pool()
+        try:
+            return pool, self._submit_to(pool, items, simulation_mode)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            pool = self._get_pool()
+            return pool, self._submit_to(pool, items, simulation_mode)
+
+    def _submit_to(self, pool, items, simulation_mode):
+        return {
+            pool.submit(process_batch_item, index, expression, stages, simulation_mode): (index, expression)
+            for index, (expression, stages) in enumerate(items)
+        }
+
+    def _simulated(self, item, simulation, executor):
+        """A batch item once its iverilog simulation has finished"""
+        try:
+            add_simulation(item, simulation.result(), executor.simulator)
+        except Exception as e:
+            item['success'] = False
+            item['error'] = str(e)
+        return item
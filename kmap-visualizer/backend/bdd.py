@@ -0,0 +1,478 @@
+from expression_engine import BitParallelEvaluator
+from truth_table import TruthTable
+
+
+class BDD:
+    """Reduced ordered binary decision diagrams over a fixed set of variables
+
+    Nodes are integers indexing parallel lists: node 0 is the constant 0,
+    node 1 the constant 1, and any other node tests variable var[node],
+    going to low[node] when it is 0 and high[node] when it is 1. A unique
+    table per variable keeps (low, high) pairs distinct and no node has
+    low == high, so equal functions are the same node. Results of apply
+    and cofactor are memoized in the computed table.
+
+    The order is kept apart from the variable numbering: order[level] is
+    the variable tested at that level and level[var] its inverse. reorder()
+    sifts each variable through every level by swapping adjacent levels in
+    place, so a live node keeps its id and its function while the diagram
+    shrinks. Nodes held with ref() and everything below them are live;
+    collect() and reorder() free the rest and clear the computed table.
+    from_ast() starts from the order in which variables first appear and
+    reorders on its own whenever the live diagram outgrows
+    reorder_threshold, which then grows with the diagram.
+
+    Rows and minterm indices use the truth-table convention: the first
+    variable is the most significant bit. An instance is not thread-safe.
+    """
+
+    def __init__(self, variables, order=None, max_nodes=1 << 20, reorder_threshold=4096, max_growth=1.2,
+                 max_reorder_work=100000):
+        self.variables = list(variables)
+        self.index = {name: var for var, name in enumerate(self.variables)}
+        if len(self.index) != len(self.variables):
+            raise ValueError("Duplicate variable names")
+        num_vars = len(self.variables)
+
+        # Terminals test the pseudo-variable num_vars, which sits below every level
+        self.var = [num_vars, num_vars]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.free = []
+        self.unique = [{} for _ in range(num_vars)]
+        # Initial order, top first; defaults to the variable order
+        self.order = list(range(num_vars)) if order is None else [self.index[name] for name in order]
+        if sorted(self.order) != list(range(num_vars)):
+            raise ValueError("order must list every variable once")
+        self.level = [0] * (num_vars + 1)
+        for level, var in enumerate(self.order):
+            self.level[var] = level
+        self.level[num_vars] = num_vars
+        self.node_count = 0
+
+        self.roots = {}
+        self.computed = {}
+        self.max_computed = 1 << 18
+        self.max_nodes = max_nodes
+        self.auto_reorder = True
+        self.reorder_threshold = reorder_threshold
+        self.max_growth = max_growth
+        # Sifting budget per reorder, counted in nodes rewritten by swaps and
+        # scaled with the diagram; past it the variables not sifted yet keep
+        # their levels
+        self.max_reorder_work = max_reorder_work
+        self.reorder_work_per_node = 20
+        self.reorder_work = 0
+        self.reorders = 0
+        # Parent counts, only maintained while reordering
+        self.refcount = None
+
+    @property
+    def num_vars(self):
+        return len(self.variables)
+
+    def variable(self, name):
+        """Node of the function that is just the named variable"""
+        try:
+            return self._make(self.index[name], 0, 1)
+        except KeyError:
+            raise ValueError(f"Unknown variable '{name}'")
+
+    def ref(self, node):
+        """Keep a node (and everything below it) alive across collect() and reorder()"""
+        self.roots[node] = self.roots.get(node, 0) + 1
+        return node
+
+    def deref(self, node):
+        count = self.roots[node] - 1
+        if count:
+            self.roots[node] = count
+        else:
+            del self.roots[node]
+
+    def from_ast(self, node):
+        """Build an ExpressionParser AST; the result is returned referenced"""
+        results = []
+        stack = [(node, False)]
+        # Iterative, so long chains of terms don't hit the recursion limit
+        while stack:
+            current, expanded = stack.pop()
+            kind = current[0]
+            if kind == 'var':
+                results.append(self.ref(self.variable(current[1])))
+            elif kind == 'const':
+                results.append(self.ref(current[1]))
+            elif not expanded:
+                stack.append((current, True))
+                stack.extend((child, False) for child in reversed(current[1:]))
+            else:
+                if kind == 'not':
+                    operands = [results.pop()]
+                    result = self.negate(operands[0])
+                else:
+                    operands = [results.pop(), results.pop()]
+                    result = self.apply(kind, operands[1], operands[0])
+                results.append(self.ref(result))
+                for operand in operands:
+                    self.deref(operand)
+                self._maybe_reorder()
+        return results.pop()
+
+    def negate(self, f):
+        return self.apply('xor', f, 1)
+
+    def apply(self, op, f, g):
+        """Node of `f op g` for op in 'and', 'or', 'xor'"""
+        if op not in ('and', 'or', 'xor'):
+            raise ValueError(f"Unknown node type '{op}'")
+        return self._apply(op, f, g)
+
+    def _apply(self, op, f, g):
+        if op == 'and':
+            if f == 0 or g == 0:
+                return 0
+            if f == 1 or f == g:
+                return g
+            if g == 1:
+                return f
+        elif op == 'or':
+            if f == 1 or g == 1:
+                return 1
+            if f == 0 or f == g:
+                return g
+            if g == 0:
+                return f
+        else:
+            if f == g:
+                return 0
+            if f == 0:
+                return g
+            if g == 0:
+                return f
+
+        # Every operator is commutative
+        if f > g:
+            f, g = g, f
+        key = (op, f, g)
+        result = self.computed.get(key)
+        if result is not None:
+            return result
+
+        level = self.level
+        top = min(level[self.var[f]], level[self.var[g]])
+        f0, f1 = (self.low[f], self.high[f]) if level[self.var[f]] == top else (f, f)
+        g0, g1 = (self.low[g], self.high[g]) if level[self.var[g]] == top else (g, g)
+        result = self._make(self.order[top], self._apply(op, f0, g0), self._apply(op, f1, g1))
+        self._remember(key, result)
+        return result
+
+    def cofactor(self, f, name, value):
+        """f with the named variable fixed to value"""
+        try:
+            var = self.index[name]
+        except KeyError:
+            raise ValueError(f"Unknown variable '{name}'")
+        return self._restrict(f, var, 1 if value else 0)
+
+    def _restrict(self, f, var, value):
+        if self.level[self.var[f]] > self.level[var]:
+            return f
+        if self.var[f] == var:
+            return self.high[f] if value else self.low[f]
+
+        key = ('restrict', f, var, value)
+        result = self.computed.get(key)
+        if result is None:
+            result = self._make(self.var[f], self._restrict(self.low[f], var, value),
+                                self._restrict(self.high[f], var, value))
+            self._remember(key, result)
+        return result
+
+    def satcount(self, f):
+        """Number of assignments to all variables that make f true"""
+        level = self.level
+        counts = {0: 0, 1: 1}
+
+        # counts[node] covers the variables from the node's level down
+        def count(node):
+            result = counts.get(node)
+            if result is None:
+                here = level[self.var[node]]
+                low, high = self.low[node], self.high[node]
+                result = counts[node] = (
+                    (count(low) << (level[self.var[low]] - here - 1))
+                    + (count(high) << (level[self.var[high]] - here - 1))
+                )
+            return result
+
+        return count(f) << level[self.var[f]]
+
+    def path_count(self, f):
+        """Number of cubes cubes(f) yields, without enumerating them"""
+        counts = {0: 0, 1: 1}
+
+        def count(node):
+            result = counts.get(node)
+            if result is None:
+                result = counts[node] = count(self.low[node]) + count(self.high[node])
+            return result
+
+        return count(f)
+
+    def size(self, f):
+        """Internal nodes reachable from f"""
+        return len(self._reachable([f]))
+
+    def support(self, f):
+        """Names of the variables f depends on, in variable order"""
+        used = {self.var[node] for node in self._reachable([f])}
+        return [name for var, name in enumerate(self.variables) if var in used]
+
+    def cubes(self, f):
+        """Lazily yield the paths to 1 as {name: 0|1} dicts
+
+        The cubes are disjoint and together cover f exactly; a variable
+        missing from a cube is free.
+        """
+        stack = [(f, ())]
+        while stack:
+            node, literals = stack.pop()
+            if node == 0:
+                continue
+            if node == 1:
+                yield dict(literals)
+                continue
+            name = self.variables[self.var[node]]
+            stack.append((self.high[node], literals + ((name, 1),)))
+            stack.append((self.low[node], literals + ((name, 0),)))
+
+    def cube_to_term(self, cube):
+        """Render a cube as an AND term, e.g. '~A & C', literals in variable order"""
+        parts = [
+            name if cube[name] else f"~{name}"
+            for name in self.variables if name in cube
+        ]
+        return " & ".join(parts) if parts else "1"
+
+    def to_expression(self, f, max_cubes=None):
+        """f as an SOP of its disjoint cubes"""
+        if max_cubes is not None and self.path_count(f) > max_cubes:
+            raise ValueError(f"Expression has more than {max_cubes} cubes")
+        terms = [self.cube_to_term(cube) for cube in self.cubes(f)]
+        return " | ".join(terms) if terms else "0"
+
+    def minterms(self, f, start=0):
+        """Lazily yield the row indices >= start where f is 1, in ascending order
+
+        Inputs are fixed in variable order by cofactoring, and a constant-1
+        cofactor yields its whole range, so each minterm costs at most
+        num_vars cofactors whatever the table size.
+        """
+        num_vars = self.num_vars
+        stack = [(f, 0, 0)]
+        while stack:
+            node, depth, prefix = stack.pop()
+            free = num_vars - depth
+            if node == 0 or (prefix + 1) << free <= start:
+                continue
+            if node == 1:
+                yield from range(max(prefix << free, start), (prefix + 1) << free)
+                continue
+            stack.append((self._restrict(node, depth, 1), depth + 1, (prefix << 1) | 1))
+            stack.append((self._restrict(node, depth, 0), depth + 1, prefix << 1))
+
+    def to_bits(self, f):
+        """Packed output column of the truth table (bit r is row r)"""
+        evaluator = BitParallelEvaluator()
+        num_vars = self.num_vars
+        full = evaluator.full_mask(num_vars)
+        vectors = [evaluator.variable_vector(var, num_vars) for var in range(num_vars)]
+        columns = {0: 0, 1: full}
+
+        def column(node):
+            result = columns.get(node)
+            if result is None:
+                vector = vectors[self.var[node]]
+                result = columns[node] = (
+                    (column(self.high[node]) & vector) | (column(self.low[node]) & (vector ^ full))
+                )
+            return result
+
+        return column(f)
+
+    def to_truth_table(self, f):
+        return TruthTable(self.variables, self.to_bits(f))
+
+    def variable_order(self):
+        """Variable names from the top level down"""
+        return [self.variables[var] for var in self.order]
+
+    def collect(self):
+        """Free every node not reachable from a referenced one"""
+        live = self._reachable(self.roots)
+        for var, table in enumerate(self.unique):
+            dead = [key for key, node in table.items() if node not in live]
+            for key in dead:
+                self._free(table.pop(key))
+        self.computed.clear()
+
+    def reorder(self):
+        """Sift every variable to the level where the live diagram is smallest"""
+        self.collect()
+        refcount = [0] * len(self.var)
+        for table in self.unique:
+            for low, high in table:
+                refcount[low] += 1
+                refcount[high] += 1
+        for node, count in self.roots.items():
+            refcount[node] += count
+        self.refcount = refcount
+        self.reorder_work = 0
+        budget = max(self.max_reorder_work, self.reorder_work_per_node * self.node_count)
+
+        # Biggest levels first: they have the most to gain. Variables
+        # without nodes would only be moved through the others for nothing
+        for var in sorted(range(self.num_vars), key=lambda var: -len(self.unique[var])):
+            if self.reorder_work >= budget:
+                break
+            if self.unique[var]:
+                self._sift(var, budget)
+
+        self.refcount = None
+        self.reorders += 1
+
+    def _maybe_reorder(self):
+        if self.node_count < self.reorder_threshold:
+            return
+        # Most of what accumulates between reorders is garbage; only a
+        # diagram that is still big after collecting is worth reordering
+        self.collect()
+        growth = 2
+        if self.auto_reorder and 2 * self.node_count >= self.reorder_threshold:
+            before = self.node_count
+            self.reorder()
+            # When sifting hardly helps, the order is not the problem: wait longer
+            if self.node_count > 0.9 * before:
+                growth = 4
+        self.reorder_threshold = max(self.reorder_threshold, growth * self.node_count)
+
+    def _sift(self, var, budget):
+        bottom = self.num_vars - 1
+        best_size = self.node_count
+        best_level = self.level[var]
+        # Walk to the nearer end first, then all the way to the other
+        steps = (1, -1) if bottom - best_level < best_level else (-1, 1)
+        for step in steps:
+            while 0 <= self.level[var] + step <= bottom and self.reorder_work < budget:
+                self._swap(min(self.level[var], self.level[var] + step))
+                if self.node_count < best_size:
+                    best_size = self.node_count
+                    best_level = self.level[var]
+                elif self.node_count > self.max_growth * best_size:
+                    break
+        while self.level[var] != best_level:
+            step = 1 if best_level > self.level[var] else -1
+            self._swap(min(self.level[var], self.level[var] + step))
+
+    def _swap(self, level):
+        """Exchange the variables at level and level + 1 in place"""
+        x, y = self.order[level], self.order[level + 1]
+        var, low, high = self.var, self.low, self.high
+
+        # Nodes that skip y stay as they are; the others are rewritten
+        # below, and new x nodes must find the kept ones first
+        table = self.unique[x]
+        moved = [node for node in table.values() if var[low[node]] == y or var[high[node]] == y]
+        for node in moved:
+            del table[(low[node], high[node])]
+        self.reorder_work += 1 + len(moved)
+
+        for node in moved:
+            f0, f1 = low[node], high[node]
+            f00, f01 = (low[f0], high[f0]) if var[f0] == y else (f0, f0)
+            f10, f11 = (low[f1], high[f1]) if var[f1] == y else (f1, f1)
+            new_low = self._make_counted(x, f00, f10)
+            new_high = self._make_counted(x, f01, f11)
+            self._release(f0)
+            self._release(f1)
+            var[node], low[node], high[node] = y, new_low, new_high
+            self.unique[y][(new_low, new_high)] = node
+
+        self.order[level], self.order[level + 1] = y, x
+        self.level[x], self.level[y] = level + 1, level
+
+    def _make(self, var, low, high):
+        if low == high:
+            return low
+        table = self.unique[var]
+        node = table.get((low, high))
+        if node is None:
+            if self.node_count >= self.max_nodes:
+                raise ValueError(f"Expression needs more than {self.max_nodes} BDD nodes")
+            node = table[(low, high)] = self._allocate(var, low, high)
+        return node
+
+    def _make_counted(self, var, low, high):
+        """_make that also counts the new parent reference, for _swap"""
+        node = self._make(var, low, high)
+        refcount = self.refcount
+        if node >= len(refcount):
+            refcount.append(0)
+        if refcount[node] == 0 and node > 1:
+            # Just created: it now references its children
+            refcount[low] += 1
+            refcount[high] += 1
+        refcount[node] += 1
+        return node
+
+    def _release(self, node):
+        """Drop one parent reference, freeing nodes that lose their last one"""
+        refcount = self.refcount
+        refcount[node] -= 1
+        if refcount[node] or node < 2:
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            low, high = self.low[node], self.high[node]
+            del self.unique[self.var[node]][(low, high)]
+            self._free(node)
+            for child in (low, high):
+                refcount[child] -= 1
+                if not refcount[child] and child > 1:
+                    stack.append(child)
+
+    def _allocate(self, var, low, high):
+        self.node_count += 1
+        if self.free:
+            node = self.free.pop()
+            self.var[node], self.low[node], self.high[node] = var, low, high
+            return node
+        self.var.append(var)
+        self.low.append(low)
+        self.high.append(high)
+        return len(self.var) - 1
+
+    def _free(self, node):
+        self.var[node] = -1
+        self.node_count -= 1
+        self.free.append(node)
+
+    def _remember(self, key, result):
+        # A full computed table starts over rather than grow without bound
+        if len(self.computed) >= self.max_computed:
+            self.computed.clear()
+        self.computed[key] = result
+
+    def _reachable(self, roots):
+        seen = set()
+        stack = [node for node in roots if node > 1]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            for child in (self.low[node], self.high[node]):
+                if child > 1:
+                    stack.append(child)
+        return seen
@@ -0,0 +1,357 @@
+"""Microbenchmarks for the solver, K-map, Verilog and waveform code paths
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --threshold 0.25
+
+Every benchmark runs a fixed, seeded workload several times and reports
+the median and fastest time per workload in milliseconds. Short workloads
+are looped until one run takes at least --min-run-ms so timer resolution
+doesn't dominate. With --baseline, the fastest times are compared against
+a saved report and the script exits with status 1 when any benchmark got
+slower by more than the threshold.
+
+The packed waveform format is checked to round-trip through
+unpack_waveform before anything is timed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from kmap_utils import BooleanExpressionSolver
+from verilog_runner import VerilogSimulator
+from waveform_packing import pack_waveform, unpack_waveform
+
+
+class ExpressionGenerator:
+    """Seeded random Boolean expressions over the first N variables"""
+
+    BINARY_OPERATORS = ('&', '|', '^', ' AND ', ' OR ')
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+
+    def expression(self, num_vars, depth, names=string.ascii_uppercase):
+        """Random expression of the given nesting depth using all num_vars variables"""
+        variables = list(names[:num_vars])
+        self.random.shuffle(variables)
+        # Every variable appears at least once, so the truth table has num_vars inputs
+        leaves = variables + [self.random.choice(variables) for _ in range(2 ** depth)]
+        return self._build(leaves, depth)
+
+    def _build(self, leaves, depth):
+        if depth == 0 or len(leaves) == 1:
+            leaf = leaves[0]
+            for extra in leaves[1:]:
+                leaf = f"{leaf} {self.random.choice(('&', '|', '^'))} {extra}"
+            return f"({leaf})" if len(leaves) > 1 else leaf
+
+        split = self.random.randint(1, len(leaves) - 1)
+        left = self._build(leaves[:split], depth - 1)
+        right = self._build(leaves[split:], depth - 1)
+        expr = f"({left}{self.random.choice(self.BINARY_OPERATORS)}{right})"
+        if self.random.random() < 0.25:
+            expr = f"~{expr}"
+        return expr
+
+
+def synthetic_vcd(num_signals, num_changes, seed=0):
+    """VCD text with num_signals 1-bit signals and about num_changes value changes"""
+    rng = random.Random(seed)
+    codes = [chr(33 + i) for i in range(num_signals)]
+    lines = [
+        '$timescale 1ns $end',
+        '$scope module testbench $end'
+    ]
+    lines.extend(f'$var reg 1 {code} S{i} $end' for i, code in enumerate(codes))
+    lines.extend(['$upscope $end', '$enddefinitions $end', '#0', '$dumpvars'])
+    lines.extend(f'0{code}' for code in codes)
+    lines.append('$end')
+
+    time_stamp = 0
+    written = 0
+    while written < num_changes:
+        time_stamp += rng.randint(1, 10)
+        lines.append(f'#{time_stamp}')
+        for code in rng.sample(codes, rng.randint(1, num_signals)):
+            lines.append(f'{rng.randint(0, 1)}{code}')
+            written += 1
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_waveform(num_signals, num_changes, seed=0):
+    """Unaligned waveform dict with independent random change times per signal"""
+    rng = random.Random(seed)
+    waveform = {}
+    per_signal = max(1, num_changes // num_signals)
+    for i in range(num_signals):
+        times = sorted(rng.sample(range(per_signal * 10), per_signal))
+        waveform[f'S{i}'] = {
+            'times': times,
+            'values': [rng.randint(0, 1) for _ in times],
+            'name': f'S{i}'
+        }
+    return waveform
+
+
+# Signals the synthetic waveforms don't cover: x values, wider and
+# varint-coded vectors, large time steps and decimated min/max planes
+PACKING_SAMPLES = {
+    'x': {'name': 'x', 'width': 1, 'times': [0, 5, 1000000], 'values': [None, 1, 0]},
+    'nibble': {'name': 'nibble', 'width': 4, 'times': [0, 10, 20], 'values': [15, None, 3]},
+    'word': {'name': 'word', 'width': 32, 'times': [0, 300], 'values': [0, 2 ** 32 - 1]},
+    'wide': {'name': 'wide', 'width': 70, 'times': [7], 'values': [2 ** 69 + 1]},
+    'window': {'name': 'window', 'width': 8, 'times': [0, 100], 'values': [3, 200],
+               'min': [0, 100], 'max': [255, None]}
+}
+
+
+def check_packing(signals):
+    """Raise unless unpack_waveform(pack_waveform(signals)) gives back the
+    same signals, compressed or not"""
+    expected = {name: dict(signal, width=signal.get('width', 1)) for name, signal in signals.items()}
+    for compress in (True, False):
+        unpacked = unpack_waveform(pack_waveform(signals.values(), compress))
+        if unpacked != expected:
+            mismatched = sorted(name for name in expected if unpacked.get(name) != expected[name])
+            raise AssertionError(f"Packed waveform does not round-trip: {', '.join(mismatched) or 'signal set'}")
+
+
+def calibrate(workload, min_run_ms):
+    """Number of back-to-back calls needed for one run to last min_run_ms"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            workload()
+        elapsed = 1000 * (time.perf_counter() - start)
+        if elapsed >= min_run_ms or loops >= 1 << 20:
+            return loops
+        loops *= 2 if elapsed * 4 >= min_run_ms else 8
+
+
+def time_workload(workload, loops):
+    """Per-call duration in milliseconds over one run of `loops` calls"""
+    start = time.perf_counter()
+    for _ in range(loops):
+        workload()
+    return 1000 * (time.perf_counter() - start) / loops
+
+
+def build_benchmarks(seed, max_vars, depths, per_size, vcd_sizes, work_dir, bdd_sizes=()):
+    """List of (name, workload) pairs, all derived from the seed
+
+    Synthetic VCD files are written to work_dir.
+    """
+    solver = BooleanExpressionSolver()
+    simulator = VerilogSimulator()
+    generator = ExpressionGenerator(seed)
+    benchmarks = []
+
+    for num_vars in range(1, max_vars + 1):
+        expressions = [
+            generator.expression(num_vars, depth)
+            for depth in depths
+            for _ in range(per_size)
+        ]
+        variables = [solver.extract_variables(expr) for expr in expressions]
+        normalized = [solver.normalize_expression(expr) for expr in expressions]
+        tables = [solver.generate_truth_table(expr, names) for expr, names in zip(normalized, variables)]
+
+        def normalize(expressions=expressions):
+            for expr in expressions:
+                solver.normalize_expression(expr)
+
+        def truth_tables(normalized=normalized, variables=variables):
+            for expr, names in zip(normalized, variables):
+                solver.generate_truth_table(expr, names)
+
+        def simplify(tables=tables, variables=variables):
+            for table, names in zip(tables, variables):
+                # Time the minimization itself, not a cache lookup
+                solver.function_cache.clear()
+                solver.simplify_expression(table, names)
+
+        def kmaps(tables=tables, variables=variables):
+            for table, names in zip(tables, variables):
+                solver.function_cache.clear()
+                solver.generate_kmap(table, names)
+
+        def canonicalize(tables=tables):
+            for table in tables:
+                solver.npn.canonical(table.bits, table.num_vars)
+
+        def verilog(expressions=expressions, variables=variables):
+            for expr, names in zip(expressions, variables):
+                solver.generate_verilog(expr, names)
+
+        benchmarks.append((f'normalize_expression[vars={num_vars}]', normalize))
+        benchmarks.append((f'generate_truth_table[vars={num_vars}]', truth_tables))
+        benchmarks.append((f'simplify_expression[vars={num_vars}]', simplify))
+        benchmarks.append((f'npn_canonical[vars={num_vars}]', canonicalize))
+        if num_vars in solver.kmap_layouts:
+            benchmarks.append((f'generate_kmap[vars={num_vars}]', kmaps))
+        benchmarks.append((f'generate_verilog[vars={num_vars}]', verilog))
+
+    # Wider than any truth table: built as BDDs, shallow enough to stay small
+    for num_vars in bdd_sizes:
+        names = [f'x{i}' for i in range(num_vars)]
+        expressions = [
+            generator.expression(num_vars, depth, names)
+            for depth in depths[:2]
+            for _ in range(per_size)
+        ]
+
+        def bdds(expressions=expressions):
+            for expr in expressions:
+                bdd, node = solver.build_bdd(expr)
+                bdd.satcount(node)
+
+        benchmarks.append((f'build_bdd[vars={num_vars}]', bdds))
+
+    check_packing(PACKING_SAMPLES)
+    for num_changes in vcd_sizes:
+        path = os.path.join(work_dir, f'synthetic-{num_changes}.vcd')
+        with open(path, 'w') as f:
+            f.write(synthetic_vcd(16, num_changes, seed))
+        waveform = synthetic_waveform(16, num_changes, seed)
+
+        benchmarks.append((
+            f'parse_vcd_file[changes={num_changes}]',
+            lambda path=path: simulator.parse_vcd_file(path)
+        ))
+        benchmarks.append((
+            f'_normalize_waveform_data[changes={num_changes}]',
+            lambda waveform=waveform: simulator._normalize_waveform_data(waveform)
+        ))
+        benchmarks.append((
+            f'waveform_changes[changes={num_changes}]',
+            lambda waveform=waveform: simulator.waveform_changes(waveform)
+        ))
+        changes = simulator.waveform_changes(waveform)
+        check_packing(changes)
+        benchmarks.append((
+            f'pack_waveform[changes={num_changes}]',
+            lambda changes=changes: pack_waveform(changes.values())
+        ))
+        benchmarks.append((
+            f'unpack_waveform[changes={num_changes}]',
+            lambda packed=pack_waveform(changes.values()): unpack_waveform(packed)
+        ))
+
+    return benchmarks
+
+
+def run_benchmarks(args):
+    depths = (1, 3, 5)
+    vcd_sizes = (1000, 10000, 100000) if not args.quick else (1000, 10000)
+    bdd_sizes = (16, 32, 64) if not args.quick else (16, 32)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='kmap-bench-') as work_dir:
+        benchmarks = build_benchmarks(args.seed, args.max_vars, depths, args.per_size, vcd_sizes, work_dir, bdd_sizes)
+
+        benchmarks = [(name, workload) for name, workload in benchmarks
+                      if not args.filter or args.filter in name]
+        # Calibrating also warms up imports, compiled regexes, etc.
+        loops = {name: calibrate(workload, args.min_run_ms) for name, workload in benchmarks}
+
+        # Runs are interleaved across benchmarks, so a burst of load on the
+        # machine slows one run of many benchmarks rather than every run of one
+        durations = {name: [] for name, _ in benchmarks}
+        for _ in range(args.repeat):
+            for name, workload in benchmarks:
+                durations[name].append(time_workload(workload, loops[name]))
+
+        for name, _ in benchmarks:
+            results[name] = {
+                'median_ms': statistics.median(durations[name]),
+                'min_ms': min(durations[name]),
+                'runs': len(durations[name]),
+                'loops': loops[name]
+            }
+            print(f"{name:45s} {results[name]['min_ms']:10.3f} ms", file=sys.stderr)
+
+    return {
+        'meta': {
+            'seed': args.seed,
+            'max_vars': args.max_vars,
+            'per_size': args.per_size,
+            'repeat': args.repeat,
+            'min_run_ms': args.min_run_ms,
+            'python': platform.python_version(),
+            'machine': platform.machine()
+        },
+        'results': results
+    }
+
+
+def compare(report, baseline, threshold, min_delta_ms):
+    """Names of benchmarks whose fastest time regressed past the threshold
+
+    The fastest of several runs is the least disturbed by other load on
+    the machine, so it is what gets compared.
+    """
+    regressions = []
+    for name, result in sorted(report['results'].items()):
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        current, previous = result['min_ms'], base['min_ms']
+        ratio = current / previous if previous else float('inf')
+        # Tiny absolute differences are timer noise, whatever the ratio
+        regressed = ratio > 1 + threshold and current - previous > min_delta_ms
+        if regressed:
+            regressions.append(name)
+        print(f"{name:45s} {previous:10.3f} -> {current:10.3f} ms  x{ratio:5.2f}{'  REGRESSION' if regressed else ''}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-vars', type=int, default=10, help='largest expression size (1-16)')
+    parser.add_argument('--per-size', type=int, default=3, help='expressions per size and depth')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--min-run-ms', type=float, default=20.0,
+                        help='loop short workloads until one run takes this long')
+    parser.add_argument('--quick', action='store_true', help='skip the largest VCD')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown, as a fraction (default 0.25)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help='ignore regressions smaller than this many milliseconds')
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.max_vars <= 16:
+        parser.error('--max-vars must be between 1 and 16')
+
+    report = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
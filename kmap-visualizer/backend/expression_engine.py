@@ -0,0 +1,213 @@
+import re
+
+
+class ExpressionParser:
+    """Parse Boolean expressions into a small tuple-based AST
+
+    Nodes are plain tuples so they can be hashed and reused:
+    ('var', name), ('const', 0|1), ('not', x), ('and', a, b),
+    ('or', a, b), ('xor', a, b).
+
+    Precedence (tightest first) is the legacy one: NOT, XOR, AND, OR.
+    Verilog binds AND tighter than XOR, so to_verilog() adds the
+    parentheses that keep this grouping.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\s*(?:([A-Za-z_][A-Za-z0-9_]*)|([01])|([&|^~!()+*]))")
+
+    def __init__(self):
+        self.word_operators = {
+            'AND': '&', 'OR': '|', 'NOT': '~', 'XOR': '^'
+        }
+        self.constant_words = {'TRUE': 1, 'FALSE': 0}
+
+    def tokenize(self, expression):
+        """Split an expression into (kind, value) tokens"""
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+
+        while position < len(expression):
+            match = self.TOKEN_PATTERN.match(expression, position)
+            if not match:
+                offset = len(expression) - len(expression[position:].lstrip())
+                raise ValueError(f"Unexpected character '{expression[offset]}' at position {offset}")
+
+            identifier, constant, operator = match.groups()
+            if identifier is not None:
+                word = identifier.upper()
+                if word in self.word_operators:
+                    tokens.append(('op', self.word_operators[word]))
+                elif word in self.constant_words:
+                    tokens.append(('const', self.constant_words[word]))
+                else:
+                    tokens.append(('ident', identifier))
+            elif constant is not None:
+                tokens.append(('const', int(constant)))
+            else:
+                tokens.append(('op', operator))
+            position = match.end()
+
+        return tokens
+
+    def parse(self, expression):
+        """Parse an expression string into an AST"""
+        return self.parse_tokens(self.tokenize(expression))
+
+    def parse_tokens(self, tokens):
+        """Parse the output of tokenize() into an AST"""
+        if not tokens:
+            raise ValueError("Empty expression provided")
+
+        node, position = self._parse_or(tokens, 0)
+        if position != len(tokens):
+            raise ValueError(f"Unexpected token '{tokens[position][1]}'")
+        return node
+
+    def variables(self, node):
+        """Return the sorted variable names referenced by an AST"""
+        found = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current[0] == 'var':
+                found.add(current[1])
+            elif current[0] != 'const':
+                stack.extend(current[1:])
+        return sorted(found)
+
+    def variables_in_order(self, node):
+        """Variable names of an AST in order of first appearance, left to right"""
+        found = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current[0] == 'var':
+                found.setdefault(current[1], None)
+            elif current[0] != 'const':
+                stack.extend(reversed(current[1:]))
+        return list(found)
+
+    # Verilog binds bitwise AND tighter than XOR, and XOR tighter than OR
+    VERILOG_OPERATORS = {'or': ('|', 1), 'xor': ('^', 2), 'and': ('&', 3)}
+
+    def to_verilog(self, node):
+        """Verilog expression for an AST, parenthesized where precedence needs it"""
+        kind = node[0]
+        if kind == 'var':
+            return node[1]
+        if kind == 'const':
+            return f"1'b{node[1]}"
+        if kind == 'not':
+            operand = self.to_verilog(node[1])
+            return f'~{operand}' if node[1][0] in ('var', 'const', 'not') else f'~({operand})'
+
+        operator, level = self.VERILOG_OPERATORS[kind]
+        operands = []
+        for child in node[1:]:
+            text = self.to_verilog(child)
+            if child[0] in self.VERILOG_OPERATORS and self.VERILOG_OPERATORS[child[0]][1] < level:
+                text = f'({text})'
+            operands.append(text)
+        return f' {operator} '.join(operands)
+
+    def _peek(self, tokens, position):
+        return tokens[position] if position < len(tokens) else (None, None)
+
+    def _parse_or(self, tokens, position):
+        left, position = self._parse_and(tokens, position)
+        while self._peek(tokens, position) in (('op', '|'), ('op', '+')):
+            right, position = self._parse_and(tokens, position + 1)
+            left = ('or', left, right)
+        return left, position
+
+    def _parse_and(self, tokens, position):
+        left, position = self._parse_xor(tokens, position)
+        while self._peek(tokens, position) in (('op', '&'), ('op', '*')):
+            right, position = self._parse_xor(tokens, position + 1)
+            left = ('and', left, right)
+        return left, position
+
+    def _parse_xor(self, tokens, position):
+        left, position = self._parse_unary(tokens, position)
+        while self._peek(tokens, position) == ('op', '^'):
+            right, position = self._parse_unary(tokens, position + 1)
+            left = ('xor', left, right)
+        return left, position
+
+    def _parse_unary(self, tokens, position):
+        if self._peek(tokens, position) in (('op', '~'), ('op', '!')):
+            operand, position = self._parse_unary(tokens, position + 1)
+            return ('not', operand), position
+        return self._parse_primary(tokens, position)
+
+    def _parse_primary(self, tokens, position):
+        kind, value = self._peek(tokens, position)
+
+        if kind == 'ident':
+            return ('var', value), position + 1
+        if kind == 'const':
+            return ('const', value), position + 1
+        if (kind, value) == ('op', '('):
+            node, position = self._parse_or(tokens, position + 1)
+            if self._peek(tokens, position) != ('op', ')'):
+                raise ValueError("Missing closing parenthesis")
+            return node, position + 1
+        if kind is None:
+            raise ValueError("Unexpected end of expression")
+        raise ValueError(f"Unexpected token '{value}'")
+
+
+class BitParallelEvaluator:
+    """Evaluate an AST over every input combination at once
+
+    Each variable is a 2^n-bit Python integer whose bit r holds the value of
+    that variable in truth-table row r (rows in itertools.product order, so
+    the first variable is the most significant bit of the row index).
+    Operators become single bitwise operations on those integers.
+    """
+
+    def full_mask(self, num_vars):
+        """All-ones vector covering every row of an n-variable table"""
+        return (1 << (1 << num_vars)) - 1
+
+    def variable_vector(self, index, num_vars):
+        """Bit vector of the variable at position index among num_vars"""
+        half = 1 << (num_vars - 1 - index)
+        period = half << 1
+        size = 1 << num_vars
+
+        # Ones in the upper half of each period, then doubled to fill the table
+        pattern = ((1 << half) - 1) << half
+        width = period
+        while width < size:
+            pattern |= pattern << width
+            width <<= 1
+        return pattern
+
+    def evaluate(self, node, env, mask):
+        """Evaluate an AST with env mapping variable name -> bit vector"""
+        kind = node[0]
+
+        if kind == 'var':
+            try:
+                return env[node[1]]
+            except KeyError:
+                raise ValueError(f"Unknown variable '{node[1]}'")
+        if kind == 'const':
+            return mask if node[1] else 0
+        if kind == 'not':
+            return self.evaluate(node[1], env, mask) ^ mask
+        if kind == 'and':
+            return self.evaluate(node[1], env, mask) & self.evaluate(node[2], env, mask)
+        if kind == 'or':
+            return self.evaluate(node[1], env, mask) | self.evaluate(node[2], env, mask)
+        if kind == 'xor':
+            return self.evaluate(node[1], env, mask) ^ self.evaluate(node[2], env, mask)
+        raise ValueError(f"Unknown node type '{kind}'")
+
+    def evaluate_table(self, node, variables):
+        """Return the output column of the full truth table as one integer"""
+        num_vars = len(variables)
+        env = {var: self.variable_vector(i, num_vars) for i, var in enumerate(variables)}
+        return self.evaluate(node, env, self.full_mask(num_vars))
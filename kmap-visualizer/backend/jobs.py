@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+import uuid
+
+
+class Job:
+    """One background request with its progress events and final result"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'pending'
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created_at = time.monotonic()
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    def report(self, stage, **data):
+        """Record that a stage finished; data is passed on to listeners"""
+        with self.condition:
+            self.status = 'running'
+            event = {'stage': stage, 'elapsed_ms': 1000 * (time.monotonic() - self.created_at)}
+            event.update(data)
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def finish(self, result):
+        with self.condition:
+            self.status = 'done'
+            self.result = result
+            self.finished_at = time.monotonic()
+            self.condition.notify_all()
+
+    def fail(self, error):
+        with self.condition:
+            self.status = 'failed'
+            self.error = str(error)
+            self.finished_at = time.monotonic()
+            self.condition.notify_all()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def wait(self, after=0, timeout=None):
+        """Block until there are more than `after` events or the job finished
+
+        Returns the events past `after`.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.events) > after or self.finished, timeout)
+            return self.events[after:]
+
+    def snapshot(self, after=0):
+        """Status dict for polling clients"""
+        with self.condition:
+            snapshot = {
+                'job_id': self.id,
+                'status': self.status,
+                'events': self.events[after:],
+                'next': len(self.events)
+            }
+            if self.status == 'failed':
+                snapshot['error'] = self.error
+            return snapshot
+
+
+class JobManager:
+    """Run requests in the background and keep their results for a while
+
+    Jobs run on the given pool (anything with submit(func, *args) returning
+    a future), so they share its concurrency limit and admission control.
+    Finished jobs are kept for `ttl` seconds so their result can be fetched
+    any number of times; after that they are forgotten.
+    """
+
+    def __init__(self, executor, ttl=None, max_jobs=1000):
+        self.executor = executor
+        self.ttl = ttl if ttl is not None else float(os.environ.get('KMAP_JOB_TTL', '600'))
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, func, *args):
+        """Start func(job, *args) in the background; its return value is the result"""
+        job = Job(uuid.uuid4().hex)
+
+        def task():
+            try:
+                job.finish(func(job, *args))
+            except Exception as e:
+                job.fail(e)
+
+        with self.lock:
+            self._purge()
+            self.jobs[job.id] = job
+        try:
+            self.executor.submit(task)
+        except Exception:
+            with self.lock:
+                del self.jobs[job.id]
+            raise
+        return job
+
+    def get(self, job_id):
+        """The job with this id, or None if unknown or expired"""
+        with self.lock:
+            self._purge()
+            return self.jobs.get(job_id)
+
+    def stats(self):
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in ('pending', 'running', 'done', 'failed')}
+
+    def _purge(self):
+        now = time.monotonic()
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished),
+            key=lambda job: job.finished_at
+        )
+        for job in finished:
+            # Past its ttl, or the oldest result when the table is full
+            if now - job.finished_at > self.ttl or len(self.jobs) >= self.max_jobs:
+                del self.jobs[job.id]
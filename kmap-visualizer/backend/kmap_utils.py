@@ -1,6 +1,22 @@
 import re
 import itertools
+import logging
+import threading
 from collections import OrderedDict
+from expression_engine import ExpressionParser, BitParallelEvaluator
+from minimizer import QuineMcCluskeyMinimizer
+from truth_table import TruthTable
+from npn import NPNCanonicalizer
+from bdd import BDD
+from pipeline import ExpressionPipeline
+from result_cache import LRUCache, approximate_size
+from metrics import timed
+
+# Expected outputs read by the self-checking testbench, one line per row
+VECTOR_FILE = 'expected.mem'
+TESTBENCH_MODES = ('display', 'check')
+
+logger = logging.getLogger(__name__)
 
 class BooleanExpressionSolver:
     def __init__(self):
@@ -8,12 +24,44 @@ class BooleanExpressionSolver:
         self.operator_map = {
             'AND': '&', 'OR': '|', 'NOT': '~', 'XOR': '^'
         }
+        self.parser = ExpressionParser()
+        self.evaluator = BitParallelEvaluator()
+        self.minimizer = QuineMcCluskeyMinimizer()
+        self.npn = NPNCanonicalizer()
+        self.max_variables = 16
+        self.max_minimize_variables = 10
+        self.max_outputs = 16
+        # Expressions analyzed through a BDD skip the truth table entirely
+        self.max_bdd_variables = 64
+        self.max_bdd_nodes = 100000
+        # Every minimized form is checked against its table before use
+        self.check_lock = threading.Lock()
+        self.simplify_checks = 0
+        self.simplify_mismatches = 0
+        # Names the generated testbench uses itself
+        self.reserved_names = {'i', 'uut', 'testbench', 'boolean_function'}
+        # Truth tables keyed by (variables, normalized expression); simplified
+        # forms, covers and K-maps keyed by the truth-table signature so that
+        # equivalent expressions share them
+        self.table_cache = LRUCache(32 * 1024 * 1024, size_of=approximate_size)
+        self.function_cache = LRUCache(32 * 1024 * 1024, size_of=approximate_size)
+        # Number of (submap, row, column) variables for each K-map size
+        self.kmap_layouts = {
+            1: (0, 1, 0), 2: (0, 1, 1), 3: (0, 1, 2),
+            4: (0, 2, 2), 5: (1, 2, 2), 6: (2, 2, 2)
+        }
     
     def extract_variables(self, expression):
-        """Extract all variables from the expression (uppercase and lowercase letters)"""
-        # Find all valid variable names (single letters)
-        variables = set(re.findall(r'\b[A-Za-z]\b', expression))
-        return sorted(list(variables))
+        """Sorted input names of the expression, as normalized and parsed
+        
+        Names are identifiers of any length; normalization uppercases them,
+        so 'a' and 'A' are the same input everywhere.
+        """
+        return self.parser.variables(self.parse(expression))
+    
+    def parse(self, expression):
+        """AST of the normalized expression"""
+        return self.parser.parse(self.normalize_expression(expression))
     
     def normalize_expression(self, expression):
         """Normalize the expression to use consistent operators"""
@@ -34,297 +82,509 @@ class BooleanExpressionSolver:
     
     def evaluate_expression(self, expr, variable_values):
         """Safely evaluate the Boolean expression with given variable values"""
-        # Create a safe evaluation environment
-        env = {var: bool(value) for var, value in variable_values.items()}
-        env.update({
-            'True': True,
-            'False': False,
-            'true': True,
-            'false': False
-        })
-        
-        # Convert expression to Python logical operations
-        python_expr = expr
-        python_expr = python_expr.replace('&', ' and ')
-        python_expr = python_expr.replace('|', ' or ')
-        python_expr = python_expr.replace('~', ' not ')
-        python_expr = python_expr.replace('!', ' not ')
-        python_expr = python_expr.replace('^', ' != ')  # XOR implementation
-        
         try:
-            # Use eval with limited environment
-            result = eval(python_expr, {"__builtins__": {}}, env)
-            return bool(result)
+            ast = self.parser.parse(self.normalize_expression(expr))
+            env = {var: 1 if value else 0 for var, value in variable_values.items()}
+            return bool(self.evaluator.evaluate(ast, env, 1))
         except Exception as e:
             raise ValueError(f"Error evaluating expression: {e}")
     
+    def pipeline(self, expression):
+        """Lazy, request-scoped stages of one expression (see ExpressionPipeline)"""
+        return ExpressionPipeline(self, expression)
+    
     def solve_expression(self, expression):
-        """Main method to solve Boolean expression and generate truth table"""
-        if not expression:
-            raise ValueError("Empty expression provided")
+        """Main method to solve Boolean expression and generate truth table
         
-        # Extract and validate variables
-        variables = self.extract_variables(expression)
+        Computes every stage up front; endpoints use pipeline() instead so
+        they only pay for what they return.
+        """
+        pipeline = self.pipeline(expression)
+        variables = pipeline.variables()
+        return {
+            'expression': expression,
+            'normalized_expression': pipeline.normalized(),
+            'variables': variables,
+            'truth_table': pipeline.truth_table(),
+            'simplified_expression': pipeline.simplified_expression(),
+            'minimal': pipeline.minimal()
+        }
+    
+    def output_pipelines(self, expressions):
+        """Pipelines of several named expressions over their shared set of inputs
+
+        `expressions` maps output names to expressions, in output order.
+        Every pipeline uses the union of the variables, so the outputs can
+        share one module, one testbench and one simulation. Expressions are
+        parsed here, so that errors name their output; the other stages run
+        when asked for. Returns (variables, {name: pipeline}).
+        """
+        if not expressions:
+            raise ValueError("No outputs provided")
+        if len(expressions) > self.max_outputs:
+            raise ValueError(f"Too many outputs (maximum {self.max_outputs} allowed)")
+        
+        pipelines = {}
+        for name, expression in expressions.items():
+            if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', name):
+                raise ValueError(f"Invalid output name '{name}'")
+            if not expression.strip():
+                raise ValueError(f"Empty expression for output '{name}'")
+            
+            pipeline = self.pipeline(expression)
+            try:
+                pipeline.ast()
+            except ValueError as e:
+                raise ValueError(f"Error in output '{name}': {e}")
+            pipelines[name] = pipeline
+        
+        variables = sorted(set().union(*(self.parser.variables(pipeline.ast()) for pipeline in pipelines.values())))
+        if not variables:
+            raise ValueError("No valid variables found in expressions")
+        if len(variables) > self.max_variables:
+            raise ValueError(f"Too many variables (maximum {self.max_variables} allowed)")
+        for name, pipeline in pipelines.items():
+            if name in variables or name in self.reserved_names:
+                raise ValueError(f"Output name '{name}' clashes with an input or testbench signal")
+            pipeline.use_variables(variables)
+        
+        return variables, pipelines
+    
+    def solve_outputs(self, expressions):
+        """Solve several named expressions over their shared set of inputs
+        
+        Computes every stage up front, like solve_expression; endpoints use
+        output_pipelines() instead.
+        """
+        variables, pipelines = self.output_pipelines(expressions)
+        return {
+            'variables': variables,
+            'outputs': {
+                name: {
+                    'expression': pipeline.expression,
+                    'normalized_expression': pipeline.normalized(),
+                    'truth_table': pipeline.truth_table(),
+                    'simplified_expression': pipeline.simplified_expression(),
+                    'minimal': pipeline.minimal()
+                }
+                for name, pipeline in pipelines.items()
+            }
+        }
+    
+    def build_bdd(self, expression):
+        """Parse an expression straight into a BDD; returns (bdd, node)
+        
+        No rows are enumerated, so this takes up to max_bdd_variables inputs,
+        named by any identifier (X0 ... X63).
+        """
+        ast = self.parse(expression)
+        variables = self.parser.variables(ast)
         if not variables:
             raise ValueError("No valid variables found in expression")
+        if len(variables) > self.max_bdd_variables:
+            raise ValueError(f"Too many variables (maximum {self.max_bdd_variables} allowed)")
         
-        if len(variables) > 6:
-            raise ValueError("Too many variables (maximum 6 allowed)")
+        bdd = BDD(variables, order=self.parser.variables_in_order(ast), max_nodes=self.max_bdd_nodes)
+        return bdd, bdd.from_ast(ast)
+    
+    def analyze_expression(self, expression, offset=0, limit=64, max_cubes=64):
+        """Properties of an expression computed on its BDD
         
-        # Normalize expression
-        normalized_expr = self.normalize_expression(expression)
+        Counts, a page of minterms from `offset` and the first `max_cubes`
+        disjoint cubes come from the BDD whatever the number of inputs. The
+        truth table is only materialized up to max_variables inputs, and the
+        minimized form and K-map only where those are supported.
+        """
+        with timed('bdd'):
+            bdd, node = self.build_bdd(expression)
+            variables = bdd.variables
+            minterms = list(itertools.islice(bdd.minterms(node, offset), limit + 1))
+            result = {
+                'variables': variables,
+                'variable_order': bdd.variable_order(),
+                'support': bdd.support(node),
+                'bdd_nodes': bdd.size(node),
+                'satisfying_count': bdd.satcount(node),
+                'cube_count': bdd.path_count(node),
+                'cubes': [bdd.cube_to_term(cube) for cube in itertools.islice(bdd.cubes(node), max_cubes)],
+                'minterms': minterms[:limit],
+                'has_more': len(minterms) > limit
+            }
         
-        # Generate truth table
-        truth_table = self.generate_truth_table(normalized_expr, variables)
+        if len(variables) <= self.max_variables:
+            truth_table = bdd.to_truth_table(node)
+            result['truth_table'] = truth_table
+            if len(variables) <= self.max_minimize_variables:
+                result['simplified_expression'] = self.simplify_expression(truth_table, variables)
+                result['minimal'] = self.is_minimal(truth_table, variables)
+                result['kmap'] = self.generate_kmap(truth_table, variables)
+        return result
+    
+    def check_equivalence(self, expressions):
+        """Compare expressions with the first one, over the union of their inputs
         
-        # Generate simplified expression
-        simplified_expr = self.simplify_expression(truth_table, variables)
+        Up to max_variables inputs the output columns are compared whole by
+        bit-parallel evaluation. Wider expressions are built into one BDD,
+        where equal functions are the same node. Each mismatch comes with
+        the lowest row on which the two differ.
+        """
+        if len(expressions) < 2:
+            raise ValueError("At least two expressions are needed")
+        if len(expressions) > self.max_outputs:
+            raise ValueError(f"Too many expressions (maximum {self.max_outputs} allowed)")
+        
+        asts = []
+        for position, expression in enumerate(expressions):
+            if not isinstance(expression, str) or not expression.strip():
+                raise ValueError(f"Expression {position} is empty or not a string")
+            try:
+                asts.append(self.parse(expression))
+            except ValueError as e:
+                raise ValueError(f"Error in expression {position}: {e}")
+        
+        variables = sorted(set().union(*(self.parser.variables(ast) for ast in asts)))
+        if len(variables) > self.max_bdd_variables:
+            raise ValueError(f"Too many variables (maximum {self.max_bdd_variables} allowed)")
+        
+        with timed('equivalence'):
+            if len(variables) <= self.max_variables:
+                method = 'truth_table'
+                columns = [self.evaluator.evaluate_table(ast, variables) for ast in asts]
+                differences = [column ^ columns[0] for column in columns[1:]]
+                rows = [(difference & -difference).bit_length() - 1 if difference else None
+                        for difference in differences]
+            else:
+                method = 'bdd'
+                order = list(dict.fromkeys(
+                    name for ast in asts for name in self.parser.variables_in_order(ast)
+                ))
+                bdd = BDD(variables, order=order, max_nodes=self.max_bdd_nodes)
+                nodes = [bdd.from_ast(ast) for ast in asts]
+                rows = [
+                    None if node == nodes[0] else next(bdd.minterms(bdd.apply('xor', node, nodes[0])))
+                    for node in nodes[1:]
+                ]
+        
+        results = []
+        for position, row in enumerate(rows, start=1):
+            result = {'index': position, 'expression': expressions[position], 'equivalent': row is None}
+            if row is not None:
+                num_vars = len(variables)
+                assignment = {var: (row >> (num_vars - 1 - i)) & 1 for i, var in enumerate(variables)}
+                result['counterexample'] = assignment
+                result['reference_value'] = self.evaluator.evaluate(asts[0], assignment, 1)
+                result['value'] = self.evaluator.evaluate(asts[position], assignment, 1)
+            results.append(result)
         
         return {
-            'expression': expression,
-            'normalized_expression': normalized_expr,
             'variables': variables,
-            'truth_table': truth_table,
-            'simplified_expression': simplified_expr
+            'method': method,
+            'equivalent': all(result['equivalent'] for result in results),
+            'results': results
         }
     
     def generate_truth_table(self, expression, variables):
         """Generate complete truth table for the expression"""
-        truth_table = []
-        num_vars = len(variables)
-        
-        # Generate all possible combinations
-        for combination in itertools.product([0, 1], repeat=num_vars):
-            row = {}
-            variable_values = {}
-            
-            # Assign values to variables
-            for i, var in enumerate(variables):
-                row[var] = combination[i]
-                variable_values[var] = combination[i]
-            
-            # Evaluate expression
-            try:
-                output = self.evaluate_expression(expression, variable_values)
-                row['output'] = output
-                truth_table.append(row)
-            except Exception as e:
-                raise ValueError(f"Error evaluating expression with values {variable_values}: {e}")
-        
-        return truth_table
+        return TruthTable(variables, self.compute_output_bits(expression, variables))
+    
+    def compute_output_bits(self, expression, variables):
+        """Evaluate the expression over all rows at once; bit i is row i's output"""
+        try:
+            ast = self.parser.parse(expression)
+            return self.evaluator.evaluate_table(ast, variables)
+        except Exception as e:
+            raise ValueError(f"Error evaluating expression: {e}")
     
     def simplify_expression(self, truth_table, variables):
-        """Simplify Boolean expression using basic rules"""
-        if len(variables) == 1:
-            return self._simplify_single_variable(truth_table, variables[0])
-        elif len(variables) <= 4:
-            return self._simplify_with_kmap(truth_table, variables)
-        else:
-            return self._get_original_expression(truth_table, variables)
-    
-    def _simplify_single_variable(self, truth_table, variable):
-        """Simplify single variable expressions"""
-        outputs = [row['output'] for row in truth_table]
-        
-        if all(outputs):
-            return "1"
-        elif not any(outputs):
-            return "0"
-        elif outputs[0] and not outputs[1]:
-            return variable
-        elif not outputs[0] and outputs[1]:
-            return f"~{variable}"
+        """Simplify Boolean expression to a sum of products, minimal unless
+        is_minimal says otherwise"""
+        if len(variables) <= self.max_minimize_variables:
+            # Minimized under its own stage, so 'simplify' times only the rest
+            self._cover(truth_table, variables)
+        with timed('simplify'):
+            return self.function_cache.get_or_compute(
+                (truth_table.signature(), 'simplified'),
+                lambda: self._simplify(truth_table, variables)
+            )
+    
+    def _simplify(self, truth_table, variables):
+        if len(variables) <= self.max_minimize_variables:
+            simplified = self._simplify_with_kmap(truth_table, variables)
+            return self._verified(simplified, truth_table, variables)
         else:
-            return f"{variable}"  # Fallback
+            return self._get_sop_expression(truth_table, variables)
+    
+    def _verified(self, simplified, truth_table, variables):
+        """Check a minimized form against the table it was minimized from
+        
+        That is one bit-parallel evaluation, small next to the minimization.
+        A mismatch is a minimizer bug: it is logged and counted, and the
+        canonical SOP, which is right by construction, is returned instead.
+        """
+        matches = self.evaluator.evaluate_table(self.parser.parse(simplified), variables) == truth_table.bits
+        with self.check_lock:
+            self.simplify_checks += 1
+            if not matches:
+                self.simplify_mismatches += 1
+        if matches:
+            return simplified
+        logger.error("Simplified form '%s' does not match its truth table %r", simplified, truth_table)
+        return self._get_sop_expression(truth_table, variables)
+    
+    def check_stats(self):
+        """Counters of the checks on minimized forms"""
+        with self.check_lock:
+            return {'checked': self.simplify_checks, 'mismatches': self.simplify_mismatches}
+    
+    def minimize_cover(self, truth_table, variables):
+        """Return the minimal cover as a list of (value, mask) implicants
+        
+        Covers are minimized once per NPN class, so simplified forms and
+        K-map groups are shared by every function in the class.
+        """
+        return self._cover(truth_table, variables)[0]
+    
+    def is_minimal(self, truth_table, variables):
+        """Whether the simplified form and K-map groups are a proven minimum
+        
+        False past max_minimize_variables, where the form is the canonical
+        SOP, and when the minimizer's search budget ran out first.
+        """
+        if len(variables) > self.max_minimize_variables:
+            return False
+        return self._cover(truth_table, variables)[1]
+    
+    def _cover(self, truth_table, variables):
+        """(cover, exact), cached per table; timed as the 'minimize' stage"""
+        def minimize():
+            with timed('minimize'):
+                return self._minimize_by_class(truth_table, len(variables))
+        return self.function_cache.get_or_compute((truth_table.signature(), 'cover'), minimize)
+    
+    def _minimize_by_class(self, truth_table, num_vars):
+        """Minimize the NPN class representative once and map its cover back
+        
+        A cover lists the ones of a function, so a table reached through
+        output negation needs the cover of the complemented representative:
+        covers are cached per (representative, output phase). Returns
+        (cover, exact) as minimize_with_status does.
+        """
+        representative, transform = self.npn.canonical(truth_table.bits, num_vars)
+        if transform[2]:
+            representative ^= (1 << (1 << num_vars)) - 1
+        
+        cover, exact = self.function_cache.get_or_compute(
+            ('npn', num_vars, representative),
+            lambda: self.minimizer.minimize_with_status(
+                TruthTable(truth_table.variables, representative).minterms(), num_vars
+            )
+        )
+        # Sorted like the minimizer's own covers, whichever class member came first
+        return sorted(self.npn.map_cover(cover, num_vars, transform),
+                      key=lambda implicant: (-implicant[1].bit_count(), implicant)), exact
+    
+    def cache_stats(self):
+        """Hit/miss counters of the result caches"""
+        return {
+            'tables': self.table_cache.stats(),
+            'functions': self.function_cache.stats(),
+            'npn': self.npn.stats()
+        }
     
     def _simplify_with_kmap(self, truth_table, variables):
-        """Simplify using K-map method (basic implementation)"""
+        """Simplify using the Quine-McCluskey method"""
         try:
-            # Get minterms
-            minterms = []
-            for i, row in enumerate(truth_table):
-                if row['output']:
-                    minterms.append(i)
-            
-            if not minterms:
-                return "0"
-            
-            if len(minterms) == len(truth_table):
-                return "1"
-            
-            # For now, return a basic simplified form
-            # In a full implementation, you would use Quine-McCluskey or similar algorithm
+            cover = self.minimize_cover(truth_table, variables)
+            return self.minimizer.cover_to_expression(cover, variables)
+        except Exception:
             return self._get_sop_expression(truth_table, variables)
-            
-        except:
-            return self._get_original_expression(truth_table, variables)
     
     def _get_sop_expression(self, truth_table, variables):
         """Get Sum of Products expression"""
-        terms = []
-        for row in truth_table:
-            if row['output']:
-                term_parts = []
-                for var in variables:
-                    if row[var] == 0:
-                        term_parts.append(f"~{var}")
-                    else:
-                        term_parts.append(var)
-                terms.append(" & ".join(term_parts))
-        
-        if not terms:
-            return "0"
-        
-        return " | ".join(terms) if len(terms) > 1 else terms[0]
-    
-    def _get_original_expression(self, truth_table, variables):
-        """Fallback to original expression format"""
-        return " | ".join([f"row{i}" for i in range(len(truth_table)) if truth_table[i]['output']])
+        cover = [(minterm, 0) for minterm in truth_table.minterms()]
+        return self.minimizer.cover_to_expression(cover, variables)
     
     def generate_kmap(self, truth_table, variables):
-        """Generate K-map representation"""
+        """Generate K-map representation with Gray-coded rows and columns
+
+        Up to 4 variables this is a single grid. For 5 and 6 variables the
+        leading 1 or 2 variables select one of several stacked 4x4 sub-maps,
+        returned under 'submaps'. 'groups' lists the implicants of the
+        minimal cover with the [submap, row, col] cells each one spans.
+        """
+        if len(variables) in self.kmap_layouts:
+            # The groups need the cover, which is timed as 'minimize'
+            self._cover(truth_table, variables)
+        with timed('kmap'):
+            return self.function_cache.get_or_compute(
+                (truth_table.signature(), 'kmap'),
+                lambda: self._build_kmap(truth_table, variables)
+            )
+    
+    def _build_kmap(self, truth_table, variables):
         num_vars = len(variables)
         
-        if num_vars == 0:
-            return None
-        elif num_vars == 1:
-            return self._generate_1var_kmap(truth_table, variables)
-        elif num_vars == 2:
-            return self._generate_2var_kmap(truth_table, variables)
-        elif num_vars == 3:
-            return self._generate_3var_kmap(truth_table, variables)
-        elif num_vars == 4:
-            return self._generate_4var_kmap(truth_table, variables)
-        else:
-            return None  # K-map not supported for >4 variables
-    
-    def _generate_1var_kmap(self, truth_table, variables):
-        """Generate 1-variable K-map"""
-        return {
-            'rows': ['0', '1'],
-            'cols': [''],
-            'row_var': variables[0],
-            'col_var': '',
-            'grid': [
-                [truth_table[0]['output']],
-                [truth_table[1]['output']]
-            ]
+        if num_vars == 0 or num_vars not in self.kmap_layouts:
+            return None  # K-map not supported for >6 variables
+        
+        submap_bits, row_bits, col_bits = self.kmap_layouts[num_vars]
+        submap_codes = self._gray_codes(submap_bits)
+        row_codes = self._gray_codes(row_bits)
+        col_codes = self._gray_codes(col_bits)
+        
+        # Each cell maps straight to its minterm: submap, row and column
+        # variables are consecutive bit fields of the row index
+        positions = {}
+        submaps = []
+        submap_labels = self._gray_labels(submap_codes, submap_bits)
+        for s, submap_code in enumerate(submap_codes):
+            grid = []
+            for r, row_code in enumerate(row_codes):
+                row_vals = []
+                for c, col_code in enumerate(col_codes):
+                    minterm = (submap_code << (row_bits + col_bits)) | (row_code << col_bits) | col_code
+                    positions[minterm] = [s, r, c]
+                    row_vals.append(truth_table.output(minterm))
+                grid.append(row_vals)
+            submaps.append({
+                'label': submap_labels[s],
+                'grid': grid
+            })
+        
+        kmap = {
+            'rows': self._gray_labels(row_codes, row_bits),
+            'cols': self._gray_labels(col_codes, col_bits),
+            'row_var': ''.join(variables[submap_bits:submap_bits + row_bits]),
+            'col_var': ''.join(variables[submap_bits + row_bits:]),
+            'grid': submaps[0]['grid'],
+            'groups': self._kmap_groups(truth_table, variables, positions)
         }
+        if submap_bits:
+            kmap['submap_var'] = ''.join(variables[:submap_bits])
+            kmap['submaps'] = submaps
+        
+        return kmap
     
-    def _generate_2var_kmap(self, truth_table, variables):
-        """Generate 2-variable K-map"""
-        return {
-            'rows': ['0', '1'],
-            'cols': ['0', '1'],
-            'row_var': variables[0],
-            'col_var': variables[1],
-            'grid': [
-                [truth_table[0]['output'], truth_table[1]['output']],  # A=0: B=0, B=1
-                [truth_table[2]['output'], truth_table[3]['output']]   # A=1: B=0, B=1
-            ]
-        }
+    def _gray_codes(self, bits):
+        """Reflected Gray code sequence for the given number of bits"""
+        return [i ^ (i >> 1) for i in range(1 << bits)]
     
-    def _generate_3var_kmap(self, truth_table, variables):
-        """Generate 3-variable K-map with Gray code ordering"""
-        # Gray code ordering: 00, 01, 11, 10
-        gray_order = ['00', '01', '11', '10']
-        
-        grid = []
-        for i, row_code in enumerate(gray_order[:2]):  # A=0,1
-            row_vals = []
-            for col_code in gray_order:
-                # Find the row matching this Gray code combination
-                a_val = int(row_code)
-                bc_vals = [int(bit) for bit in col_code]
-                
-                for row in truth_table:
-                    if (row[variables[0]] == a_val and 
-                        row[variables[1]] == bc_vals[0] and 
-                        row[variables[2]] == bc_vals[1]):
-                        row_vals.append(row['output'])
-                        break
-            grid.append(row_vals)
-        
-        return {
-            'rows': ['0', '1'],
-            'cols': gray_order,
-            'row_var': variables[0],
-            'col_var': f"{variables[1]}{variables[2]}",
-            'grid': grid
-        }
+    def _gray_labels(self, codes, bits):
+        """Binary labels for a Gray code sequence ('' for a zero-width axis)"""
+        if bits == 0:
+            return ['']
+        return [format(code, f'0{bits}b') for code in codes]
     
-    def _generate_4var_kmap(self, truth_table, variables):
-        """Generate 4-variable K-map with Gray code ordering"""
-        gray_order = ['00', '01', '11', '10']
-        
-        grid = []
-        for row_code in gray_order:
-            row_vals = []
-            for col_code in gray_order:
-                # Find the row matching this Gray code combination
-                ab_vals = [int(bit) for bit in row_code]
-                cd_vals = [int(bit) for bit in col_code]
-                
-                for row in truth_table:
-                    if (row[variables[0]] == ab_vals[0] and 
-                        row[variables[1]] == ab_vals[1] and 
-                        row[variables[2]] == cd_vals[0] and 
-                        row[variables[3]] == cd_vals[1]):
-                        row_vals.append(row['output'])
-                        break
-            grid.append(row_vals)
-        
-        return {
-            'rows': gray_order,
-            'cols': gray_order,
-            'row_var': f"{variables[0]}{variables[1]}",
-            'col_var': f"{variables[2]}{variables[3]}",
-            'grid': grid
-        }
+    def _kmap_groups(self, truth_table, variables, positions):
+        """Cells spanned by each implicant of the minimal cover"""
+        groups = []
+        for value, mask in self.minimize_cover(truth_table, variables):
+            cells = []
+            sub = mask
+            while True:
+                cells.append(positions[value | sub])
+                if not sub:
+                    break
+                sub = (sub - 1) & mask
+            groups.append({
+                'term': self.minimizer.implicant_to_term((value, mask), variables),
+                'cells': sorted(cells)
+            })
+        return groups
+    
+    def generate_verilog(self, expression, variables, testbench=None, ast=None):
+        """Generate Verilog code from Boolean expression
+
+        The assignment is printed from the parsed expression (`ast`, parsed
+        here when not given), the same tree the truth table is evaluated from.
+        """
+        with timed('verilog_generation'):
+            if ast is None:
+                try:
+                    ast = self.parse(expression)
+                except ValueError as e:
+                    raise ValueError(f"Error evaluating expression: {e}")
+            self._check_inputs(ast, variables)
+            return self._module_verilog(expression, variables, [('Y', self.parser.to_verilog(ast))], testbench)
+    
+    def _check_inputs(self, ast, variables):
+        """Reject identifiers that aren't inputs before they reach a module"""
+        unknown = [name for name in self.parser.variables(ast) if name not in variables]
+        if unknown:
+            raise ValueError(f"Error evaluating expression: Unknown variable '{unknown[0]}'")
     
-    def generate_verilog(self, expression, variables):
-        """Generate Verilog code from Boolean expression"""
+    def generate_multi_output_verilog(self, outputs, variables, testbench=None, asts=None):
+        """Generate one module, with one output per entry of `outputs`
+        (name -> expression), and a testbench that checks them together;
+        `asts` (name -> parsed expression) skips parsing them again"""
+        with timed('verilog_generation'):
+            assignments = []
+            for name, expression in outputs.items():
+                try:
+                    ast = asts[name] if asts else self.parse(expression)
+                    self._check_inputs(ast, variables)
+                except ValueError as e:
+                    raise ValueError(f"Error in output '{name}': {e}")
+                assignments.append((name, self.parser.to_verilog(ast)))
+            
+            title = '; '.join(f'{name} = {expression}' for name, expression in outputs.items())
+            return self._module_verilog(title, variables, assignments, testbench)
+    
+    def _module_verilog(self, title, variables, assignments, testbench=None):
+        """Module with one continuous assignment per (output, expression) and
+        an exhaustive testbench displaying every output
+
+        `testbench` is {'mode': 'display'|'check', 'dump_rows': (start, end)
+        or None}; see _check_testbench for the self-checking variant.
+        """
         module_name = "boolean_function"
+        outputs = [name for name, _ in assignments]
+        ports = ', '.join(variables + outputs)
+        assign_lines = '\n        '.join(f'assign {name} = {expr};' for name, expr in assignments)
         
-        # Convert expression to Verilog syntax
-        verilog_expr = expression
-        verilog_expr = verilog_expr.replace('&', '&&')
-        verilog_expr = verilog_expr.replace('|', '||')
-        verilog_expr = verilog_expr.replace('~', '!')
-        verilog_expr = verilog_expr.replace('^', '^')
-        
-        verilog_code = f"""module {module_name}({', '.join(variables)}, Y);
+        module_code = f"""module {module_name}({ports});
         input {', '.join(variables)};
-        output Y;
+        output {', '.join(outputs)};
+        
+        {assign_lines}
+        
+    endmodule"""
+        
+        if testbench and testbench['mode'] == 'check':
+            return module_code + self._check_testbench(
+                title, variables, outputs, module_name, testbench.get('dump_rows')
+            )
         
-        assign Y = {verilog_expr};
+        # Kept out of the f-string: backslashes aren't allowed inside its braces before Python 3.12
+        header_columns = '\\t'.join(variables + outputs)
+        value_formats = '\\t'.join(['%b'] * (len(variables) + len(outputs)))
         
-    endmodule
+        verilog_code = module_code + f"""
 
     // Testbench
     module testbench;
         reg {', '.join(variables)};
-        wire Y;
+        wire {', '.join(outputs)};
         integer i;
         
         // Instantiate the module
-        {module_name} uut({', '.join(variables)}, Y);
+        {module_name} uut({ports});
         
         initial begin
             // Initialize waveform dumping
             $dumpfile("waveform.vcd");
             $dumpvars(0, testbench);
             
-            $display("Testing Boolean Expression: {expression}");
-            $display("Time\\t{'\\t'.join(variables)}\\tY");
+            $display("Testing Boolean Expression: {title}");
+            $display("Time\\t{header_columns}");
             $display("----------------------------------------");
             
             // Test all combinations using a loop
             for (i = 0; i < {2 ** len(variables)}; i = i + 1) begin
                 {{{', '.join(variables)}}} = i;
                 #10;
-                $display("%0t\\t{'\\t%b'.join(['' for _ in variables])}\\t%b", 
-                        $time, {', '.join(variables)}, Y);
+                $display("%0t\\t{value_formats}", 
+                        $time, {ports});
             end
             
             #10;
@@ -335,6 +595,72 @@ class BooleanExpressionSolver:
     endmodule"""
         
         return verilog_code
+    
+    def _check_testbench(self, title, variables, outputs, module_name, dump_rows=None):
+        """Testbench that compares every row against VECTOR_FILE
+        
+        Only mismatching rows and a final summary are printed. Nothing is
+        dumped unless dump_rows = (start, end) asks for the rows in that
+        range, so both transcript and dump stay small at large sizes.
+        """
+        ports = ', '.join(variables + outputs)
+        num_rows = 2 ** len(variables)
+        inputs = f"{{{', '.join(variables)}}}"
+        results = f"{{{', '.join(outputs)}}}"
+        
+        dump_start = dump_stop = ''
+        if dump_rows:
+            start, end = dump_rows
+            if end > num_rows:
+                raise ValueError(f"dump_rows ends past the last row ({num_rows})")
+            dump_start = f"""
+                if (i == {start}) begin
+                    $dumpfile("waveform.vcd");
+                    $dumpvars(0, uut);
+                end"""
+            if end < num_rows:
+                # Switched off before the inputs change, so row `end` is never dumped
+                dump_stop = f"""
+                if (i == {end}) $dumpoff;"""
+        
+        return f"""
+
+    // Self-checking testbench
+    module testbench;
+        reg {', '.join(variables)};
+        wire {', '.join(outputs)};
+        reg [{len(outputs) - 1}:0] expected [0:{num_rows - 1}];
+        integer i, errors;
+        
+        // Instantiate the module
+        {module_name} uut({ports});
+        
+        initial begin
+            $readmemb("{VECTOR_FILE}", expected);
+            errors = 0;
+            $display("Checking Boolean Expression: {title}");
+            
+            for (i = 0; i < {num_rows}; i = i + 1) begin{dump_stop}
+                {inputs} = i;{dump_start}
+                #10;
+                if ({results} !== expected[i]) begin
+                    errors = errors + 1;
+                    $display("MISMATCH at %0t: inputs %b, got %b, expected %b", $time, {inputs}, {results}, expected[i]);
+                end
+            end
+            
+            $display("Checked %0d vectors, %0d mismatches", i, errors);
+            $finish;
+        end
+    endmodule"""
+    
+    def expected_vectors(self, truth_tables):
+        """Contents of VECTOR_FILE: per row, the outputs of `truth_tables`
+        as bits, first table most significant"""
+        num_rows = len(truth_tables[0])
+        # bits is LSB-first by row, so the reversed binary string is in row order
+        columns = [format(table.bits, f'0{num_rows}b')[::-1] for table in truth_tables]
+        return '\n'.join(map(''.join, zip(*columns))) + '\n'
         
     def _generate_test_cases(self, variables):
         """Generate test cases for Verilog testbench"""
@@ -0,0 +1,188 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Stage latencies range from microseconds (normalization) to seconds (vvp)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+                    lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+                inf_labels = _format_labels(self.labelnames, labels, [('le', '+Inf')])
+                lines.append(f'{self.name}_bucket{inf_labels} {series["count"]}')
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f'{self.name}_sum{label_text} {_format_value(series["sum"])}')
+                lines.append(f'{self.name}_count{label_text} {series["count"]}')
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose samples are read from func() at scrape time
+
+    func returns a list of (label values tuple, value). Used to export
+    counters that other objects already keep, such as cache hit counts.
+    """
+
+    def __init__(self, name, help_text, metric_type, labelnames, func):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.func = func
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for labels, value in self.func():
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, metric_type, labelnames, func):
+        return self.register(CallbackMetric(name, help_text, metric_type, labelnames, func))
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    'kmap_stage_duration_seconds', 'Time spent in each processing stage', ('stage',)
+)
+SIMULATION_FALLBACKS = REGISTRY.counter(
+    'kmap_simulation_fallbacks_total', 'Simulations answered with a generated waveform instead of a real one', ('reason',)
+)
+SIMULATION_TIMEOUTS = REGISTRY.counter(
+    'kmap_simulation_timeouts_total', 'Compile or simulation runs that hit their time limit', ('tool',)
+)
+
+# Stage timings of the current request, for the Server-Timing header
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def start_request_timing():
+    """Begin collecting stage timings for the current request"""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def request_timings():
+    """Stage -> total seconds recorded so far in this request ({} outside one)"""
+    return _request_timings.get() or {}
+
+
+def observe_stage(stage, seconds):
+    STAGE_DURATION.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage):
+    """Record how long the with-block takes under the given stage name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def server_timing_header(timings):
+    """Server-Timing value listing each stage's duration in milliseconds"""
+    return ', '.join(f'{stage};dur={1000 * seconds:.3f}' for stage, seconds in timings.items())
@@ -0,0 +1,252 @@
+class QuineMcCluskeyMinimizer:
+    """Two-level SOP minimization using the Quine-McCluskey method
+
+    An implicant is a (value, mask) pair of integers over the minterm
+    index: bits set in mask are eliminated variables, the remaining bits of
+    value give the literal polarity. The first variable is the most
+    significant bit, matching the truth-table row order.
+
+    The cover is a proven minimum unless the branch-and-bound budget runs
+    out first, which dense tables of 8 or more variables can hit; see
+    minimize_with_status.
+    """
+
+    def __init__(self, max_cover_work=5000):
+        # Branch-and-bound budget, counted in prime columns visited per node;
+        # past it the best cover found so far (at worst the greedy one) is kept
+        self.max_cover_work = max_cover_work
+
+    def minimize(self, minterms, num_vars, dont_cares=()):
+        """Return a list of (value, mask) implicants covering minterms,
+        minimum-cost unless the search budget ran out"""
+        return self.minimize_with_status(minterms, num_vars, dont_cares)[0]
+
+    def minimize_with_status(self, minterms, num_vars, dont_cares=()):
+        """(cover, exact): exact is False when the budget cut the search
+        short and the cover is only the best one found"""
+        minterms = sorted(set(minterms))
+        if not minterms:
+            return [], True
+
+        primes = self.prime_implicants(set(minterms) | set(dont_cares), num_vars)
+        return self.minimal_cover_with_status(primes, minterms, num_vars)
+
+    def prime_implicants(self, terms, num_vars):
+        """Generate all prime implicants by repeatedly merging adjacent groups"""
+        # Implicants grouped by popcount of their value, per merge level
+        groups = {}
+        for term in terms:
+            groups.setdefault(term.bit_count(), set()).add((term, 0))
+
+        primes = set()
+        while groups:
+            merged_groups = {}
+            merged = set()
+
+            for count, group in groups.items():
+                upper = groups.get(count + 1)
+                if not upper:
+                    continue
+                for value, mask in group:
+                    # A partner in the next group differs by exactly one free 0-bit
+                    free_bits = ~(value | mask) & ((1 << num_vars) - 1)
+                    while free_bits:
+                        bit = free_bits & -free_bits
+                        free_bits ^= bit
+                        if (value | bit, mask) in upper:
+                            merged.add((value, mask))
+                            merged.add((value | bit, mask))
+                            merged_groups.setdefault(count, set()).add((value, mask | bit))
+
+            for group in groups.values():
+                primes.update(group - merged)
+            groups = merged_groups
+
+        return sorted(primes, key=lambda implicant: (-self._size(implicant), implicant))
+
+    def minimal_cover(self, primes, minterms, num_vars):
+        """Pick a minimum set of primes covering minterms (fewest terms, then literals)"""
+        return self.minimal_cover_with_status(primes, minterms, num_vars)[0]
+
+    def minimal_cover_with_status(self, primes, minterms, num_vars):
+        """minimal_cover and whether the search finished within the budget"""
+        index = {minterm: i for i, minterm in enumerate(minterms)}
+        coverage = []
+        rows = [0] * len(minterms)
+        for p, (value, mask) in enumerate(primes):
+            bits = 0
+            # Walk every submask of the eliminated bits to list covered terms
+            sub = mask
+            while True:
+                i = index.get(value | sub)
+                if i is not None:
+                    bits |= 1 << i
+                    rows[i] |= 1 << p
+                if not sub:
+                    break
+                sub = (sub - 1) & mask
+            coverage.append(bits)
+
+        table = {
+            'coverage': coverage,
+            'rows': rows,
+            'literals': [num_vars - mask.bit_count() for _, mask in primes]
+        }
+        state = {'best': None, 'best_cost': None, 'work': 0, 'truncated': False}
+        self._search((1 << len(minterms)) - 1, (1 << len(primes)) - 1, [], table, state)
+
+        return [primes[p] for p in sorted(state['best'], key=lambda p: primes[p])], not state['truncated']
+
+    def _search(self, uncovered, active, chosen, table, state):
+        """Branch and bound over the cyclic core left after table reduction"""
+        if state['best'] is not None and state['work'] > self.max_cover_work:
+            state['truncated'] = True
+            return
+        state['work'] += active.bit_count()
+
+        uncovered, active, chosen = self._reduce(uncovered, active, list(chosen), table)
+        if uncovered is None:
+            return
+
+        literals = table['literals']
+        if not uncovered or state['best'] is None:
+            # Completing greedily gives the first upper bound
+            complete = self._greedy_cover(chosen, uncovered, active, table)
+            cost = (len(complete), sum(literals[p] for p in complete))
+            if state['best'] is None or cost < state['best_cost']:
+                state['best'] = complete
+                state['best_cost'] = cost
+            if not uncovered:
+                return
+
+        bound = len(chosen) + self._independent_bound(uncovered, active, table)
+        if bound > state['best_cost'][0]:
+            return
+
+        # Branch on the uncovered minterm with the fewest covering primes;
+        # later branches exclude the primes already tried
+        rows = table['rows']
+        coverage = table['coverage']
+        branch_on = min(self._bits(uncovered), key=lambda i: (rows[i] & active).bit_count())
+        options = sorted(self._bits(rows[branch_on] & active),
+                         key=lambda p: (-(coverage[p] & uncovered).bit_count(), literals[p]))
+        for p in options:
+            if state['work'] > self.max_cover_work:
+                state['truncated'] = True
+                break
+            self._search(uncovered & ~coverage[p], active & ~(1 << p), chosen + [p], table, state)
+            active &= ~(1 << p)
+
+    def _reduce(self, uncovered, active, chosen, table):
+        """Apply essential-prime, column and row dominance rules until stable"""
+        coverage = table['coverage']
+        rows = table['rows']
+        literals = table['literals']
+
+        changed = True
+        while changed and uncovered:
+            changed = False
+
+            # Essential primes are the only remaining cover of some minterm
+            for i in self._bits(uncovered):
+                if not (uncovered >> i) & 1:
+                    continue
+                options = rows[i] & active
+                if not options:
+                    return None, active, chosen
+                if not options & (options - 1):
+                    p = options.bit_length() - 1
+                    chosen.append(p)
+                    uncovered &= ~coverage[p]
+                    active &= ~options
+                    changed = True
+            if changed:
+                continue
+
+            # Drop primes covering nothing new or dominated by a cheaper prime
+            for p in self._bits(active):
+                covered = coverage[p] & uncovered
+                if not covered:
+                    active &= ~(1 << p)
+                    changed = True
+                    continue
+                first = (covered & -covered).bit_length() - 1
+                for q in self._bits(rows[first] & active & ~(1 << p)):
+                    other = coverage[q] & uncovered
+                    if covered & ~other or literals[q] > literals[p]:
+                        continue
+                    if other != covered or literals[q] < literals[p] or q < p:
+                        active &= ~(1 << p)
+                        changed = True
+                        break
+
+            # A minterm whose options include another minterm's options is implied
+            for j in self._bits(uncovered):
+                options = rows[j] & active
+                if not (uncovered >> j) & 1 or not options:
+                    continue
+                p = (options & -options).bit_length() - 1
+                for i in self._bits(coverage[p] & uncovered & ~(1 << j)):
+                    other = rows[i] & active
+                    if options & ~other == 0 and (other != options or i > j):
+                        uncovered &= ~(1 << i)
+                        changed = True
+
+        return uncovered, active, chosen
+
+    def _independent_bound(self, uncovered, active, table):
+        """Lower bound: minterms sharing no candidate prime each need their own term"""
+        rows = table['rows']
+        used = 0
+        count = 0
+        for i in sorted(self._bits(uncovered), key=lambda i: (rows[i] & active).bit_count()):
+            options = rows[i] & active
+            if not options & used:
+                used |= options
+                count += 1
+        return count
+
+    def _greedy_cover(self, chosen, uncovered, active, table):
+        """Complete a partial cover by repeatedly taking the prime covering the most"""
+        coverage = table['coverage']
+        literals = table['literals']
+        chosen = list(chosen)
+        candidates = self._bits(active)
+        while uncovered:
+            candidates = [p for p in candidates if coverage[p] & uncovered]
+            best = max(candidates, key=lambda p: ((coverage[p] & uncovered).bit_count(), -literals[p]))
+            chosen.append(best)
+            uncovered &= ~coverage[best]
+        return chosen
+
+    def _bits(self, value):
+        """Indices of the set bits of an integer"""
+        if value.bit_count() * 8 > value.bit_length():
+            return [i for i, bit in enumerate(reversed(bin(value))) if bit == '1']
+        indices = []
+        while value:
+            low = value & -value
+            indices.append(low.bit_length() - 1)
+            value ^= low
+        return indices
+
+    def _size(self, implicant):
+        return implicant[1].bit_count()
+
+    def implicant_to_term(self, implicant, variables):
+        """Render a (value, mask) implicant as an AND term, e.g. '~A & C'"""
+        value, mask = implicant
+        num_vars = len(variables)
+        parts = []
+        for i, var in enumerate(variables):
+            bit = 1 << (num_vars - 1 - i)
+            if mask & bit:
+                continue
+            parts.append(var if value & bit else f"~{var}")
+        return " & ".join(parts) if parts else "1"
+
+    def cover_to_expression(self, cover, variables):
+        """Render a list of implicants as an SOP expression string"""
+        if not cover:
+            return "0"
+        return " | ".join(self.implicant_to_term(implicant, variables) for implicant in cover)
@@ -0,0 +1,170 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class NativeSimulator:
+    """In-process results for the testbench emitted by generate_verilog
+
+    That testbench is purely combinational: it assigns row i of the truth
+    table to the inputs at time i*step, waits one step and prints the row.
+    The dumped waveform and the $display transcript therefore follow
+    directly from the truth table, so they are synthesized here instead of
+    compiling and running the design. The module's assignment is printed
+    from the AST the table was evaluated from, so the two describe the
+    same function; cross_check() compares a result against a real run.
+
+    Multi-output modules pass `outputs`, a dict of output name -> truth
+    table over the same inputs; otherwise the single output is Y. The
+    self-checking testbench (testbench mode 'check') is synthesized the
+    same way: the design always matches the vectors it was built from.
+
+    Transcripts hold what the testbench's $display calls print, under a
+    header saying they are native output; iverilog's and vvp's own
+    messages are not imitated, since neither ran.
+    """
+
+    HEADER = 'Native simulation (fast mode): derived from the truth table, iverilog was not run'
+
+    def __init__(self, step=10):
+        self.step = step
+        self.lock = threading.Lock()
+        self.cross_checks = 0
+        self.mismatches = 0
+
+    def simulate(self, expression, truth_table, outputs=None, testbench=None):
+        """Result dict in the same shape as VerilogSimulator.simulate_verilog"""
+        if testbench and testbench['mode'] == 'check':
+            dump_rows = testbench.get('dump_rows')
+            return {
+                'success': True,
+                'simulation_output': self.check_transcript(expression, truth_table),
+                'waveform_data': self.dump_window(truth_table, outputs, dump_rows) if dump_rows else {},
+                'mode': 'native'
+            }
+        return {
+            'success': True,
+            'simulation_output': self.transcript(expression, truth_table, outputs),
+            'waveform_data': self.waveform(truth_table, outputs),
+            'mode': 'native'
+        }
+
+    def waveform(self, truth_table, outputs=None):
+        """Aligned waveform of the inputs, the outputs and the loop counter i"""
+        num_rows = len(truth_table)
+        # One sample per applied row, plus the loop's final increment of i
+        times = [row * self.step for row in range(num_rows + 1)]
+        last_row = [min(row, num_rows - 1) for row in range(num_rows + 1)]
+
+        waveform_data = {}
+        for position, var in enumerate(truth_table.variables):
+            shift = truth_table.num_vars - 1 - position
+            waveform_data[var] = {
+                'times': times,
+                'values': [(row >> shift) & 1 for row in last_row],
+                'name': var,
+                'width': 1
+            }
+
+        for name, output_table in (outputs or {'Y': truth_table}).items():
+            waveform_data[name] = {
+                'times': times,
+                'values': [int(output_table.output(row)) for row in last_row],
+                'name': name,
+                'width': 1
+            }
+        waveform_data['i'] = {
+            'times': times,
+            'values': list(range(num_rows + 1)),
+            'name': 'i',
+            'width': 32
+        }
+        return waveform_data
+
+    def transcript(self, expression, truth_table, outputs=None):
+        """The lines the generated testbench displays, after the header"""
+        outputs = outputs or {'Y': truth_table}
+        separator = '-' * 40
+        lines = [
+            self.HEADER,
+            f'Testing Boolean Expression: {expression}',
+            '\t'.join(['Time'] + truth_table.variables + list(outputs)),
+            separator
+        ]
+
+        for row in range(len(truth_table)):
+            values = [str(bit) for bit in truth_table.inputs(row)]
+            values.extend(str(int(output_table.output(row))) for output_table in outputs.values())
+            lines.append('\t'.join([str((row + 1) * self.step)] + values))
+
+        lines.extend([
+            separator,
+            'Simulation completed successfully'
+        ])
+        return '\n'.join(lines) + '\n'
+
+    def dump_window(self, truth_table, outputs, dump_rows):
+        """Waveform of the module ports over rows [start, end), as dumped by
+        the self-checking testbench; $dumpoff leaves every signal x at the
+        end of a window that stops early"""
+        start, end = dump_rows
+        num_rows = len(truth_table)
+        rows = list(range(start, end))
+        times = [row * self.step for row in rows]
+        closed = end < num_rows
+        if closed:
+            times.append(end * self.step)
+
+        columns = {}
+        for position, var in enumerate(truth_table.variables):
+            shift = truth_table.num_vars - 1 - position
+            columns[var] = [(row >> shift) & 1 for row in rows]
+        for name, output_table in (outputs or {'Y': truth_table}).items():
+            columns[name] = [int(output_table.output(row)) for row in rows]
+
+        return {
+            name: {
+                'times': times,
+                'values': values + [None] if closed else values,
+                'name': name,
+                'width': 1
+            }
+            for name, values in columns.items()
+        }
+
+    def check_transcript(self, expression, truth_table):
+        """The lines the self-checking testbench displays: no mismatches"""
+        lines = [
+            self.HEADER,
+            f'Checking Boolean Expression: {expression}',
+            f'Checked {len(truth_table)} vectors, 0 mismatches'
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def cross_check(self, native_result, real_result):
+        """Compare a synthesized waveform against a real simulation run
+
+        Returns the names of the signals whose samples differ and keeps
+        running counters for monitoring.
+        """
+        native_waveform = native_result.get('waveform_data', {})
+        real_waveform = real_result.get('waveform_data', {})
+        mismatched = [
+            name for name, signal in native_waveform.items()
+            if name not in real_waveform
+            or real_waveform[name]['times'] != signal['times']
+            or real_waveform[name]['values'] != signal['values']
+        ]
+
+        with self.lock:
+            self.cross_checks += 1
+            if mismatched:
+                self.mismatches += 1
+        if mismatched:
+            logger.warning("Native simulation mismatch on signals: %s", ', '.join(mismatched))
+        return mismatched
+
+    def stats(self):
+        with self.lock:
+            return {'cross_checks': self.cross_checks, 'mismatches': self.mismatches}
@@ -0,0 +1,343 @@
+import itertools
+import threading
+from expression_engine import BitParallelEvaluator
+
+
+class NPNCanonicalizer:
+    """Canonical representatives of NPN classes of truth tables
+
+    Two functions are NPN-equivalent when one becomes the other by
+    permuting inputs, negating inputs and/or negating the output, so
+    `A & ~B` and `~C & D` (over the same variables) share a class. Tables
+    are the packed output columns of TruthTable (bit r is row r, the first
+    variable the most significant bit of r).
+
+    A transform is (perm, negated, output_negated): the representative h
+    is h(z) = output_negated ^ f(x) with x[perm[k]] = z[k] ^ negated[perm[k]].
+
+    Up to max_exhaustive_variables inputs every transform is tried, in a
+    precomputed walk where each step inverts or swaps one input with a
+    single masked shift of the table (see _walk), so the representative is
+    the exact minimum of the class. Above that, candidates are narrowed
+    with cofactor signatures: the output phase is
+    fixed by the number of ones, each input's phase by its cofactors, and
+    inputs are ordered by cofactor size. Only ties are enumerated, skipping
+    permutations within groups of symmetric inputs, and the smallest
+    candidate wins. That is exact whenever the ties fit in max_candidates,
+    which covers nearly every function of up to 6 inputs; past it the best
+    candidate seen so far is kept, which is still a valid class member but
+    may differ between members of the same class.
+    """
+
+    def __init__(self, max_candidates=256, max_exhaustive_variables=3):
+        self.max_candidates = max_candidates
+        self.max_exhaustive_variables = max_exhaustive_variables
+        self.evaluator = BitParallelEvaluator()
+        self.masks = {}
+        self.walks = {}
+        self.lock = threading.Lock()
+        self.exact = 0
+        self.truncated = 0
+
+    def canonical(self, bits, num_vars):
+        """(representative bits, transform) of the class of a table"""
+        if num_vars <= self.max_exhaustive_variables:
+            result = self._exhaustive(bits, num_vars)
+            with self.lock:
+                self.exact += 1
+            return result
+
+        full = (1 << (1 << num_vars)) - 1
+        rows = 1 << num_vars
+        ones = bits.bit_count()
+
+        # The phase with fewer ones is the representative's; ties try both
+        if ones * 2 < rows:
+            phases = (0,)
+        elif ones * 2 > rows:
+            phases = (1,)
+        else:
+            phases = (0, 1)
+
+        best = None
+        seen = 0
+        candidates = itertools.chain.from_iterable(
+            self._candidates(bits ^ full if output_negated else bits, num_vars, output_negated)
+            for output_negated in phases
+        )
+        for candidate in candidates:
+            if seen == self.max_candidates:
+                break
+            seen += 1
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+        truncated = seen == self.max_candidates and next(candidates, None) is not None
+
+        with self.lock:
+            if truncated:
+                self.truncated += 1
+            else:
+                self.exact += 1
+        return best
+
+    def apply(self, bits, num_vars, transform):
+        """The representative h a transform maps the table f to"""
+        perm, negated, output_negated = transform
+        for var in range(num_vars):
+            if negated[var]:
+                bits = self._negate(bits, num_vars, var)
+        bits = self._permute(bits, num_vars, perm)
+        if output_negated:
+            bits ^= (1 << (1 << num_vars)) - 1
+        return bits
+
+    def map_cover(self, cover, num_vars, transform):
+        """Rewrite (value, mask) implicants over the representative's inputs
+        as implicants over the original inputs"""
+        perm, negated, _ = transform
+        mapped = []
+        for value, mask in cover:
+            new_value = new_mask = 0
+            for position, var in enumerate(perm):
+                source = 1 << (num_vars - 1 - position)
+                target = 1 << (num_vars - 1 - var)
+                if mask & source:
+                    new_mask |= target
+                elif bool(value & source) != bool(negated[var]):
+                    new_value |= target
+            mapped.append((new_value, new_mask))
+        return mapped
+
+    def stats(self):
+        with self.lock:
+            return {'exact': self.exact, 'truncated': self.truncated}
+
+    def _exhaustive(self, bits, num_vars):
+        """Smallest table over both output phases and every step of the walk"""
+        steps, transforms = self._walk(num_vars)
+        full = (1 << (1 << num_vars)) - 1
+        best, best_index, best_phase = bits, 0, 0
+        for output_negated in (0, 1):
+            table = bits ^ full if output_negated else bits
+            if table < best:
+                best, best_index, best_phase = table, 0, output_negated
+            for index, (keep, upper, lower, distance) in enumerate(steps, 1):
+                table = (table & keep) | ((table & upper) >> distance) | ((table & lower) << distance)
+                if table < best:
+                    best, best_index, best_phase = table, index, output_negated
+        perm, negated = transforms[best_index]
+        return best, (perm, negated, best_phase)
+
+    def _walk(self, num_vars):
+        """Steps visiting every (perm, negated) pair once, and the transform
+        reached after each step (transforms[0] is the identity)
+
+        Permutations follow plain changes, so consecutive ones differ by
+        swapping adjacent positions; between two swaps the input phases run
+        through a Gray code, one inversion per step. Both kinds of step are
+        (keep, upper, lower, distance) delta swaps of the table.
+        """
+        walk = self.walks.get(num_vars)
+        if walk is not None:
+            return walk
+
+        full = (1 << (1 << num_vars)) - 1
+        perm = list(range(num_vars))
+        negated = [0] * num_vars
+        steps = []
+        transforms = [(tuple(perm), tuple(negated))]
+
+        def negate(position):
+            upper = self._variable_mask(num_vars, position)
+            steps.append((0, upper, full ^ upper, 1 << (num_vars - 1 - position)))
+            negated[perm[position]] ^= 1
+            transforms.append((tuple(perm), tuple(negated)))
+
+        def gray_walk():
+            for index in range(1, 1 << num_vars):
+                # The bit a Gray code flips at step index is its lowest set bit
+                negate((index & -index).bit_length() - 1)
+
+        gray_walk()
+        for position in self._plain_changes(num_vars):
+            upper = self._variable_mask(num_vars, position) & ~self._variable_mask(num_vars, position + 1)
+            distance = 1 << (num_vars - 2 - position)
+            lower = upper >> distance
+            steps.append((full ^ (upper | lower), upper, lower, distance))
+            perm[position], perm[position + 1] = perm[position + 1], perm[position]
+            transforms.append((tuple(perm), tuple(negated)))
+            gray_walk()
+
+        walk = self.walks[num_vars] = (steps, transforms)
+        return walk
+
+    def _plain_changes(self, n):
+        """Positions k whose swap with k + 1 steps through every permutation
+        of n items (Steinhaus-Johnson-Trotter)"""
+        if n <= 1:
+            return []
+        swaps = []
+        inner = self._plain_changes(n - 1)
+        # The last item sweeps across the others, which take one inner step
+        # at each end of a sweep
+        for block, inner_swap in enumerate(inner + [None]):
+            swaps.extend(range(n - 2, -1, -1) if block % 2 == 0 else range(n - 1))
+            if inner_swap is not None:
+                swaps.append(inner_swap + 1 if block % 2 == 0 else inner_swap)
+        return swaps
+
+    def _candidates(self, table, num_vars, output_negated):
+        """Yield (bits, transform) for every tie-breaking choice"""
+        ones = table.bit_count()
+        highs = [(table & self._variable_mask(num_vars, var)).bit_count() for var in range(num_vars)]
+        keys = [max(high, ones - high) for high in highs]
+        fixed = []
+        tied = []
+        for var, high in enumerate(highs):
+            low = ones - high
+            if high == low:
+                # Inputs the function doesn't depend on look the same either way
+                if self._negate(table, num_vars, var) != table:
+                    tied.append(var)
+            else:
+                # The phase whose cofactor holds more ones becomes positive
+                fixed.append((var, high < low))
+
+        if tied and fixed:
+            tied = self._resolve_phases(table, num_vars, tied, fixed)
+
+        # Inputs that tie on cofactor size are told apart by their pairwise
+        # signatures, which cost more to compute
+        if len(set(keys)) < num_vars:
+            pairs = {}
+            keys = [
+                (key, self._pair_signature(table, num_vars, var, ones, highs, pairs)) if keys.count(key) > 1 else (key,)
+                for var, key in enumerate(keys)
+            ]
+
+        # Inputs are placed by ascending signature; equal signatures are ties
+        groups = {}
+        for var in range(num_vars):
+            groups.setdefault(keys[var], []).append(var)
+        groups = [groups[key] for key in sorted(groups)]
+
+        for phases in itertools.product((0, 1), repeat=len(tied)):
+            negated = [0] * num_vars
+            for var, negate in fixed:
+                negated[var] = int(negate)
+            for var, negate in zip(tied, phases):
+                negated[var] = negate
+
+            phased = table
+            for var in range(num_vars):
+                if negated[var]:
+                    phased = self._negate(phased, num_vars, var)
+
+            orders = [self._orders(phased, num_vars, group) for group in groups]
+            for choice in itertools.product(*orders):
+                perm = tuple(var for group in choice for var in group)
+                yield self._permute(phased, num_vars, perm), (perm, tuple(negated), output_negated)
+
+    def _resolve_phases(self, table, num_vars, tied, fixed):
+        """Settle tied input phases against the inputs whose phase is known:
+        the phase whose cofactor overlaps them with more ones becomes
+        positive. Appends what it settles to `fixed`, returns the rest."""
+        full = (1 << (1 << num_vars)) - 1
+        anchors = [
+            self._variable_mask(num_vars, var) ^ full if negate else self._variable_mask(num_vars, var)
+            for var, negate in fixed
+        ]
+        still_tied = []
+        for var in tied:
+            mask = self._variable_mask(num_vars, var)
+            high = sum((table & mask & anchor).bit_count() for anchor in anchors)
+            low = sum((table & ~mask & anchor).bit_count() for anchor in anchors)
+            if high == low:
+                still_tied.append(var)
+            else:
+                fixed.append((var, high < low))
+        return still_tied
+
+    def _pair_signature(self, table, num_vars, var, ones, highs, pairs):
+        """Phase- and order-independent summary of how var interacts with
+        every other input: ones per quadrant of each pair of cofactors.
+        `pairs` caches the shared quadrant between calls."""
+        summary = []
+        for other in range(num_vars):
+            if other == var:
+                continue
+            key = (min(var, other), max(var, other))
+            both = pairs.get(key)
+            if both is None:
+                both = pairs[key] = (
+                    table & self._variable_mask(num_vars, var) & self._variable_mask(num_vars, other)
+                ).bit_count()
+            only_var = highs[var] - both
+            only_other = highs[other] - both
+            neither = ones - both - only_var - only_other
+            # Negating either input swaps the two diagonals
+            summary.append(tuple(sorted([tuple(sorted((both, neither))), tuple(sorted((only_var, only_other)))])))
+        return tuple(sorted(summary))
+
+    def _orders(self, table, num_vars, group):
+        """Orders of a tied group worth trying: swapping two symmetric inputs
+        gives the same table, so only the order of symmetry classes matters"""
+        classes = []
+        for var in group:
+            for members in classes:
+                if self._swap(table, num_vars, members[0], var) == table:
+                    members.append(var)
+                    break
+            else:
+                classes.append([var])
+        if len(classes) == 1:
+            return [tuple(group)]
+        return list(self._arrangements(classes, [len(members) for members in classes]))
+
+    def _arrangements(self, classes, remaining):
+        """Distinct orders of the class members, members of a class taken in a fixed order"""
+        if not any(remaining):
+            yield ()
+            return
+        for index, members in enumerate(classes):
+            if remaining[index]:
+                var = members[len(members) - remaining[index]]
+                remaining[index] -= 1
+                for rest in self._arrangements(classes, remaining):
+                    yield (var,) + rest
+                remaining[index] += 1
+
+    def _permute(self, bits, num_vars, perm):
+        """Move input perm[k] to position k"""
+        order = list(range(num_vars))
+        for position, var in enumerate(perm):
+            current = order.index(var)
+            if current != position:
+                bits = self._swap(bits, num_vars, position, current)
+                order[position], order[current] = order[current], order[position]
+        return bits
+
+    def _variable_mask(self, num_vars, var):
+        """Rows in which input var is 1"""
+        key = (num_vars, var)
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = self.masks[key] = self.evaluator.variable_vector(var, num_vars)
+        return mask
+
+    def _negate(self, bits, num_vars, var):
+        """f(x) -> f(x with input var inverted)"""
+        mask = self._variable_mask(num_vars, var)
+        shift = 1 << (num_vars - 1 - var)
+        return ((bits & mask) >> shift) | ((bits << shift) & mask)
+
+    def _swap(self, bits, num_vars, a, b):
+        """f(x) -> f(x with inputs a and b exchanged)"""
+        if a > b:
+            a, b = b, a
+        # Input a is the higher row bit; rows with (a, b) = (1, 0) trade
+        # places with rows with (0, 1)
+        upper = self._variable_mask(num_vars, a) & ~self._variable_mask(num_vars, b)
+        distance = (1 << (num_vars - 1 - a)) - (1 << (num_vars - 1 - b))
+        lower = upper >> distance
+        return (bits & ~(upper | lower)) | ((bits & upper) >> distance) | ((bits & lower) << distance)
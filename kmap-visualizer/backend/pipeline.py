@@ -0,0 +1,116 @@
+from truth_table import TruthTable
+from metrics import timed
+
+
+class ExpressionPipeline:
+    """The stages of solving one expression, each computed when first asked for
+
+    normalized -> tokens -> ast, variables -> truth_table -> cover,
+    simplified_expression, minimal, kmap; verilog needs only the variables and the
+    ast. An endpoint asks for the stages it
+    returns, so /generate_truth_table never minimizes and an iverilog run
+    of the display testbench never builds the table. Each stage runs at
+    most once per pipeline, and the solver's caches still share tables,
+    covers and K-maps between requests for equivalent expressions.
+
+    A pipeline belongs to one request; it is not shared between threads.
+    """
+
+    def __init__(self, solver, expression):
+        self.solver = solver
+        self.expression = expression
+        self.stages = {}
+
+    def use_variables(self, variables):
+        """Build the table over `variables`, a superset of the expression's
+        own inputs, as the outputs of one module share theirs"""
+        self.stages['variables'] = list(variables)
+
+    def normalized(self):
+        if 'normalized' not in self.stages:
+            with timed('normalize'):
+                self.stages['normalized'] = self.solver.normalize_expression(self.expression)
+        return self.stages['normalized']
+
+    def tokens(self):
+        if 'tokens' not in self.stages:
+            try:
+                self.stages['tokens'] = self.solver.parser.tokenize(self.normalized())
+            except ValueError as e:
+                raise ValueError(f"Error evaluating expression: {e}")
+        return self.stages['tokens']
+
+    def ast(self):
+        if 'ast' not in self.stages:
+            tokens = self.tokens()
+            try:
+                self.stages['ast'] = self.solver.parser.parse_tokens(tokens)
+            except ValueError as e:
+                raise ValueError(f"Error evaluating expression: {e}")
+        return self.stages['ast']
+
+    def variables(self):
+        """Input names, validated the way solve_expression always has"""
+        if 'variables' not in self.stages:
+            if not self.expression:
+                raise ValueError("Empty expression provided")
+            variables = self.solver.parser.variables(self.ast())
+            if not variables:
+                raise ValueError("No valid variables found in expression")
+            if len(variables) > self.solver.max_variables:
+                raise ValueError(f"Too many variables (maximum {self.solver.max_variables} allowed)")
+            self.stages['variables'] = variables
+        return self.stages['variables']
+
+    def truth_table(self):
+        if 'truth_table' not in self.stages:
+            variables = self.variables()
+            normalized = self.normalized()
+            with timed('truth_table'):
+                # A cached table doesn't need the expression parsed at all
+                self.stages['truth_table'] = self.solver.table_cache.get_or_compute(
+                    (tuple(variables), normalized),
+                    lambda: TruthTable(variables, self._output_bits(variables))
+                )
+        return self.stages['truth_table']
+
+    def cover(self):
+        """Minimal cover as (value, mask) implicants, None past max_minimize_variables"""
+        if 'cover' not in self.stages:
+            variables = self.variables()
+            self.stages['cover'] = (
+                self.solver.minimize_cover(self.truth_table(), variables)
+                if len(variables) <= self.solver.max_minimize_variables else None
+            )
+        return self.stages['cover']
+
+    def simplified_expression(self):
+        if 'simplified_expression' not in self.stages:
+            self.stages['simplified_expression'] = self.solver.simplify_expression(self.truth_table(), self.variables())
+        return self.stages['simplified_expression']
+
+    def minimal(self):
+        """Whether simplified_expression and the K-map groups are a proven minimum"""
+        if 'minimal' not in self.stages:
+            self.stages['minimal'] = self.solver.is_minimal(self.truth_table(), self.variables())
+        return self.stages['minimal']
+
+    def kmap(self):
+        if 'kmap' not in self.stages:
+            self.stages['kmap'] = self.solver.generate_kmap(self.truth_table(), self.variables())
+        return self.stages['kmap']
+
+    def verilog(self, testbench=None):
+        """Module and testbench; `testbench` as for generate_verilog"""
+        key = ('verilog', testbench['mode'], testbench.get('dump_rows')) if testbench else ('verilog',)
+        if key not in self.stages:
+            variables = self.variables()
+            self.stages[key] = self.solver.generate_verilog(self.expression, variables, testbench, self.ast())
+        return self.stages[key]
+
+    def _output_bits(self, variables):
+        ast = self.ast()
+        try:
+            return self.solver.evaluator.evaluate_table(ast, variables)
+        except Exception as e:
+            raise ValueError(f"Error evaluating expression: {e}")
@@ -0,0 +1,97 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def approximate_size(value):
+    """Rough memory footprint in bytes of a cached result"""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, int):
+        return 28 + value.bit_length() // 8
+    if isinstance(value, dict):
+        return 64 + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(approximate_size(item) for item in value)
+    if hasattr(value, 'signature'):
+        return approximate_size(value.signature())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with a size budget
+
+    Every entry has a size given by size_of(value) (1 by default, i.e. an
+    entry count); the least recently used entries are evicted once the
+    total exceeds max_size. Hits, misses and evictions are counted.
+    """
+
+    def __init__(self, max_size, size_of=None):
+        self.max_size = max_size
+        self.size_of = size_of or (lambda value: 1)
+        self.entries = OrderedDict()
+        self.current_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it most recently used"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Insert or replace an entry, evicting old ones to stay within budget"""
+        size = self.size_of(value)
+        with self.lock:
+            if key in self.entries:
+                self.current_size -= self.entries.pop(key)[1]
+            if size > self.max_size:
+                return
+            self.entries[key] = (value, size)
+            self.current_size += size
+            while self.current_size > self.max_size:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_size -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        marker = object()
+        value = self.get(key, marker)
+        if value is marker:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_size = 0
+
+    def stats(self):
+        """Counters and occupancy for monitoring"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'size': self.current_size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,37 @@
+"""Production server entry point
+
+    python serve.py
+
+Runs asgi:application under uvicorn. Settings come from the environment:
+
+    KMAP_HOST             interface to bind (default 0.0.0.0)
+    KMAP_PORT             port (default 5000)
+    KMAP_WORKERS          server processes (default 1)
+    KMAP_MAX_CONNECTIONS  concurrent connections per process before new
+                          ones get 503 (default 1000)
+    KMAP_SIM_WORKERS      simulations run at once per process
+    KMAP_SIM_QUEUE        simulations allowed to wait per process
+    KMAP_LOG_LEVEL        uvicorn log level (default info)
+
+Each worker process loads the solvers once at startup. All processes share
+the on-disk simulation cache (KMAP_SIM_CACHE_DIR).
+"""
+import os
+import uvicorn
+
+
+def main():
+    uvicorn.run(
+        'asgi:application',
+        host=os.environ.get('KMAP_HOST', '0.0.0.0'),
+        port=int(os.environ.get('KMAP_PORT', '5000')),
+        workers=int(os.environ.get('KMAP_WORKERS', '1')),
+        limit_concurrency=int(os.environ.get('KMAP_MAX_CONNECTIONS', '1000')),
+        log_level=os.environ.get('KMAP_LOG_LEVEL', 'info'),
+        lifespan='on',
+        app_dir=os.path.dirname(os.path.abspath(__file__))
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import atexit
+import errno
+import os
+import shutil
+import tempfile
+import threading
+
+
+class SimulationWorkspace:
+    """Private working directory reused by every simulation on one thread
+
+    Holds the source file, the compiled image and the dump file that the
+    generated testbench names with $dumpfile("waveform.vcd"). Where the
+    platform supports it the dump file is a FIFO, so the simulator's
+    output goes straight to a reader instead of through the filesystem.
+    """
+
+    def __init__(self, base_dir):
+        self.directory = tempfile.mkdtemp(prefix=f'kmap-sim-{os.getpid()}-', dir=base_dir)
+        self.source_file = os.path.join(self.directory, 'design.v')
+        self.image_file = os.path.join(self.directory, 'design.out')
+        self.dump_file = os.path.join(self.directory, 'waveform.vcd')
+        self.streaming = self._make_fifo()
+
+    def _make_fifo(self):
+        if not hasattr(os, 'mkfifo'):
+            return False
+        try:
+            os.mkfifo(self.dump_file)
+            return True
+        except OSError:
+            return False
+
+    def write_source(self, verilog_code, files=None):
+        """Write the design, plus data files (name -> text) next to it"""
+        with open(self.source_file, 'w') as f:
+            f.write(verilog_code)
+        for name, content in (files or {}).items():
+            with open(os.path.join(self.directory, os.path.basename(name)), 'w') as f:
+                f.write(content)
+
+    def reset_dump(self):
+        """Drop a regular dump file left by the previous run"""
+        if not self.streaming and os.path.exists(self.dump_file):
+            os.unlink(self.dump_file)
+
+    def release_reader(self, reader):
+        """Unblock a dump reader once the simulator has exited
+
+        A reader still waiting in open() (the testbench never opened its
+        dump) gets an immediate end of file; a reader that is already
+        reading is unaffected.
+        """
+        while reader.is_alive():
+            try:
+                fd = os.open(self.dump_file, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    raise
+                # No reader has the FIFO open yet (or it just finished)
+                reader.join(0.01)
+                continue
+            os.close(fd)
+            return
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class WorkspacePool:
+    """One SimulationWorkspace per thread, on tmpfs when available
+
+    The base directory comes from KMAP_SIM_WORKDIR, else /dev/shm if it is
+    writable, else the system temp directory. Workspaces live until the
+    process exits; ones left behind by a killed process are removed when
+    the next pool starts.
+    """
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or os.environ.get('KMAP_SIM_WORKDIR') or self._default_base_dir()
+        self.local = threading.local()
+        self.workspaces = []
+        self.lock = threading.Lock()
+        atexit.register(self.cleanup)
+        self._remove_orphans()
+
+    def _default_base_dir(self):
+        shm = '/dev/shm'
+        if os.path.isdir(shm) and os.access(shm, os.W_OK):
+            return shm
+        return tempfile.gettempdir()
+
+    def get(self):
+        """The calling thread's workspace, created on first use"""
+        workspace = getattr(self.local, 'workspace', None)
+        if workspace is None:
+            workspace = self.local.workspace = self.create()
+        return workspace
+
+    def create(self):
+        """A new workspace not bound to any thread, removed at exit"""
+        workspace = SimulationWorkspace(self.base_dir)
+        with self.lock:
+            self.workspaces.append(workspace)
+        return workspace
+
+    def _remove_orphans(self):
+        # Liveness is checked with signal 0, which means CTRL_C_EVENT on Windows
+        if os.name != 'posix':
+            return
+        try:
+            names = os.listdir(self.base_dir)
+        except OSError:
+            return
+        for name in names:
+            parts = name.split('-')
+            if len(parts) < 4 or parts[:2] != ['kmap', 'sim'] or not parts[2].isdigit():
+                continue
+            if not self._process_alive(int(parts[2])):
+                shutil.rmtree(os.path.join(self.base_dir, name), ignore_errors=True)
+
+    def _process_alive(self, pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True  # Exists but belongs to someone else
+        return True
+
+    def cleanup(self):
+        with self.lock:
+            workspaces, self.workspaces = self.workspaces, []
+        for workspace in workspaces:
+            workspace.cleanup()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+class SimulationCache:
+    """Content-addressed on-disk cache of compiled images and simulation results
+
+    Entries are keyed by a hash of the Verilog source and the toolchain
+    version, and stored as <key>.vvp (compiled image) and <key>.json
+    (simulation output and parsed waveform) under a two-character fan-out
+    directory. Files are written to a temporary name and renamed into place,
+    so several server processes can share one cache directory; a hit bumps
+    the file's mtime and eviction removes the oldest files once the
+    directory grows past max_bytes.
+
+    The size and file count are kept as running totals: the directory is
+    scanned once on first use and again only to evict, which resyncs the
+    totals with files written by other processes. Eviction goes down to
+    low_water of max_bytes so that a full cache isn't rescanned on every
+    store.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or os.environ.get(
+            'KMAP_SIM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'kmap-sim-cache')
+        )
+        self.max_bytes = max_bytes
+        self.low_water = 0.9
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Running totals, None until the directory has been scanned
+        self.size = None
+        self.entries = None
+
+    def key(self, verilog_code, tool_version, files=None):
+        """Cache key for a source file compiled with a given toolchain, plus
+        any data files the testbench reads"""
+        digest = hashlib.sha256()
+        digest.update((tool_version or '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(verilog_code.encode('utf-8'))
+        for name in sorted(files or {}):
+            digest.update(b'\0' + name.encode('utf-8') + b'\0')
+            digest.update(files[name].encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def load_result(self, key):
+        """Return the cached simulation result, or None"""
+        path = self._path(key, '.json')
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        self._touch(path)
+        with self.lock:
+            self.hits += 1
+        return result
+
+    def image_path(self, key):
+        """Path of the cached compiled image, or None if not cached"""
+        path = self._path(key, '.vvp')
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        return path
+
+    def store_image(self, key, compiled_file):
+        """Copy a compiled image into the cache and return its cached path"""
+        path = self._path(key, '.vvp')
+        previous = self._file_size(path)
+        self._write_atomic(path, lambda tmp: shutil.copyfile(compiled_file, tmp))
+        self._stored(path, previous)
+        return path
+
+    def store_result(self, key, result):
+        """Persist a simulation result (JSON-serializable dict)"""
+        path = self._path(key, '.json')
+
+        def write(tmp):
+            with open(tmp, 'w') as f:
+                json.dump(result, f)
+
+        previous = self._file_size(path)
+        self._write_atomic(path, write)
+        self._stored(path, previous)
+
+    def counters(self):
+        """Hits and misses, without touching the directory"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def stats(self):
+        self._ensure_totals()
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'directory': self.directory,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': self.size,
+                'entries': self.entries
+            }
+
+    def _ensure_totals(self):
+        with self.lock:
+            if self.size is not None:
+                return
+        entries = self._entries()
+        with self.lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in entries)
+                self.entries = len(entries)
+
+    def _stored(self, path, previous):
+        """Count a file just written over `previous` bytes (None if new),
+        evicting if the cache outgrew max_bytes"""
+        self._ensure_totals()
+        size = self._file_size(path)
+        if size is None:
+            return
+        with self.lock:
+            if previous is None:
+                self.entries += 1
+            self.size += size - (previous or 0)
+            over = self.size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _write_atomic(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _entries(self):
+        """(path, size, mtime) of every cached file"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.listdir(self.directory):
+            shard_path = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(shard_path, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Removed by another worker
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used files until the cache fits low_water
+        of max_bytes, and resync the running totals"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * self.low_water
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                total -= size
+                count -= 1
+                if total <= target:
+                    break
+        with self.lock:
+            self.size = total
+            self.entries = count
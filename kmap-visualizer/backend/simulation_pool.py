@@ -0,0 +1,107 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SimulationBusy(Exception):
+    """Raised when the simulation queue is full"""
+
+    def __init__(self, retry_after_ms):
+        super().__init__(f"Simulation queue is full, retry after {retry_after_ms} ms")
+        self.retry_after_ms = retry_after_ms
+
+
+class SimulationExecutor:
+    """Bounded pool for running simulations off the request thread
+
+    At most `workers` simulations run at once (each one is mostly waiting on
+    iverilog/vvp subprocesses, so threads are enough) and at most
+    `max_queue` more wait for a worker. Anything beyond that is rejected
+    immediately with SimulationBusy instead of piling up more processes.
+    """
+
+    def __init__(self, simulator, workers=None, max_queue=None):
+        self.simulator = simulator
+        self.workers = workers or int(os.environ.get('KMAP_SIM_WORKERS', os.cpu_count() or 1))
+        self.max_queue = max_queue if max_queue is not None else int(
+            os.environ.get('KMAP_SIM_QUEUE', self.workers * 4)
+        )
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='simulation')
+        self.slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self.lock = threading.Lock()
+
+        self.queued = 0
+        self.running = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def submit(self, func, *args):
+        """Schedule func(*args) on the pool, or raise SimulationBusy"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise SimulationBusy(self.retry_after_ms())
+
+        with self.lock:
+            self.queued += 1
+        enqueued_at = time.monotonic()
+        # Run in the caller's context so per-request stage timings follow the work
+        context = contextvars.copy_context()
+
+        def task():
+            started_at = time.monotonic()
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+                self.started += 1
+                wait = started_at - enqueued_at
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return context.run(func, *args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run += time.monotonic() - started_at
+                self.slots.release()
+
+        try:
+            return self.pool.submit(task)
+        except Exception:
+            with self.lock:
+                self.queued -= 1
+            self.slots.release()
+            raise
+
+    def simulate(self, verilog_code, timeout=None, files=None):
+        """Run simulate_verilog on the pool and wait for its result"""
+        return self.submit(self.simulator.simulate_verilog, verilog_code, None, files).result(timeout)
+
+    def retry_after_ms(self):
+        """Estimated time until a queue slot frees up"""
+        with self.lock:
+            average_run = self.total_run / self.completed if self.completed else 1.0
+            backlog = self.queued + self.running
+        return max(100, int(1000 * average_run * backlog / self.workers))
+
+    def stats(self):
+        """Queue depth, concurrency and wait-time counters"""
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'average_wait_ms': 1000 * self.total_wait / self.started if self.started else 0.0,
+                'max_wait_ms': 1000 * self.max_wait,
+                'average_run_ms': 1000 * self.total_run / self.completed if self.completed else 0.0
+            }
@@ -0,0 +1,116 @@
+"""Row-at-a-time reference implementations the fast code is checked against
+
+Nothing here uses the bit-parallel evaluator, the minimizer or the BDD:
+each function is the textbook definition, evaluated one row at a time.
+"""
+import itertools
+
+
+def rows(num_vars):
+    """Input tuples in truth-table order (the first variable is the MSB)"""
+    return itertools.product((0, 1), repeat=num_vars)
+
+
+def table_bits(function, num_vars):
+    """Packed output column of a Python function of one input tuple"""
+    return sum(1 << r for r, row in enumerate(rows(num_vars)) if function(row))
+
+
+def evaluate(node, env):
+    """Value of an expression AST for one assignment"""
+    kind = node[0]
+    if kind == 'var':
+        return env[node[1]]
+    if kind == 'const':
+        return node[1]
+    if kind == 'not':
+        return 1 - evaluate(node[1], env)
+    left, right = evaluate(node[1], env), evaluate(node[2], env)
+    if kind == 'and':
+        return left & right
+    if kind == 'or':
+        return left | right
+    return left ^ right
+
+
+def ast_bits(node, variables):
+    return table_bits(lambda row: evaluate(node, dict(zip(variables, row))), len(variables))
+
+
+def random_ast(rng, variables, depth):
+    """Random expression tree over the given variable names"""
+    if depth == 0 or rng.random() < 0.2:
+        if rng.random() < 0.05:
+            return ('const', rng.randint(0, 1))
+        return ('var', rng.choice(variables))
+    kind = rng.choice(('and', 'or', 'xor', 'not'))
+    if kind == 'not':
+        return ('not', random_ast(rng, variables, depth - 1))
+    return (kind, random_ast(rng, variables, depth - 1), random_ast(rng, variables, depth - 1))
+
+
+def covers(implicant, row):
+    value, mask = implicant
+    return row | mask == value | mask
+
+
+def cover_bits(cover, num_vars):
+    """Rows covered by a list of (value, mask) implicants"""
+    return sum(1 << row for row in range(1 << num_vars) if any(covers(implicant, row) for implicant in cover))
+
+
+def cover_cost(cover, num_vars):
+    """(terms, literals), the order the minimizer minimizes in"""
+    return len(cover), sum(num_vars - mask.bit_count() for _, mask in cover)
+
+
+def minimum_cost(bits, num_vars):
+    """Cost of the cheapest sum of products of a function, by exhaustive search
+
+    Only prime implicants can appear in a minimum cover, so covers are
+    tried over the primes, smallest number of terms first.
+    """
+    if not bits:
+        return 0, 0
+    size = 1 << num_vars
+    ones = [row for row in range(size) if bits >> row & 1]
+    implicants = []
+    for mask in range(size):
+        for value in range(size):
+            if value & mask:
+                continue
+            spanned = [row for row in range(size) if covers((value, mask), row)]
+            if all(bits >> row & 1 for row in spanned):
+                implicants.append((value, mask, sum(1 << row for row in spanned)))
+    primes = [
+        (value, mask, spanned) for value, mask, spanned in implicants
+        if not any(spanned != other and spanned & other == spanned for _, _, other in implicants)
+    ]
+    target = sum(1 << row for row in ones)
+    for terms in range(1, len(primes) + 1):
+        costs = [
+            sum(num_vars - mask.bit_count() for _, mask, _ in chosen)
+            for chosen in itertools.combinations(primes, terms)
+            if sum_covered(chosen) == target
+        ]
+        if costs:
+            return terms, min(costs)
+    raise AssertionError("the primes always cover the function")
+
+
+def sum_covered(chosen):
+    covered = 0
+    for _, _, spanned in chosen:
+        covered |= spanned
+    return covered
+
+
+def transformed(bits, num_vars, perm, negated, output_negated):
+    """h(z) = output_negated ^ f(x) with x[perm[k]] = z[k] ^ negated[perm[k]]"""
+    def h(z):
+        x = [0] * num_vars
+        for k, var in enumerate(perm):
+            x[var] = z[k] ^ negated[var]
+        row = int(''.join(map(str, x)), 2) if num_vars else 0
+        return (bits >> row & 1) ^ output_negated
+    return table_bits(h, num_vars)
@@ -0,0 +1,89 @@
+import itertools
+import random
+
+import pytest
+
+from bdd import BDD
+from brute_force import ast_bits, evaluate, random_ast
+from kmap_utils import BooleanExpressionSolver
+
+
+@pytest.mark.parametrize('num_vars', [1, 2, 4, 6, 8])
+def test_diagram_matches_brute_force_table(num_vars):
+    variables = [f'X{i}' for i in range(num_vars)]
+    rng = random.Random(num_vars)
+    for _ in range(40):
+        ast = random_ast(rng, variables, 6)
+        bits = ast_bits(ast, variables)
+        bdd = BDD(variables)
+        node = bdd.from_ast(ast)
+        ones = [row for row in range(1 << num_vars) if bits >> row & 1]
+
+        assert bdd.to_bits(node) == bits
+        assert bdd.satcount(node) == len(ones)
+        assert list(bdd.minterms(node)) == ones
+        start = rng.randrange(1 << num_vars)
+        assert list(bdd.minterms(node, start)) == [row for row in ones if row >= start]
+
+        covered = []
+        for cube in bdd.cubes(node):
+            free = [name for name in variables if name not in cube]
+            for values in itertools.product((0, 1), repeat=len(free)):
+                assignment = dict(cube, **dict(zip(free, values)))
+                covered.append(int(''.join(str(assignment[name]) for name in variables), 2))
+        assert sorted(covered) == ones
+        assert bdd.path_count(node) == len(list(bdd.cubes(node)))
+
+
+def test_support_lists_only_inputs_that_matter():
+    variables = ['A', 'B', 'C']
+    bdd = BDD(variables)
+    # B cancels out: A & B | A & ~B == A
+    node = bdd.from_ast(('or', ('and', ('var', 'A'), ('var', 'B')),
+                         ('and', ('var', 'A'), ('not', ('var', 'B')))))
+    assert bdd.support(node) == ['A']
+    assert node == bdd.from_ast(('var', 'A'))
+
+
+def test_reordering_keeps_every_function():
+    # A tiny threshold makes from_ast sift the diagram many times
+    variables = [f'X{i}' for i in range(10)]
+    rng = random.Random(11)
+    for _ in range(10):
+        ast = random_ast(rng, variables, 8)
+        bdd = BDD(variables, reorder_threshold=8)
+        node = bdd.from_ast(ast)
+        assert bdd.to_bits(node) == ast_bits(ast, variables)
+
+
+def test_wide_equivalence_uses_the_diagram():
+    solver = BooleanExpressionSolver()
+    names = [f'X{i}' for i in range(20)]
+    conjunction = ' & '.join(names)
+    de_morgan = '~(' + ' | '.join(f'~{name}' for name in names) + ')'
+    result = solver.check_equivalence([conjunction, de_morgan, conjunction + ' | X0 & ~X1'])
+    assert result['method'] == 'bdd'
+    assert [entry['equivalent'] for entry in result['results']] == [True, False]
+
+    mismatch = result['results'][1]
+    reference = solver.parse(conjunction)
+    other = solver.parse(conjunction + ' | X0 & ~X1')
+    assignment = mismatch['counterexample']
+    assert evaluate(reference, assignment) == mismatch['reference_value']
+    assert evaluate(other, assignment) == mismatch['value']
+    assert mismatch['reference_value'] != mismatch['value']
+
+
+def test_analysis_agrees_with_truth_table_up_to_sixteen_inputs():
+    solver = BooleanExpressionSolver()
+    variables = [f'X{i}' for i in range(5)]
+    rng = random.Random(12)
+    for _ in range(20):
+        ast = random_ast(rng, variables, 5)
+        expression = solver.parser.to_verilog(ast).replace("1'b", '')
+        result = solver.analyze_expression(expression, limit=64)
+        names = result['variables']
+        bits = ast_bits(solver.parse(expression), names)
+        assert result['truth_table'].bits == bits
+        assert result['satisfying_count'] == bits.bit_count()
+        assert result['minterms'] == [row for row in range(1 << len(names)) if bits >> row & 1]
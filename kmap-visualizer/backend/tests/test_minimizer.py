@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from brute_force import cover_bits, cover_cost, minimum_cost
+from minimizer import QuineMcCluskeyMinimizer
+from truth_table import TruthTable
+
+
+def minterms(bits, num_vars):
+    return [row for row in range(1 << num_vars) if bits >> row & 1]
+
+
+@pytest.mark.parametrize('num_vars', [1, 2, 3])
+def test_every_small_function_gets_a_minimum_cover(num_vars):
+    minimizer = QuineMcCluskeyMinimizer()
+    for bits in range(1 << (1 << num_vars)):
+        cover, exact = minimizer.minimize_with_status(minterms(bits, num_vars), num_vars)
+        assert exact
+        assert cover_bits(cover, num_vars) == bits
+        assert cover_cost(cover, num_vars) == minimum_cost(bits, num_vars)
+
+
+def test_four_input_covers_are_minimum():
+    minimizer = QuineMcCluskeyMinimizer()
+    rng = random.Random(4)
+    for _ in range(300):
+        bits = rng.getrandbits(16)
+        cover, exact = minimizer.minimize_with_status(minterms(bits, 4), 4)
+        assert exact
+        assert cover_bits(cover, 4) == bits
+        assert cover_cost(cover, 4) == minimum_cost(bits, 4)
+
+
+def test_dont_cares_may_be_covered_but_ones_must_be():
+    minimizer = QuineMcCluskeyMinimizer()
+    rng = random.Random(5)
+    for _ in range(200):
+        ones = rng.getrandbits(16)
+        dont_cares = rng.getrandbits(16) & ~ones
+        covered = cover_bits(minimizer.minimize(minterms(ones, 4), 4, minterms(dont_cares, 4)), 4)
+        assert covered & ones == ones
+        assert covered & ~(ones | dont_cares) == 0
+
+
+def test_exhausted_budget_keeps_a_valid_cover_and_says_so():
+    # Dense random 8-input tables leave a cyclic core the search can't finish
+    minimizer = QuineMcCluskeyMinimizer(max_cover_work=0)
+    rng = random.Random(8)
+    results = []
+    for _ in range(5):
+        bits = rng.getrandbits(256)
+        cover, exact = minimizer.minimize_with_status(minterms(bits, 8), 8)
+        assert cover_bits(cover, 8) == bits
+        results.append(exact)
+    assert not all(results)
+
+
+def test_cover_renders_as_expression():
+    minimizer = QuineMcCluskeyMinimizer()
+    variables = ['A', 'B', 'C']
+    table = TruthTable(variables, 0b11110000)
+    assert minimizer.cover_to_expression(minimizer.minimize(table.minterms(), 3), variables) == 'A'
+    assert minimizer.cover_to_expression([], variables) == '0'
+    assert minimizer.cover_to_expression([(0, 0b111)], variables) == '1'
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from brute_force import cover_bits, cover_cost, minimum_cost, transformed
+from kmap_utils import BooleanExpressionSolver
+from minimizer import QuineMcCluskeyMinimizer
+from npn import NPNCanonicalizer
+from truth_table import TruthTable
+
+VARIABLES = ['A', 'B', 'C', 'D', 'E', 'F']
+
+
+def random_transform(rng, num_vars):
+    perm = list(range(num_vars))
+    rng.shuffle(perm)
+    return perm, [rng.randint(0, 1) for _ in range(num_vars)], rng.randint(0, 1)
+
+
+@pytest.mark.parametrize('num_vars, classes', [(1, 2), (2, 4), (3, 14)])
+def test_class_counts(num_vars, classes):
+    npn = NPNCanonicalizer()
+    assert len({npn.canonical(bits, num_vars)[0] for bits in range(1 << (1 << num_vars))}) == classes
+
+
+@pytest.mark.parametrize('num_vars', [2, 3, 4, 5, 6])
+def test_transform_maps_the_table_to_its_representative(num_vars):
+    npn = NPNCanonicalizer()
+    rng = random.Random(num_vars)
+    for _ in range(100):
+        bits = rng.getrandbits(1 << num_vars)
+        representative, transform = npn.canonical(bits, num_vars)
+        assert npn.apply(bits, num_vars, transform) == representative
+        assert transformed(bits, num_vars, *transform) == representative
+
+
+@pytest.mark.parametrize('num_vars', [2, 3, 4])
+def test_class_members_share_the_representative(num_vars):
+    npn = NPNCanonicalizer()
+    rng = random.Random(10 + num_vars)
+    for _ in range(200):
+        bits = rng.getrandbits(1 << num_vars)
+        member = transformed(bits, num_vars, *random_transform(rng, num_vars))
+        assert npn.canonical(member, num_vars)[0] == npn.canonical(bits, num_vars)[0]
+
+
+@pytest.mark.parametrize('num_vars', [1, 2, 3])
+def test_shared_covers_are_minimum_for_every_small_function(num_vars):
+    solver = BooleanExpressionSolver()
+    variables = VARIABLES[:num_vars]
+    for bits in range(1 << (1 << num_vars)):
+        cover = solver.minimize_cover(TruthTable(variables, bits), variables)
+        assert cover_bits(cover, num_vars) == bits
+        assert cover_cost(cover, num_vars) == minimum_cost(bits, num_vars)
+
+
+@pytest.mark.parametrize('num_vars', [4, 5, 6])
+def test_shared_covers_match_direct_minimization(num_vars):
+    # Members of one class come first so later ones hit the class cache
+    solver = BooleanExpressionSolver()
+    minimizer = QuineMcCluskeyMinimizer()
+    variables = VARIABLES[:num_vars]
+    rng = random.Random(20 + num_vars)
+    for _ in range(30):
+        bits = rng.getrandbits(1 << num_vars)
+        for member in [bits] + [transformed(bits, num_vars, *random_transform(rng, num_vars)) for _ in range(3)]:
+            table = TruthTable(variables, member)
+            cover = solver.minimize_cover(table, variables)
+            assert cover_bits(cover, num_vars) == member
+            assert cover_cost(cover, num_vars) == cover_cost(minimizer.minimize(table.minterms(), num_vars), num_vars)
+            if num_vars == 4:
+                assert cover_cost(cover, num_vars) == minimum_cost(member, num_vars)
+
+
+def test_kmap_groups_are_the_shared_cover():
+    solver = BooleanExpressionSolver()
+    variables = VARIABLES[:4]
+    rng = random.Random(30)
+    for _ in range(50):
+        table = TruthTable(variables, rng.getrandbits(16))
+        kmap = solver.generate_kmap(table, variables)
+        cover = solver.minimize_cover(table, variables)
+        assert [group['term'] for group in kmap['groups']] == [
+            solver.minimizer.implicant_to_term(implicant, variables) for implicant in cover
+        ]
+        for group, (value, mask) in zip(kmap['groups'], cover):
+            assert len(group['cells']) == 1 << mask.bit_count()
+            for _, row, col in group['cells']:
+                assert kmap['grid'][row][col]
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from waveform_packing import pack_waveform, unpack_waveform
+
+
+def random_signal(rng, name, width, samples, with_range=False):
+    times = sorted(rng.sample(range(1, 1 << 40), samples))
+    plane = lambda: [None if rng.random() < 0.1 else rng.getrandbits(width) for _ in range(samples)]
+    signal = {'name': name, 'width': width, 'times': [0] + times[1:], 'values': plane()}
+    if with_range:
+        signal['min'], signal['max'] = plane(), plane()
+    return signal
+
+
+@pytest.mark.parametrize('compress', [True, False])
+@pytest.mark.parametrize('width', [1, 2, 3, 7, 8, 31, 32, 64, 70])
+def test_round_trip(width, compress):
+    rng = random.Random(width)
+    signals = [
+        random_signal(rng, f'sig{width}', width, 50),
+        random_signal(rng, f'win{width}', width, 17, with_range=True),
+        {'name': 'single', 'width': width, 'times': [5], 'values': [None]}
+    ]
+    assert unpack_waveform(pack_waveform(signals, compress)) == {signal['name']: signal for signal in signals}
+
+
+def test_empty_waveform_and_unicode_names():
+    assert unpack_waveform(pack_waveform([])) == {}
+    signal = {'name': 'top.ü_sig', 'width': 1, 'times': [0, 1], 'values': [0, 1]}
+    assert unpack_waveform(pack_waveform([signal])) == {signal['name']: signal}
+
+
+def test_rejects_foreign_data_and_unsorted_times():
+    with pytest.raises(ValueError):
+        unpack_waveform(b'JUNK\x00')
+    with pytest.raises(ValueError):
+        pack_waveform([{'name': 'A', 'width': 1, 'times': [2, 1], 'values': [0, 1]}])
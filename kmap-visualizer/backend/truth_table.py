@@ -0,0 +1,85 @@
+class TruthTable:
+    """Truth table stored as one packed output column
+
+    Bit i of `bits` is the output of row i. Rows follow itertools.product
+    order, so the input values of a row are the bits of its index with the
+    first variable as the most significant bit. Indexing and iteration
+    yield the legacy per-row dicts ({var: 0/1, ..., 'output': bool}) so
+    existing callers keep working without the table being expanded.
+    """
+
+    def __init__(self, variables, bits):
+        self.variables = list(variables)
+        self.bits = bits
+
+    @property
+    def num_vars(self):
+        return len(self.variables)
+
+    def __len__(self):
+        return 1 << len(self.variables)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("truth table row out of range")
+        return self.row(index)
+
+    def __eq__(self, other):
+        if not isinstance(other, TruthTable):
+            return NotImplemented
+        return self.signature() == other.signature()
+
+    def __hash__(self):
+        return hash(self.signature())
+
+    def __repr__(self):
+        return f"TruthTable(variables={self.variables}, bits={self.bits:#x})"
+
+    def output(self, index):
+        """Output value of a single row"""
+        return bool((self.bits >> index) & 1)
+
+    def inputs(self, index):
+        """Input values of a row, in variable order"""
+        num_vars = len(self.variables)
+        return tuple((index >> (num_vars - 1 - i)) & 1 for i in range(num_vars))
+
+    def row(self, index):
+        """Legacy dict view of a single row"""
+        row = dict(zip(self.variables, self.inputs(index)))
+        row['output'] = self.output(index)
+        return row
+
+    def to_rows(self):
+        """Expand into the legacy list of row dicts"""
+        return list(self)
+
+    def to_hex(self):
+        """Output column as a hex string, row 0 in the lowest bit of the last digit"""
+        digits = (len(self) + 3) // 4
+        return format(self.bits, f'0{digits}x')
+
+    @classmethod
+    def from_hex(cls, variables, hex_string):
+        """Rebuild a table from the to_hex() encoding"""
+        return cls(variables, int(hex_string, 16))
+
+    def minterms(self):
+        """Indices of rows whose output is 1"""
+        return [i for i, bit in enumerate(reversed(bin(self.bits))) if bit == '1']
+
+    def count(self):
+        """Number of rows whose output is 1"""
+        return self.bits.bit_count()
+
+    def signature(self):
+        """Hashable identity of the function: variable order plus output bits"""
+        return (tuple(self.variables), self.bits)
@@ -0,0 +1,190 @@
+from array import array
+
+
+class VCDSignal:
+    """One declared VCD variable with array-backed time/value columns
+
+    Values are integers; a value containing x or z bits is stored as
+    VCDSignal.X or VCDSignal.Z. Vectors wider than 63 bits keep their
+    values in a plain list since they don't fit a machine word.
+    """
+
+    X = -1
+    Z = -2
+
+    def __init__(self, code, name, scope, width, var_type):
+        self.code = code
+        self.name = name
+        self.scope = tuple(scope)
+        self.width = width
+        self.var_type = var_type
+        self.times = array('Q')
+        self.values = array('q') if width <= 63 else []
+
+    @property
+    def full_name(self):
+        return '.'.join(self.scope + (self.name,))
+
+    def to_dict(self, name=None):
+        """Waveform dict in the API format; unknown values become None"""
+        return {
+            'times': list(self.times),
+            'values': [value if value >= 0 else None for value in self.values],
+            'name': name or self.name,
+            'width': self.width
+        }
+
+
+class VCDParser:
+    """Incremental Value Change Dump parser
+
+    Reads the dump line by line, so memory use is bounded by the signal
+    columns rather than the file size. Handles
+    nested $scope hierarchies, scalar and vector (b.../r...) changes and
+    x/z states.
+    """
+
+    SCALAR_VALUES = {'0': 0, '1': 1, 'x': VCDSignal.X, 'X': VCDSignal.X, 'z': VCDSignal.Z, 'Z': VCDSignal.Z}
+
+    def parse_header(self, lines):
+        """Read declarations up to $enddefinitions; returns code -> [VCDSignal]
+
+        Several variables may share one identifier code (a testbench reg
+        and the module port it drives).
+        """
+        signals = {}
+        tokens = self._iter_tokens(lines)
+        scope = []
+
+        for token in tokens:
+            if token == '$scope':
+                next(tokens, None)  # Scope type (module, task, ...)
+                scope.append(next(tokens, ''))
+                self._skip_to_end(tokens)
+            elif token == '$upscope':
+                if scope:
+                    scope.pop()
+                self._skip_to_end(tokens)
+            elif token == '$var':
+                fields = self._read_to_end(tokens)
+                if len(fields) >= 4:
+                    var_type, width, code, name = fields[:4]
+                    signal = VCDSignal(code, name, scope, int(width), var_type)
+                    signals.setdefault(code, []).append(signal)
+            elif token == '$enddefinitions':
+                self._skip_to_end(tokens)
+                break
+            elif token.startswith('$'):
+                # $date, $version, $timescale, $comment, ...
+                self._skip_to_end(tokens)
+
+        return signals
+
+    def iter_changes(self, stream, signals=None):
+        """Yield (time, code, value) for every value change in the dump
+
+        `signals`, if given, is filled with the header declarations before
+        the first change is produced.
+        """
+        lines = iter(stream)
+        declared = self.parse_header(lines)
+        if signals is not None:
+            signals.update(declared)
+
+        scalar_values = self.SCALAR_VALUES
+        time = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            first = line[0]
+
+            # Fast path: one change or timestamp per line, as simulators write them
+            if ' ' not in line:
+                if first in scalar_values:
+                    yield time, line[1:], scalar_values[first]
+                    continue
+                if first == '#':
+                    time = int(line[1:])
+                    continue
+
+            tokens = line.split()
+            i = 0
+            while i < len(tokens):
+                token = tokens[i]
+                first = token[0]
+                if first in scalar_values:
+                    yield time, token[1:], scalar_values[first]
+                elif first == '#':
+                    time = int(token[1:])
+                elif first in 'bBrR':
+                    i += 1
+                    if i < len(tokens):
+                        yield time, tokens[i], self._vector_value(token)
+                elif first == '$' and token not in ('$dumpvars', '$dumpall', '$dumpon', '$dumpoff', '$end'):
+                    # $comment blocks may also appear between changes
+                    rest = self._iter_tokens([' '.join(tokens[i + 1:])], lines)
+                    self._skip_to_end(rest)
+                    break
+                i += 1
+
+    def parse(self, stream):
+        """Parse a whole dump, returning the list of signals with filled columns"""
+        signals = {}
+        columns = None
+        for time, code, value in self.iter_changes(stream, signals):
+            if columns is None:
+                # Signals sharing a code share one pair of columns
+                columns = {}
+                for group_code, group in signals.items():
+                    for signal in group[1:]:
+                        signal.times, signal.values = group[0].times, group[0].values
+                    columns[group_code] = (group[0].times, group[0].values)
+
+            column = columns.get(code)
+            if column is None:
+                continue
+            times, values = column
+            # Several changes at one timestamp collapse to the last one
+            if times and times[-1] == time:
+                values[-1] = value
+            else:
+                times.append(time)
+                values.append(value)
+        return [signal for group in signals.values() for signal in group]
+
+    def parse_file(self, path):
+        with open(path, 'r') as f:
+            return self.parse(f)
+
+    def _iter_tokens(self, *line_sources):
+        for lines in line_sources:
+            for line in lines:
+                yield from line.split()
+
+    def _skip_to_end(self, tokens):
+        for token in tokens:
+            if token == '$end':
+                return
+
+    def _read_to_end(self, tokens):
+        fields = []
+        for token in tokens:
+            if token == '$end':
+                break
+            fields.append(token)
+        return fields
+
+    def _vector_value(self, token):
+        kind, bits = token[0].lower(), token[1:]
+        if kind == 'r':
+            try:
+                return int(float(bits))
+            except ValueError:
+                return VCDSignal.X
+        lowered = bits.lower()
+        if 'x' in lowered:
+            return VCDSignal.X
+        if 'z' in lowered:
+            return VCDSignal.Z
+        return int(bits, 2) if bits else 0
@@ -1,78 +1,213 @@
 import subprocess
-import tempfile
 import os
+import logging
 import re
+import threading
 import json
 import random
+import heapq
+from simulation_cache import SimulationCache
+from vcd_parser import VCDParser
+from sim_workspace import WorkspacePool
+from metrics import timed, SIMULATION_FALLBACKS, SIMULATION_TIMEOUTS
+
+logger = logging.getLogger(__name__)
 
 class VerilogSimulator:
     def __init__(self):
         self.ivl_path = "iverilog"
         self.vvp_path = "vvp"
+        self.cache = SimulationCache()
+        self.vcd_parser = VCDParser()
+        self.workspaces = WorkspacePool()
+        self._tool_version = None
+        self._tool_checked = False
     
-    def simulate_verilog(self, verilog_code):
-        """Simulate Verilog code and return waveform data"""
+    def simulate_verilog(self, verilog_code, progress=None, files=None):
+        """Simulate Verilog code and return waveform data
+        
+        `progress`, if given, is called with 'compiled', 'simulated' and
+        'parsed' as each step finishes. `files` (name -> text) are written
+        next to the source for the testbench to read, e.g. $readmemb vectors.
+        """
+        report = progress or (lambda stage: None)
+        
+        cache_key, cached = self.lookup_cached(verilog_code, files)
+        if cached is not None:
+            for stage in ('compiled', 'simulated', 'parsed'):
+                report(stage)
+            return cached
+        
         try:
-            # Create temporary files
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
-                f.write(verilog_code)
-                verilog_file = f.name
+            # Each worker thread reuses its own directory: the testbench dumps
+            # to a fixed "waveform.vcd" relative to the simulator's cwd
+            workspace = self.workspaces.get()
+            workspace.write_source(verilog_code, files)
             
-            vcd_file = verilog_file.replace('.v', '.vcd')
-            output_file = verilog_file.replace('.v', '.out')
+            image_file = self.cache.image_path(cache_key) if cache_key else None
             
-            try:
+            if image_file is None:
                 # Compile Verilog
-                compile_cmd = [self.ivl_path, '-o', output_file, verilog_file]
-                compile_result = subprocess.run(compile_cmd, capture_output=True, text=True, timeout=30)
+                compile_cmd = [self.ivl_path, '-o', workspace.image_file, workspace.source_file]
+                with timed('iverilog'):
+                    compile_result = subprocess.run(compile_cmd, capture_output=True, text=True, timeout=30)
                 
                 if compile_result.returncode != 0:
-                    # If compilation fails, generate simulated waveform data
-                    print("Compilation failed, generating simulated waveform data...")
-                    return self._generate_simulated_waveform(verilog_code)
-                
-                # Run simulation
-                sim_cmd = [self.vvp_path, output_file]
-                sim_result = subprocess.run(sim_cmd, capture_output=True, text=True, timeout=30)
-                
-                # Parse VCD file if it exists
-                waveform_data = {}
-                if os.path.exists(vcd_file):
-                    waveform_data = self.parse_vcd_file(vcd_file)
-                
-                # If no waveform data, generate simulated data
-                if not waveform_data:
-                    waveform_data = self._generate_simulated_waveform(verilog_code)
-                
-                return {
-                    'success': True,
-                    'simulation_output': sim_result.stdout + sim_result.stderr,
-                    'waveform_data': waveform_data
-                }
+                    return self.compile_failed(verilog_code, compile_result.stdout + compile_result.stderr)
                 
-            finally:
-                # Cleanup temporary files
-                for file_path in [verilog_file, vcd_file, output_file]:
-                    if os.path.exists(file_path):
-                        try:
-                            os.unlink(file_path)
-                        except:
-                            pass
-                        
-        except subprocess.TimeoutExpired:
-            return {
-                'success': False,
-                'error': 'Simulation timed out',
-                'simulation_output': ''
-            }
+                image_file = self._cache_image(cache_key, workspace.image_file)
+            report('compiled')
+            
+            # Run simulation, parsing the dump as it is written
+            with timed('vvp'):
+                reader = self.start_dump_reader(workspace)
+                try:
+                    sim_result = subprocess.run([self.vvp_path, image_file], capture_output=True, text=True,
+                                                timeout=30, cwd=workspace.directory)
+                finally:
+                    signals = self.finish_dump_reader(workspace, reader)
+            report('simulated')
+            
+            result = self.build_result(verilog_code, cache_key, sim_result.stdout + sim_result.stderr,
+                                       sim_result.returncode, signals)
+            report('parsed')
+            return result
+            
+        except subprocess.TimeoutExpired as e:
+            return self.timed_out(os.path.basename(e.cmd[0]))
         except Exception as e:
-            print(f"Simulation error: {e}")
-            # Generate simulated data as fallback
-            return {
-                'success': True,
-                'simulation_output': f"Simulation completed with fallback waveform data\n{str(e)}",
-                'waveform_data': self._generate_simulated_waveform(verilog_code)
-            }
+            return self.failed(verilog_code, e)
+    
+    # The steps below are shared with the asyncio runner in async_simulation.py
+    
+    def lookup_cached(self, verilog_code, files=None):
+        """(cache key, cached result or None) for a source file"""
+        # Identical sources compiled by the same toolchain give identical results
+        tool_version = self.tool_version()
+        cache_key = self.cache.key(verilog_code, tool_version, files) if tool_version else None
+        if not cache_key:
+            return None, None
+        cached = self.cache.load_result(cache_key)
+        if cached is not None:
+            cached['cached'] = True
+        return cache_key, cached
+    
+    def start_dump_reader(self, workspace):
+        """Start parsing the workspace's dump FIFO on a thread, before vvp runs
+        
+        With a FIFO workspace the dump is parsed while vvp is still running,
+        so it never touches the disk. Returns None for a regular dump file,
+        which is read after vvp exits.
+        """
+        workspace.reset_dump()
+        if not workspace.streaming:
+            return None
+        
+        dump = {}
+        
+        def read_dump():
+            try:
+                with open(workspace.dump_file, 'r') as f:
+                    dump['signals'] = self.vcd_parser.parse(f)
+            except Exception as e:
+                dump['error'] = e
+        
+        reader = threading.Thread(target=read_dump, name='vcd-reader', daemon=True)
+        reader.dump = dump
+        reader.start()
+        return reader
+    
+    def finish_dump_reader(self, workspace, reader):
+        """Parsed signals once vvp has exited (None without a dump)"""
+        if reader is None:
+            if not os.path.exists(workspace.dump_file):
+                return None
+            return self.vcd_parser.parse_file(workspace.dump_file)
+        
+        workspace.release_reader(reader)
+        reader.join()
+        if 'error' in reader.dump:
+            raise reader.dump['error']
+        return reader.dump.get('signals') or None
+    
+    def build_result(self, verilog_code, cache_key, simulation_output, returncode, signals):
+        """Result dict of a finished run, stored in the cache if it is a real one"""
+        with timed('vcd_parse'):
+            # Per-signal columns; aligned_waveform() builds the grid when a
+            # response asks for it
+            waveform_data = self._waveform_from_signals(signals, aligned=False) if signals else {}
+        
+        # If no waveform data, generate simulated data (unless the testbench
+        # never dumps, as the self-checking one may)
+        dumps = '$dumpfile' in verilog_code
+        status = 'ok'
+        if not waveform_data and dumps:
+            SIMULATION_FALLBACKS.inc('no_waveform')
+            status = 'no_waveform'
+            waveform_data = self._generate_simulated_waveform(verilog_code)
+        
+        result = {
+            'success': True,
+            'status': status,
+            'simulation_output': simulation_output,
+            'waveform_data': waveform_data
+        }
+        
+        # Only real simulation results are worth sharing
+        if cache_key and status == 'ok' and returncode == 0:
+            try:
+                self.cache.store_result(cache_key, result)
+            except OSError as e:
+                logger.warning("Simulation cache write failed: %s", e)
+        
+        return result
+    
+    # A result's 'status' is 'ok' for a real run. Otherwise it names why the
+    # waveform is missing or generated: 'timeout', 'compile_failed', 'error'
+    # or 'no_waveform', as in the fallback and timeout counters
+    
+    def compile_failed(self, verilog_code, compiler_output=''):
+        # If compilation fails, generate simulated waveform data
+        logger.warning("Compilation failed, generating simulated waveform data")
+        SIMULATION_FALLBACKS.inc('compile_failed')
+        return {
+            'success': True,
+            'status': 'compile_failed',
+            'error': 'Compilation failed',
+            'simulation_output': f"Compilation failed, showing generated waveform data\n{compiler_output}",
+            'waveform_data': self._generate_simulated_waveform(verilog_code)
+        }
+    
+    def timed_out(self, tool):
+        SIMULATION_TIMEOUTS.inc(tool)
+        return {
+            'success': False,
+            'status': 'timeout',
+            'error': 'Simulation timed out',
+            'simulation_output': ''
+        }
+    
+    def failed(self, verilog_code, error):
+        logger.warning("Simulation error: %s", error)
+        SIMULATION_FALLBACKS.inc('error')
+        # Generate simulated data as fallback
+        return {
+            'success': True,
+            'status': 'error',
+            'error': str(error),
+            'simulation_output': f"Simulation completed with fallback waveform data\n{str(error)}",
+            'waveform_data': self._generate_simulated_waveform(verilog_code)
+        }
+    
+    def _cache_image(self, cache_key, output_file):
+        """Copy a freshly compiled image into the cache, returning the path to run"""
+        if not cache_key:
+            return output_file
+        try:
+            return self.cache.store_image(cache_key, output_file)
+        except OSError as e:
+            logger.warning("Simulation cache write failed: %s", e)
+            return output_file
     
     def _generate_simulated_waveform(self, verilog_code):
         """Generate realistic simulated waveform data when real simulation fails"""
@@ -150,7 +285,7 @@ class VerilogSimulator:
             return waveform_data
             
         except Exception as e:
-            print(f"Error generating simulated waveform: {e}")
+            logger.warning("Error generating simulated waveform: %s", e)
             return self._generate_basic_waveform()
     
     def _generate_basic_waveform(self):
@@ -201,124 +336,146 @@ class VerilogSimulator:
         except:
             return ['A', 'B']  # Basic fallback
     
-    def parse_vcd_file(self, vcd_file):
-        """Parse VCD file and extract waveform data - IMPROVED VERSION"""
+    def parse_vcd_file(self, vcd_file, scoped_names=False):
+        """Parse VCD file and extract waveform data
+
+        Signals are keyed by their short name, with the shallowest
+        declaration winning when a name appears in several scopes (the
+        testbench regs and the module ports); pass scoped_names=True to key
+        every signal by its full dotted path instead.
+        """
         try:
-            with open(vcd_file, 'r') as f:
-                vcd_content = f.read()
-            
             # If file is empty or too small, use simulated data
-            if len(vcd_content) < 100:
+            if os.path.getsize(vcd_file) < 100:
                 return self._generate_simulated_waveform("")
             
-            waveform_data = {}
-            signals = {}
-            current_time = 0
-            parsing_signals = True
-            
-            lines = vcd_content.split('\n')
-            
-            # First pass: identify all signals
-            for line in lines:
-                line = line.strip()
-                
-                if line.startswith('$var'):
-                    # Parse signal definition: $var wire 1 ! A $end
-                    parts = line.split()
-                    if len(parts) >= 5:
-                        signal_code = parts[3]
-                        signal_name = parts[4]
-                        signals[signal_code] = signal_name
-                
-                elif line.startswith('$enddefinitions'):
-                    parsing_signals = False
-                
-                elif line.startswith('#') and not parsing_signals:
-                    # Time change
-                    current_time = int(line[1:])
-                
-                elif line and line[0] in '01bxz' and not parsing_signals:
-                    # Signal value change
-                    value_char = line[0]
-                    signal_code = line[1:].strip()
-                    
-                    if signal_code in signals:
-                        signal_name = signals[signal_code]
-                        if signal_name not in waveform_data:
-                            waveform_data[signal_name] = {
-                                'times': [],
-                                'values': [],
-                                'name': signal_name
-                            }
-                        
-                        # Convert value to 0 or 1
-                        value = 1 if value_char == '1' else 0
-                        
-                        waveform_data[signal_name]['times'].append(current_time)
-                        waveform_data[signal_name]['values'].append(value)
+            signals = self.vcd_parser.parse_file(vcd_file)
+            waveform_data = self._waveform_from_signals(signals, scoped_names)
             
             # If we didn't get proper waveform data, use simulated
             if not waveform_data:
                 return self._generate_simulated_waveform("")
             
-            # Ensure all signals have consistent time points
-            waveform_data = self._normalize_waveform_data(waveform_data)
-            
             return waveform_data
             
         except Exception as e:
-            print(f"VCD parsing error: {e}")
+            logger.warning("VCD parsing error: %s", e)
             return self._generate_simulated_waveform("")
     
+    def _waveform_from_signals(self, signals, scoped_names=False, aligned=True):
+        """Waveform dict from parsed VCD signals ({} if none changed), on one
+        shared time grid unless aligned=False"""
+        waveform_data = {}
+        for signal in sorted(signals, key=lambda signal: len(signal.scope)):
+            name = signal.full_name if scoped_names else signal.name
+            if name in waveform_data or not signal.times:
+                continue
+            waveform_data[name] = signal.to_dict(name)
+        
+        # Ensure all signals have consistent time points
+        return self._normalize_waveform_data(waveform_data) if aligned else waveform_data
+    
+    def aligned_waveform(self, waveform_data):
+        """The grid format: every signal sampled at every timestamp
+        
+        Simulation results keep each signal's own columns; a waveform that
+        is already aligned, as fast mode's is, comes back unchanged.
+        """
+        signals = list(waveform_data.values())
+        if all(signal['times'] == signals[0]['times'] for signal in signals[1:]):
+            return waveform_data
+        return self._normalize_waveform_data(waveform_data)
+    
     def _normalize_waveform_data(self, waveform_data):
-        """Normalize waveform data to have consistent time points"""
+        """Normalize waveform data to have consistent time points
+
+        Every signal is expanded onto the union of all timestamps, carrying
+        its last value forward.
+        """
         if not waveform_data:
             return waveform_data
         
-        # Get all unique time points from all signals
-        all_times = set()
-        for signal_data in waveform_data.values():
-            all_times.update(signal_data['times'])
+        # Signal time lists are already sorted, so merge them in one pass
+        sorted_times = []
+        for t in heapq.merge(*(signal_data['times'] for signal_data in waveform_data.values())):
+            if not sorted_times or t != sorted_times[-1]:
+                sorted_times.append(t)
         
-        if not all_times:
+        if not sorted_times:
             return waveform_data
         
-        sorted_times = sorted(all_times)
-        
-        # Create normalized data for each signal
         normalized_data = {}
         
         for signal_name, signal_data in waveform_data.items():
-            normalized_times = []
-            normalized_values = []
-            current_value = 0
-            
-            for t in sorted_times:
-                # Find the most recent value for this signal at time t
-                value_found = False
-                for i, signal_time in enumerate(signal_data['times']):
-                    if signal_time <= t:
-                        current_value = signal_data['values'][i]
-                        value_found = True
-                    else:
-                        break
-                
-                normalized_times.append(t)
-                normalized_values.append(current_value)
-            
-            normalized_data[signal_name] = {
-                'times': normalized_times,
-                'values': normalized_values,
-                'name': signal_name
-            }
+            normalized_data[signal_name] = dict(
+                signal_data,
+                times=sorted_times,
+                values=self._sample_on_grid(signal_data, sorted_times),
+                name=signal_name
+            )
         
         return normalized_data
     
+    def _sample_on_grid(self, signal_data, grid):
+        """Value of a signal at each grid time, sweeping both lists once"""
+        times = signal_data['times']
+        values = signal_data['values']
+        sampled = []
+        current_value = 0
+        j = 0
+        for t in grid:
+            while j < len(times) and times[j] <= t:
+                current_value = values[j]
+                j += 1
+            sampled.append(current_value)
+        return sampled
+    
+    def _value_changes(self, signal_data, end_time):
+        """Run-length form of a signal: only the samples where it changes"""
+        change_times = []
+        change_values = []
+        for t, value in zip(signal_data['times'], signal_data['values']):
+            if change_values and value == change_values[-1]:
+                continue
+            change_times.append(t)
+            change_values.append(value)
+        if change_times and change_times[-1] != end_time:
+            change_times.append(end_time)
+            change_values.append(change_values[-1])
+        return change_times, change_values
+    
+    def waveform_changes(self, waveform_data):
+        """Change-only (run-length) form of a waveform, aligned or not
+        
+        Each signal keeps only the samples where its value changes, plus a
+        closing sample at the last timestamp so the end of the trace is
+        preserved. Signals are compressed from their own columns, without
+        going through the shared grid.
+        """
+        end_times = [signal_data['times'][-1] for signal_data in waveform_data.values() if signal_data['times']]
+        if not end_times:
+            return waveform_data
+        end_time = max(end_times)
+        
+        changes = {}
+        for signal_name, signal_data in waveform_data.items():
+            change_times, change_values = self._value_changes(signal_data, end_time)
+            changes[signal_name] = dict(signal_data, times=change_times, values=change_values, name=signal_name)
+        return changes
+    
+    def tool_version(self):
+        """Version banner of the installed Icarus Verilog, or None if unavailable"""
+        if not self._tool_checked:
+            try:
+                result = subprocess.run([self.ivl_path, '-V'], capture_output=True, text=True, timeout=5)
+                if result.returncode == 0:
+                    lines = (result.stdout or result.stderr).splitlines()
+                    self._tool_version = lines[0].strip() if lines else self.ivl_path
+            except:
+                self._tool_version = None
+            self._tool_checked = True
+        return self._tool_version
+    
     def check_dependencies(self):
         """Check if Icarus Verilog is installed"""
-        try:
-            result = subprocess.run([self.ivl_path, '-V'], capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except:
-            return False
-            
\ No newline at end of file
+        return self.tool_version() is not None
@@ -0,0 +1,181 @@
+"""Compact binary encoding of change-only waveforms
+
+Layout (all integers are unsigned LEB128 varints unless noted):
+
+    magic         4 bytes  b'KWV1'
+    flags         1 byte   bit 0: the rest is zlib-compressed
+    signal count
+    per signal:
+        name length, name (UTF-8)
+        width
+        value bits         1, 2, 4 or 8: codes are bit-packed, LSB first;
+                           0: codes are varints
+        has range          1 byte; 1 when min and max planes follow
+        sample count
+        times              delta-encoded from 0
+        values             codes, padded to a whole byte
+        [min, max]         same encoding as values
+
+A value is stored as value + 1 so that 0 can stand for unknown (x/z).
+"""
+import struct
+import zlib
+
+MAGIC = b'KWV1'
+COMPRESSED = 0x01
+CONTENT_TYPE = 'application/vnd.kmap.waveform'
+
+
+def pack_waveform(signals, compress=True):
+    """Encode an iterable of signal dicts (name, width, times, values and
+    optionally min/max) into the packed format"""
+    body = bytearray()
+    signals = list(signals)
+    _write_varint(body, len(signals))
+    for signal in signals:
+        name = signal['name'].encode('utf-8')
+        _write_varint(body, len(name))
+        body += name
+
+        width = signal.get('width', 1)
+        bits = _value_bits(width)
+        planes = [signal['values']]
+        if 'min' in signal:
+            planes.extend([signal['min'], signal['max']])
+        _write_varint(body, width)
+        body.append(bits)
+        body.append(1 if len(planes) == 3 else 0)
+
+        times = signal['times']
+        _write_varint(body, len(times))
+        body += _pack_times(times)
+        for plane in planes:
+            body += _pack_codes([0 if value is None else value + 1 for value in plane], bits)
+
+    flags = 0
+    if compress:
+        body = zlib.compress(bytes(body), 6)
+        flags |= COMPRESSED
+    return MAGIC + struct.pack('B', flags) + bytes(body)
+
+
+def unpack_waveform(data):
+    """Decode pack_waveform output back into a dict of signal dicts"""
+    if data[:4] != MAGIC:
+        raise ValueError("Not a packed waveform")
+    body = data[5:]
+    if data[4] & COMPRESSED:
+        body = zlib.decompress(body)
+
+    position = 0
+    count, position = _read_varint(body, position)
+    signals = {}
+    for _ in range(count):
+        length, position = _read_varint(body, position)
+        name = body[position:position + length].decode('utf-8')
+        position += length
+        width, position = _read_varint(body, position)
+        bits, has_range = body[position], body[position + 1]
+        position += 2
+        samples, position = _read_varint(body, position)
+
+        times = []
+        time = 0
+        for _ in range(samples):
+            delta, position = _read_varint(body, position)
+            time += delta
+            times.append(time)
+
+        planes = []
+        for _ in range(3 if has_range else 1):
+            codes, position = _unpack_codes(body, position, samples, bits)
+            planes.append([code - 1 if code else None for code in codes])
+
+        signal = {'name': name, 'width': width, 'times': times, 'values': planes[0]}
+        if has_range:
+            signal['min'], signal['max'] = planes[1], planes[2]
+        signals[name] = signal
+    return signals
+
+
+def _value_bits(width):
+    # Codes run up to 2**width (value + 1), so they need width + 1 bits;
+    # round that up to a size that divides a byte, or fall back to varints
+    needed = width + 1
+    for bits in (1, 2, 4, 8):
+        if needed <= bits:
+            return bits
+    return 0
+
+
+def _pack_times(times):
+    previous = 0
+    deltas = []
+    for time in times:
+        if not isinstance(time, int) or time < previous:
+            raise ValueError("Packed waveforms need increasing integer times")
+        deltas.append(time - previous)
+        previous = time
+    # Deltas below 128 are single-byte varints, which bytes() packs directly
+    if not deltas or max(deltas) < 0x80:
+        return bytes(deltas)
+    out = bytearray()
+    for delta in deltas:
+        _write_varint(out, delta)
+    return out
+
+
+def _pack_codes(codes, bits):
+    if bits == 0:
+        out = bytearray()
+        for code in codes:
+            _write_varint(out, code)
+        return out
+    if bits == 8:
+        return bytes(codes)
+
+    per_byte = 8 // bits
+    codes = codes + [0] * (-len(codes) % per_byte)
+    packed = codes[0::per_byte]
+    for lane in range(1, per_byte):
+        shift = lane * bits
+        packed = [byte | code << shift for byte, code in zip(packed, codes[lane::per_byte])]
+    return bytes(packed)
+
+
+def _unpack_codes(body, position, samples, bits):
+    if bits == 0:
+        codes = []
+        for _ in range(samples):
+            code, position = _read_varint(body, position)
+            codes.append(code)
+        return codes, position
+
+    per_byte = 8 // bits
+    length = -(-samples // per_byte)
+    mask = (1 << bits) - 1
+    codes = [
+        byte >> (lane * bits) & mask
+        for byte in body[position:position + length]
+        for lane in range(per_byte)
+    ]
+    return codes[:samples], position + length
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(body, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = body[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
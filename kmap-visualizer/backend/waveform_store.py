@@ -0,0 +1,129 @@
+import uuid
+from bisect import bisect_left, bisect_right
+from result_cache import LRUCache
+
+
+class StoredWaveform:
+    """Change-only signals of one simulation, kept for windowed reads
+
+    Unknown (x/z) values are stored as -1 so bucket minima and maxima can
+    be computed with the built-in min/max.
+    """
+
+    def __init__(self, waveform_changes):
+        self.signals = {}
+        self.end_time = 0
+        points = 0
+        for name, signal in waveform_changes.items():
+            times = list(signal['times'])
+            values = [-1 if value is None else value for value in signal['values']]
+            self.signals[name] = (times, values, signal.get('width', 1))
+            if times:
+                self.end_time = max(self.end_time, times[-1])
+            points += len(times)
+        self.size = 256 + 64 * points
+
+
+class WaveformStore:
+    """Recent waveforms by id, serving decimated views of a time window
+
+    A window of `width` pixels splits [start, end] into that many buckets.
+    When a signal has no more transitions in the window than there are
+    pixels, they are returned exactly. Otherwise each bucket with several
+    transitions becomes one point carrying the value at the bucket's end
+    plus the min and max seen inside it, so a glitch narrower than a pixel
+    still shows up. A width of None returns every transition.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.cache = LRUCache(max_bytes, size_of=lambda waveform: waveform.size)
+
+    def put(self, waveform_changes):
+        """Store a change-only waveform, returning its id"""
+        waveform_id = uuid.uuid4().hex
+        self.cache.put(waveform_id, StoredWaveform(waveform_changes))
+        return waveform_id
+
+    def get(self, waveform_id):
+        return self.cache.get(waveform_id)
+
+    def window(self, waveform, start=None, end=None, width=1000, names=None):
+        """Decimated view of the stored signals between start and end"""
+        start = 0 if start is None else self._as_time(start)
+        end = waveform.end_time if end is None else self._as_time(end)
+        if end <= start:
+            raise ValueError("end must be greater than start")
+        if width is not None and width < 1:
+            raise ValueError("width must be at least 1 pixel")
+
+        names = list(waveform.signals) if names is None else names
+        unknown = [name for name in names if name not in waveform.signals]
+        if unknown:
+            raise ValueError(f"Unknown signals: {', '.join(unknown)}")
+
+        signals = {}
+        for name in names:
+            times, values, signal_width = waveform.signals[name]
+            view = self._decimate(times, values, start, end, width)
+            view.update(name=name, width=signal_width)
+            signals[name] = view
+        return {'start': start, 'end': end, 'end_time': waveform.end_time, 'signals': signals}
+
+    def _as_time(self, value):
+        # Query strings arrive as floats; keep whole timestamps integral
+        return int(value) if float(value).is_integer() else value
+
+    def _decimate(self, times, values, start, end, width):
+        out_times, out_values, out_min, out_max = [], [], [], []
+
+        def emit(time, value, low, high):
+            out_times.append(time)
+            out_values.append(value)
+            out_min.append(low)
+            out_max.append(high)
+
+        # The value in effect when the window opens
+        first = bisect_right(times, start) - 1
+        if first >= 0:
+            emit(start, values[first], values[first], values[first])
+        i = first + 1
+        last = bisect_right(times, end)
+
+        decimated = width is not None and last - i > width
+        if not decimated:
+            for j in range(i, last):
+                emit(times[j], values[j], values[j], values[j])
+        else:
+            bucket = (end - start) / width
+            while i < last:
+                index = int((times[i] - start) // bucket)
+                j = bisect_left(times, start + (index + 1) * bucket, i + 1, last)
+                if j - i == 1:
+                    emit(times[i], values[i], values[i], values[i])
+                else:
+                    segment = values[i:j]
+                    if out_values:
+                        segment.append(out_values[-1])
+                    emit(times[i], values[j - 1], *self._known_range(segment))
+                i = j
+
+        view = {
+            'times': out_times,
+            'values': [value if value >= 0 else None for value in out_values],
+            'decimated': decimated
+        }
+        if decimated:
+            view['min'] = [value if value >= 0 else None for value in out_min]
+            view['max'] = [value if value >= 0 else None for value in out_max]
+        return view
+
+    def _known_range(self, segment):
+        low, high = min(segment), max(segment)
+        if low < 0:
+            known = [value for value in segment if value >= 0]
+            low = min(known) if known else -1
+            high = max(known) if known else -1
+        return low, high
+
+    def stats(self):
+        return self.cache.stats()
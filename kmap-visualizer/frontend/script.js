@@ -2,6 +2,7 @@ class DigitalLogicExplorer {
     constructor() {
         this.backendUrl = 'http://localhost:5000';
         this.chart = null;
+        this.waveformView = null;
         this.currentTheme = localStorage.getItem('theme') || 'light';
         this.isBackendConnected = false;
         this.learningStats = {
@@ -240,7 +241,7 @@ class DigitalLogicExplorer {
             const response = await fetch(`${this.backendUrl}/generate_truth_table`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ expression })
+                body: JSON.stringify({ expression, format: 'hex' })
             });
 
             if (!response.ok) throw new Error(`Server error: ${response.status}`);
@@ -256,7 +257,7 @@ class DigitalLogicExplorer {
             this.saveLearningStats();
             
             this.displayTruthTable(data);
-            this.updateLearningStatus(`Analyzed ${data.variables?.length || 0} variables with ${data.truth_table?.length || 0} combinations`);
+            this.updateLearningStatus(`Analyzed ${data.variables?.length || 0} variables with ${data.num_rows || 0} combinations`);
             
         } catch (error) {
             console.error('Truth table error:', error);
@@ -317,15 +318,33 @@ class DigitalLogicExplorer {
         this.updateLearningStatus('Generating Verilog code and running simulation...');
 
         try {
-            const response = await fetch(`${this.backendUrl}/generate_verilog`, {
+            // Run as a background job so the code can be shown while it simulates.
+            // The waveform stays on the server; only a view as wide as the chart comes back
+            const response = await fetch(`${this.backendUrl}/jobs/generate_verilog`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ expression })
+                body: JSON.stringify({ expression, waveform_format: 'lod', waveform_pixels: this.waveformPixels() })
             });
 
+            if (response.status === 503) {
+                // Simulation queue is full; the backend says when to retry
+                const busy = await response.json().catch(() => ({}));
+                throw new Error(busy.error || 'Simulator is busy, please retry shortly');
+            }
             if (!response.ok) throw new Error(`Server error: ${response.status}`);
 
-            const data = await response.json();
+            const job = await response.json();
+
+            if (!job.success) {
+                throw new Error(job.error || 'Server returned error');
+            }
+
+            await this.followVerilogJob(job);
+
+            const resultResponse = await fetch(`${this.backendUrl}${job.result_url}`);
+            if (!resultResponse.ok) throw new Error(`Server error: ${resultResponse.status}`);
+
+            const data = await resultResponse.json();
 
             if (!data.success) {
                 throw new Error(data.error || 'Server returned error');
@@ -345,11 +364,77 @@ class DigitalLogicExplorer {
         }
     }
 
+    followVerilogJob(job) {
+        // Resolves once the job has finished, showing the code as soon as it is generated
+        const stageMessages = {
+            compiled: 'Verilog compiled, running simulation...',
+            simulated: 'Simulation finished, reading waveform...',
+            parsed: 'Waveform ready'
+        };
+
+        return new Promise((resolve, reject) => {
+            const events = new EventSource(`${this.backendUrl}${job.events_url}`);
+
+            events.addEventListener('stage', (message) => {
+                const event = JSON.parse(message.data);
+                if (event.stage === 'generated') {
+                    const verilogCode = document.getElementById('verilogCode');
+                    if (verilogCode) verilogCode.textContent = event.verilog_code || '// No Verilog code generated';
+                    this.showResultSection('verilogResults');
+                    this.updateLearningStatus('Verilog code generated, simulating...');
+                } else if (stageMessages[event.stage]) {
+                    this.updateLearningStatus(stageMessages[event.stage]);
+                }
+            });
+            events.addEventListener('done', () => {
+                events.close();
+                resolve();
+            });
+            events.addEventListener('failed', (message) => {
+                events.close();
+                reject(new Error(JSON.parse(message.data).error || 'Simulation failed'));
+            });
+            events.onerror = () => {
+                // EventSource reconnects on its own unless the job is gone
+                if (events.readyState === EventSource.CLOSED) {
+                    reject(new Error('Lost connection to the simulation job'));
+                }
+            };
+        });
+    }
+
     getExpression() {
         const input = document.getElementById('expressionInput');
         return input ? input.value.trim() : '';
     }
 
+    truthTableRowReader(data) {
+        // Returns (index) => { inputs, output } for any of the backend's table formats
+        const variables = data.variables || [];
+        const numVars = variables.length;
+        const inputsOf = index => variables.map((_, i) => (index >> (numVars - 1 - i)) & 1);
+
+        if (data.format === 'hex' && typeof data.outputs === 'string') {
+            const hex = data.outputs;
+            return index => {
+                const digit = parseInt(hex[hex.length - 1 - (index >> 2)], 16);
+                return { inputs: inputsOf(index), output: ((digit >> (index & 3)) & 1) === 1 };
+            };
+        }
+
+        if (data.format === 'minterms' && Array.isArray(data.minterms)) {
+            const ones = new Set(data.minterms);
+            return index => ({ inputs: inputsOf(index), output: ones.has(index) });
+        }
+
+        const rows = data.truth_table || [];
+        const offset = data.offset || 0;
+        return index => {
+            const row = rows[index - offset] || {};
+            return { inputs: variables.map(variable => row[variable] ?? '?'), output: row.output ?? false };
+        };
+    }
+
     displayTruthTable(data) {
         const container = document.getElementById('truthTableContainer');
         const variableCount = document.getElementById('variableCount');
@@ -359,13 +444,14 @@ class DigitalLogicExplorer {
         container.innerHTML = '';
 
         const variables = data.variables || [];
-        const truthTable = data.truth_table || [];
+        const numRows = data.num_rows ?? (data.truth_table || []).length;
+        const readRow = this.truthTableRowReader(data);
 
         if (variableCount) {
-            variableCount.textContent = `${variables.length} Variables, ${truthTable.length} Combinations`;
+            variableCount.textContent = `${variables.length} Variables, ${numRows} Combinations`;
         }
 
-        if (truthTable.length === 0) {
+        if (numRows === 0) {
             container.innerHTML = `
                 <div class="text-center py-12 text-gray-500 dark:text-gray-400">
                     <i class="fas fa-table text-4xl mb-4"></i>
@@ -398,35 +484,63 @@ class DigitalLogicExplorer {
         thead.appendChild(headerRow);
         table.appendChild(thead);
 
-        // Create table body
+        // Create table body; rows are decoded and rendered a page at a time
         const tbody = document.createElement('tbody');
-        
-        truthTable.forEach((row, index) => {
-            const tr = document.createElement('tr');
-            tr.className = index % 2 === 0 ? 'bg-white dark:bg-gray-800' : 'bg-gray-50 dark:bg-gray-700';
-
-            variables.forEach(variable => {
-                const td = document.createElement('td');
-                td.className = 'p-4 text-center border-b border-gray-200 dark:border-gray-600 text-gray-900 dark:text-white';
-                td.textContent = row[variable] ?? '?';
-                tr.appendChild(td);
-            });
-
-            const outputTd = document.createElement('td');
-            const output = row.output ?? false;
-            outputTd.className = output ? 
-                'bg-gradient-to-r from-green-500 to-green-600 text-white font-bold p-4 text-center' : 
-                'bg-gradient-to-r from-red-500 to-red-600 text-white font-bold p-4 text-center';
-            outputTd.textContent = output ? '1' : '0';
-            outputTd.innerHTML += output ? ' <i class="fas fa-check ml-1"></i>' : ' <i class="fas fa-times ml-1"></i>';
-            tr.appendChild(outputTd);
+        const pageSize = 256;
+        let rendered = 0;
+
+        const renderPage = () => {
+            const end = Math.min(rendered + pageSize, numRows);
+            const fragment = document.createDocumentFragment();
+
+            for (let index = rendered; index < end; index++) {
+                const { inputs, output } = readRow(index);
+                const tr = document.createElement('tr');
+                tr.className = index % 2 === 0 ? 'bg-white dark:bg-gray-800' : 'bg-gray-50 dark:bg-gray-700';
+
+                inputs.forEach(value => {
+                    const td = document.createElement('td');
+                    td.className = 'p-4 text-center border-b border-gray-200 dark:border-gray-600 text-gray-900 dark:text-white';
+                    td.textContent = value;
+                    tr.appendChild(td);
+                });
+
+                const outputTd = document.createElement('td');
+                outputTd.className = output ? 
+                    'bg-gradient-to-r from-green-500 to-green-600 text-white font-bold p-4 text-center' : 
+                    'bg-gradient-to-r from-red-500 to-red-600 text-white font-bold p-4 text-center';
+                outputTd.textContent = output ? '1' : '0';
+                outputTd.innerHTML += output ? ' <i class="fas fa-check ml-1"></i>' : ' <i class="fas fa-times ml-1"></i>';
+                tr.appendChild(outputTd);
+
+                fragment.appendChild(tr);
+            }
 
-            tbody.appendChild(tr);
-        });
+            tbody.appendChild(fragment);
+            rendered = end;
+        };
 
+        renderPage();
         table.appendChild(tbody);
         container.appendChild(table);
 
+        if (rendered < numRows) {
+            // Render further pages as the end of the table scrolls into view
+            const sentinel = document.createElement('div');
+            sentinel.className = 'h-1';
+            container.appendChild(sentinel);
+
+            const observer = new IntersectionObserver(entries => {
+                if (!entries.some(entry => entry.isIntersecting)) return;
+                renderPage();
+                if (rendered >= numRows) {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            });
+            observer.observe(sentinel);
+        }
+
         this.showResultSection('truthTableResults');
     }
 
@@ -441,59 +555,96 @@ class DigitalLogicExplorer {
                 <div class="text-center py-12">
                     <i class="fas fa-border-all text-4xl text-gray-400 mb-4"></i>
                     <p class="text-gray-600 dark:text-gray-400 text-lg">K-map not available for this expression</p>
-                    <p class="text-gray-500 dark:text-gray-500 text-sm mt-2">Try an expression with 1-4 variables</p>
+                    <p class="text-gray-500 dark:text-gray-500 text-sm mt-2">Try an expression with 1-6 variables</p>
                 </div>
             `;
             return;
         }
 
-        const table = document.createElement('table');
-        table.className = 'border-collapse border-2 border-gray-300 dark:border-gray-600 rounded-2xl overflow-hidden shadow-2xl bg-white dark:bg-gray-800';
+        const kmap = data.kmap;
+        const submaps = kmap.submaps || [{ label: '', grid: kmap.grid || [] }];
+        const groupColors = ['ring-yellow-400', 'ring-cyan-400', 'ring-lime-400', 'ring-orange-400', 'ring-sky-400', 'ring-fuchsia-400'];
+
+        // Index the cells of each grouping by "submap,row,col"
+        const cellGroups = new Map();
+        (kmap.groups || []).forEach((group, groupIndex) => {
+            (group.cells || []).forEach(cell => {
+                const key = cell.join(',');
+                if (!cellGroups.has(key)) cellGroups.set(key, []);
+                cellGroups.get(key).push(groupIndex);
+            });
+        });
 
-        // Create headers
-        const thead = document.createElement('thead');
-        let headerRow = document.createElement('tr');
-        
-        const emptyHeader = document.createElement('th');
-        emptyHeader.className = 'bg-gradient-to-r from-purple-500 to-purple-600 text-white font-bold p-6 text-lg';
-        emptyHeader.textContent = data.kmap.row_var || '';
-        headerRow.appendChild(emptyHeader);
+        const wrapper = document.createElement('div');
+        wrapper.className = submaps.length > 1 ? 'flex flex-wrap gap-6 justify-center' : '';
 
-        (data.kmap.cols || []).forEach(col => {
-            const th = document.createElement('th');
-            th.className = 'bg-gradient-to-r from-purple-500 to-purple-600 text-white font-bold p-6 text-lg';
-            th.textContent = col;
-            headerRow.appendChild(th);
-        });
+        submaps.forEach((submap, submapIndex) => {
+            const block = document.createElement('div');
 
-        thead.appendChild(headerRow);
-        table.appendChild(thead);
+            if (kmap.submap_var) {
+                const caption = document.createElement('div');
+                caption.className = 'text-center font-bold text-gray-700 dark:text-gray-300 mb-2';
+                caption.textContent = `${kmap.submap_var} = ${submap.label}`;
+                block.appendChild(caption);
+            }
 
-        // Create table body
-        const tbody = document.createElement('tbody');
-        
-        (data.kmap.grid || []).forEach((row, rowIndex) => {
-            const tr = document.createElement('tr');
+            const table = document.createElement('table');
+            table.className = 'border-collapse border-2 border-gray-300 dark:border-gray-600 rounded-2xl overflow-hidden shadow-2xl bg-white dark:bg-gray-800';
+
+            // Create headers
+            const thead = document.createElement('thead');
+            const headerRow = document.createElement('tr');
             
-            const rowHeader = document.createElement('th');
-            rowHeader.className = 'bg-gradient-to-r from-purple-500 to-purple-600 text-white font-bold p-6 text-lg';
-            rowHeader.textContent = (data.kmap.rows || [])[rowIndex] || '';
-            tr.appendChild(rowHeader);
-
-            (row || []).forEach((cell, colIndex) => {
-                const td = document.createElement('td');
-                td.className = cell ? 
-                    'bg-gradient-to-br from-purple-500 via-pink-500 to-red-500 text-white font-bold p-6 text-center text-lg shadow-inner transform scale-105' : 
-                    'bg-white dark:bg-gray-800 text-gray-900 dark:text-white font-bold p-6 text-center text-lg border-2 border-gray-300 dark:border-gray-600';
-                td.textContent = cell ? '1' : '0';
-                tr.appendChild(td);
+            const emptyHeader = document.createElement('th');
+            emptyHeader.className = 'bg-gradient-to-r from-purple-500 to-purple-600 text-white font-bold p-6 text-lg';
+            emptyHeader.textContent = kmap.row_var || '';
+            headerRow.appendChild(emptyHeader);
+
+            (kmap.cols || []).forEach(col => {
+                const th = document.createElement('th');
+                th.className = 'bg-gradient-to-r from-purple-500 to-purple-600 text-white font-bold p-6 text-lg';
+                th.textContent = col;
+                headerRow.appendChild(th);
+            });
+
+            thead.appendChild(headerRow);
+            table.appendChild(thead);
+
+            // Create table body
+            const tbody = document.createElement('tbody');
+            
+            (submap.grid || []).forEach((row, rowIndex) => {
+                const tr = document.createElement('tr');
+                
+                const rowHeader = document.createElement('th');
+                rowHeader.className = 'bg-gradient-to-r from-purple-500 to-purple-600 text-white font-bold p-6 text-lg';
+                rowHeader.textContent = (kmap.rows || [])[rowIndex] || '';
+                tr.appendChild(rowHeader);
+
+                (row || []).forEach((cell, colIndex) => {
+                    const td = document.createElement('td');
+                    td.className = cell ? 
+                        'bg-gradient-to-br from-purple-500 via-pink-500 to-red-500 text-white font-bold p-6 text-center text-lg shadow-inner transform scale-105' : 
+                        'bg-white dark:bg-gray-800 text-gray-900 dark:text-white font-bold p-6 text-center text-lg border-2 border-gray-300 dark:border-gray-600';
+                    td.textContent = cell ? '1' : '0';
+
+                    const groups = cellGroups.get([submapIndex, rowIndex, colIndex].join(','));
+                    if (groups) {
+                        td.classList.add('ring-4', 'ring-inset', groupColors[groups[0] % groupColors.length]);
+                        td.title = groups.map(index => kmap.groups[index].term).join('\n');
+                    }
+                    tr.appendChild(td);
+                });
+
+                tbody.appendChild(tr);
             });
 
-            tbody.appendChild(tr);
+            table.appendChild(tbody);
+            block.appendChild(table);
+            wrapper.appendChild(block);
         });
 
-        table.appendChild(tbody);
-        container.appendChild(table);
+        container.appendChild(wrapper);
 
         this.displaySimplificationResults(data);
         this.showResultSection('kmapResults');
@@ -505,7 +656,9 @@ class DigitalLogicExplorer {
 
         const truthTable = data.truth_table || [];
         const variables = data.variables || [];
-        const primeImplicants = this.generatePrimeImplicants(truthTable, variables);
+        const primeImplicants = data.kmap?.groups
+            ? data.kmap.groups.map(group => group.term.replace(/ & /g, '·'))
+            : this.generatePrimeImplicants(truthTable, variables);
         const simplifiedExpr = data.simplified_expression || 'No simplification available';
 
         container.innerHTML = `
@@ -599,7 +752,19 @@ class DigitalLogicExplorer {
             simulationOutput.textContent = data.simulation_output || 'No simulation output available';
         }
 
-        if (data.waveform_data && Object.keys(data.waveform_data).length > 0) {
+        this.waveformView = data.waveform_id
+            ? { id: data.waveform_id, start: 0, end: data.waveform_end_time, endTime: data.waveform_end_time }
+            : null;
+
+        if (data.waveform_packed) {
+            const bytes = Uint8Array.from(atob(data.waveform_packed), (c) => c.charCodeAt(0));
+            this.decodePackedWaveform(bytes.buffer)
+                .then((waveform) => this.createWaveformChart(waveform))
+                .catch((error) => {
+                    console.error('Waveform decode error:', error);
+                    this.showNoWaveformMessage();
+                });
+        } else if (data.waveform_data && Object.keys(data.waveform_data).length > 0) {
             this.createWaveformChart(data.waveform_data);
         } else {
             this.showNoWaveformMessage();
@@ -623,20 +788,14 @@ class DigitalLogicExplorer {
         Object.keys(waveformData).forEach((signalName) => {
             const signal = waveformData[signalName];
             if (!signal || !signal.times || !signal.values) return;
+            // The chart draws single-bit levels; vectors such as loop counters are skipped
+            if (signal.width > 1) return;
 
             const color = colors[signalIndex % colors.length];
-            const data = [];
-            
-            for (let i = 0; i < signal.times.length; i++) {
-                data.push({ x: signal.times[i], y: signal.values[i] });
-                if (i < signal.times.length - 1) {
-                    data.push({ x: signal.times[i + 1], y: signal.values[i] });
-                }
-            }
 
             datasets.push({
                 label: signal.name || `Signal ${signalIndex + 1}`,
-                data: data,
+                data: this.waveformPoints(signal),
                 borderColor: color,
                 backgroundColor: color + '40',
                 borderWidth: 4,
@@ -659,6 +818,7 @@ class DigitalLogicExplorer {
         }
 
         const isDark = this.currentTheme === 'dark';
+        this.attachWaveformNavigation(ctx);
         
         this.chart = new Chart(ctx, {
             type: 'line',
@@ -671,6 +831,8 @@ class DigitalLogicExplorer {
                 scales: {
                     x: {
                         type: 'linear',
+                        min: this.waveformView ? this.waveformView.start : undefined,
+                        max: this.waveformView ? this.waveformView.end : undefined,
                         title: {
                             display: true,
                             text: 'Time (ns)',
@@ -724,6 +886,199 @@ class DigitalLogicExplorer {
         });
     }
 
+    waveformPoints(signal) {
+        // Step-line points; a decimated bucket also draws a vertical span from its min to its max
+        const data = [];
+        const { times, values } = signal;
+
+        for (let i = 0; i < times.length; i++) {
+            if (signal.decimated && signal.min[i] !== signal.max[i]) {
+                data.push({ x: times[i], y: signal.min[i] }, { x: times[i], y: signal.max[i] });
+            }
+            // Unknown values are null in JSON and -1 in decoded packed arrays
+            const value = values[i] < 0 ? null : values[i];
+            data.push({ x: times[i], y: value });
+            const next = i < times.length - 1 ? times[i + 1] : (this.waveformView ? this.waveformView.end : null);
+            if (next !== null && next > times[i]) {
+                data.push({ x: next, y: value });
+            }
+        }
+        return data;
+    }
+
+    waveformPixels() {
+        const canvas = document.getElementById('waveformChart');
+        return Math.max(200, Math.round((canvas && canvas.clientWidth) || 1000));
+    }
+
+    attachWaveformNavigation(canvas) {
+        // Wheel zooms around the cursor, dragging pans; each change fetches only the visible window
+        if (this.waveformNavigationAttached) return;
+        this.waveformNavigationAttached = true;
+
+        canvas.addEventListener('wheel', (event) => {
+            const view = this.waveformView;
+            if (!view || !this.chart) return;
+            event.preventDefault();
+
+            const anchor = this.chart.scales.x.getValueForPixel(event.offsetX);
+            const factor = event.deltaY > 0 ? 1.25 : 0.8;
+            const span = Math.max(1, (view.end - view.start) * factor);
+            const ratio = (anchor - view.start) / (view.end - view.start);
+            this.setWaveformWindow(anchor - span * ratio, anchor - span * ratio + span);
+        }, { passive: false });
+
+        let dragStart = null;
+        canvas.addEventListener('mousedown', (event) => {
+            if (this.waveformView) dragStart = { x: event.offsetX, start: this.waveformView.start, end: this.waveformView.end };
+        });
+        window.addEventListener('mouseup', () => { dragStart = null; });
+        canvas.addEventListener('mousemove', (event) => {
+            if (!dragStart || !this.chart) return;
+            const area = this.chart.chartArea;
+            const shift = (dragStart.x - event.offsetX) / (area.right - area.left) * (dragStart.end - dragStart.start);
+            this.setWaveformWindow(dragStart.start + shift, dragStart.end + shift);
+        });
+        canvas.addEventListener('dblclick', () => {
+            if (this.waveformView) this.setWaveformWindow(0, this.waveformView.endTime);
+        });
+    }
+
+    setWaveformWindow(start, end) {
+        const view = this.waveformView;
+        const span = end - start;
+        start = Math.max(0, Math.min(start, view.endTime - span));
+        end = Math.min(view.endTime, start + span);
+        view.start = start;
+        view.end = end;
+
+        // Move the axis immediately, then replace the data once the window arrives
+        this.chart.options.scales.x.min = start;
+        this.chart.options.scales.x.max = end;
+        this.chart.update('none');
+
+        clearTimeout(this.waveformFetchTimer);
+        this.waveformFetchTimer = setTimeout(() => this.loadWaveformWindow(), 120);
+    }
+
+    async loadWaveformWindow() {
+        const view = this.waveformView;
+        if (!view || !this.chart) return;
+        const { id, start, end } = view;
+        // Packed windows need whole timestamps
+        const params = new URLSearchParams({
+            start: Math.floor(start), end: Math.ceil(end), width: this.waveformPixels(), format: 'packed'
+        });
+
+        try {
+            const response = await fetch(`${this.backendUrl}/waveform/${id}?${params}`);
+            if (!response.ok || response.headers.get('Content-Type') !== 'application/vnd.kmap.waveform') return;
+            const signals = await this.decodePackedWaveform(await response.arrayBuffer());
+            // Ignore stale answers from before the latest zoom or pan
+            if (this.waveformView !== view || view.start !== start || view.end !== end) return;
+
+            this.chart.data.datasets.forEach((dataset) => {
+                const signal = signals[dataset.label];
+                if (signal) dataset.data = this.waveformPoints(signal);
+            });
+            this.chart.update('none');
+        } catch (error) {
+            console.error('Waveform window error:', error);
+        }
+    }
+
+    async decodePackedWaveform(buffer) {
+        // Inverse of backend/waveform_packing.py; times become Float64Arrays
+        // and values Int32Arrays, with -1 for unknown. Signals wider than 31
+        // bits don't fit an Int32Array, so their values are arrays of BigInt
+        // (-1n for unknown)
+        let bytes = new Uint8Array(buffer);
+        const magic = String.fromCharCode(...bytes.subarray(0, 4));
+        if (magic !== 'KWV1') throw new Error('Not a packed waveform');
+
+        if (bytes[4] & 1) {
+            const stream = new Blob([bytes.subarray(5)]).stream().pipeThrough(new DecompressionStream('deflate'));
+            bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+        } else {
+            bytes = bytes.subarray(5);
+        }
+
+        let position = 0;
+        const readVarint = () => {
+            // Arithmetic rather than bit operators so times beyond 2^31 survive
+            let value = 0;
+            let scale = 1;
+            let byte;
+            do {
+                byte = bytes[position++];
+                value += (byte & 0x7f) * scale;
+                scale *= 128;
+            } while (byte & 0x80);
+            return value;
+        };
+        const readBigVarint = () => {
+            let value = 0n;
+            let shift = 0n;
+            let byte;
+            do {
+                byte = bytes[position++];
+                value |= BigInt(byte & 0x7f) << shift;
+                shift += 7n;
+            } while (byte & 0x80);
+            return value;
+        };
+        const readCodes = (count, bits, width) => {
+            if (width > 31) {
+                // Wide values are always stored as varints
+                const codes = new Array(count);
+                for (let i = 0; i < count; i++) codes[i] = readBigVarint() - 1n;
+                return codes;
+            }
+            const codes = new Int32Array(count);
+            if (bits === 0) {
+                for (let i = 0; i < count; i++) codes[i] = readVarint() - 1;
+                return codes;
+            }
+            const perByte = 8 / bits;
+            const mask = (1 << bits) - 1;
+            for (let i = 0; i < count; i++) {
+                const byte = bytes[position + Math.floor(i / perByte)];
+                codes[i] = ((byte >> ((i % perByte) * bits)) & mask) - 1;
+            }
+            position += Math.ceil(count / perByte);
+            return codes;
+        };
+
+        const decoder = new TextDecoder();
+        const signals = {};
+        const signalCount = readVarint();
+        for (let s = 0; s < signalCount; s++) {
+            const nameLength = readVarint();
+            const name = decoder.decode(bytes.subarray(position, position + nameLength));
+            position += nameLength;
+            const width = readVarint();
+            const bits = bytes[position];
+            const hasRange = bytes[position + 1] === 1;
+            position += 2;
+
+            const count = readVarint();
+            const times = new Float64Array(count);
+            let time = 0;
+            for (let i = 0; i < count; i++) {
+                time += readVarint();
+                times[i] = time;
+            }
+
+            const signal = { name, width, times, values: readCodes(count, bits, width), decimated: hasRange };
+            if (hasRange) {
+                signal.min = readCodes(count, bits, width);
+                signal.max = readCodes(count, bits, width);
+            }
+            signals[name] = signal;
+        }
+        return signals;
+    }
+
     showNoWaveformMessage() {
         const chartContainer = document.getElementById('waveformChart');
         if (!chartContainer) return;